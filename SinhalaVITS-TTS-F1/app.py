@@ -9,13 +9,29 @@ import io
 import re
 import logging
 import hashlib
-from datetime import datetime, timedelta
-from flask import Flask, request, send_file, jsonify
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Flask, Response, g, has_request_context, request, send_file, jsonify
 from flask_cors import CORS
-from TTS.utils.synthesizer import Synthesizer
 from romanizer import sinhala_to_roman
-import torch
-from news_scraper import scrape_adaderana
+from news_scraper import ADA_DERANA_URL, NewsFeed, get_sample_news
+from news_archive import NewsArchive
+from audio_cache import create_audio_cache
+from audio_store import AudioStore, audio_key, model_fingerprint, snapshot_source
+from singleflight import SingleFlight
+from batch_scheduler import (
+    PRIORITY_BREAKING, PRIORITY_INTERACTIVE, PRIORITY_NAMES, PRIORITY_PRERENDER, AdmissionRejected,
+    InferenceScheduler, VitsBatchRunner
+)
+from streaming import STREAM_PEAK, split_sentences, wav_header, pcm16
+from prerender import prerender
+from model_loader import ModelLoader
+from model_pool import ModelPool
+from audio_encoding import EXTENSION_MIMETYPES, WAV, EncoderPool, negotiate_format
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, StageTimings, resident_memory_bytes
 
 # Configure logging
 logging.basicConfig(
@@ -26,21 +42,173 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+STARTED_AT = time.monotonic()
+CORS(app, expose_headers=["X-Audio-Hash", "Content-Location", "Server-Timing"])  # Enable CORS for all routes
 
 # Model paths
 MODEL_PATH = "Nipunika_210000.pth"
 CONFIG_PATH = "Nipunika_config.json"
 
+# Inference-only snapshot of MODEL_PATH (`python model_snapshot.py`), loaded
+# instead of the checkpoint when present. It is memory-mapped, so startup
+# reads only the weights inference uses, and every worker and replica shares
+# them through the page cache. MODEL_SNAPSHOT_PATH="" disables it.
+MODEL_SNAPSHOT_PATH = os.environ.get("MODEL_SNAPSHOT_PATH", "Nipunika_210000.snapshot.pt")
+
+# Inference backend: "torch" (Coqui Synthesizer), "onnx" (onnxruntime on an
+# export made with `python onnx_backend.py`) or "stub" (benchmarks.stub_synth,
+# fixed-latency tones for load tests; needs no model files). ORT_*_THREADS=0
+# leaves the choice to onnxruntime.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch").lower()
+ONNX_MODEL_PATH = os.environ.get("ONNX_MODEL_PATH", "Nipunika_210000.onnx")
+ORT_INTRA_OP_THREADS = int(os.environ.get("ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.environ.get("ORT_INTER_OP_THREADS", "0"))
+STUB_BASE_MS = float(os.environ.get("STUB_BASE_MS", "50"))
+STUB_MS_PER_CHAR = float(os.environ.get("STUB_MS_PER_CHAR", "1"))
+
+# CPU precision for the torch backend: fp32, int8 (quantized convs, ~4x less
+# weight memory) or bf16 (autocast). See precision.py and
+# benchmarks/bench_precision.py. Ignored on CUDA.
+INFERENCE_PRECISION = os.environ.get("INFERENCE_PRECISION", "fp32").lower()
+precision_info = None
+# {"source": "snapshot" | "checkpoint", "path": ...} once the torch model has loaded
+model_weights = None
+
 # Global synthesizer variable
 synth = None
 model_loaded = False
 model_error = None
 
-# Simple in-memory cache for TTS audio
-# Format: {text_hash: (audio_bytes, timestamp)}
-audio_cache = {}
+# The model loads on a background thread at startup (MODEL_EAGER_LOAD=0 defers
+# it to the first synthesis request) and is warmed up with WARMUP_TEXTS before
+# it reports ready. Synthesis waits up to MODEL_WAIT_SECONDS for it, then 503s.
+MODEL_EAGER_LOAD = os.environ.get("MODEL_EAGER_LOAD", "1") == "1"
+
+# SYNTHESIS_ENABLED=0 runs a news/health/audio-only process: it never loads the
+# model or imports torch/TTS (the synthesis endpoints 503), so it boots in well
+# under a second and can be scaled apart from the synthesis workers.
+SYNTHESIS_ENABLED = os.environ.get("SYNTHESIS_ENABLED", "1") == "1"
+MODEL_WAIT_SECONDS = float(os.environ.get("MODEL_WAIT_SECONDS", "30"))
+WARMUP_TEXTS = [
+    "ආයුබෝවන්",
+    "ශ්‍රී ලංකාවේ ආර්ථික ප්‍රතිසංස්කරණ ක්‍රියාවලිය ඉදිරියට",
+    "ශ්‍රී ලංකාවේ ආර්ථික ප්‍රතිසංස්කරණ ක්‍රියාවලිය ඉදිරි මාස කිහිපය තුළ තවදුරටත් "
+    "ක්‍රියාත්මක කිරීමට රජය තීරණය කර ඇති බව මුදල් අමාත්‍යාංශය පවසයි. ජාත්‍යන්තර "
+    "මූල්‍ය අරමුදලේ සහාය ඇතිව ක්‍රියාත්මක වන මෙම වැඩසටහන යටතේ රාජ්‍ය ආදායම ඉහළ "
+    "නැංවීම ප්‍රධාන අරමුණ වේ.",
+]
+
+# Micro-batching: requests arriving within TTS_BATCH_MAX_WAIT_MS of each other
+# share one forward pass. TTS_BATCH_MAX_SIZE=1 disables it.
+BATCH_MAX_SIZE = int(os.environ.get("TTS_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("TTS_BATCH_MAX_WAIT_MS", "10"))
+BATCH_MAX_TOKENS = int(os.environ.get("TTS_BATCH_MAX_TOKENS", "2000"))
+synth_scheduler = None
+
+# Model replicas: MODEL_REPLICAS > 1 loads the weights once and forks that many
+# inference processes sharing them copy-on-write, each pinned to its own
+# MODEL_REPLICA_THREADS CPUs (0 splits this process's CPUs evenly). Batches go
+# to the least-loaded replica. Meant for one server process per host (gunicorn
+# --workers 1 --threads N, or asgi_app.py); torch (CPU) and stub backends only.
+MODEL_REPLICAS = int(os.environ.get("MODEL_REPLICAS", "1"))
+MODEL_REPLICA_THREADS = int(os.environ.get("MODEL_REPLICA_THREADS", "0"))
+model_pool = None
+
+# Admission control: at most TTS_QUEUE_MAX_SIZE texts wait for the model, and
+# a listener's text is turned away (503 + Retry-After) when it is estimated to
+# finish later than TTS_QUEUE_SLO_SECONDS. Breaking headlines go first, then
+# listeners, then pre-render; shorter texts first within each. 0 disables.
+QUEUE_MAX_SIZE = int(os.environ.get("TTS_QUEUE_MAX_SIZE", "64"))
+QUEUE_SLO_SECONDS = float(os.environ.get("TTS_QUEUE_SLO_SECONDS", "30"))
+
+# Coalesces concurrent synthesis of the same text into one model call
+synthesis_flight = SingleFlight()
+
+# Audio cache keyed by text hash: shared Redis when REDIS_URL is set,
+# otherwise a bounded in-memory LRU per worker
 CACHE_EXPIRY_HOURS = 24  # Cache expires after 24 hours
+CACHE_MAX_MB = int(os.environ.get("AUDIO_CACHE_MAX_MB", "256"))
+REDIS_URL = os.environ.get("REDIS_URL")
+audio_cache = create_audio_cache(
+    redis_url=REDIS_URL,
+    max_bytes=CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=CACHE_EXPIRY_HOURS * 3600
+)
+
+# Content-addressed on-disk audio store shared by all gunicorn workers and
+# kept across restarts. Set AUDIO_STORE_DIR="" to disable.
+AUDIO_STORE_DIR = os.environ.get("AUDIO_STORE_DIR", "audio_store")
+AUDIO_STORE_MAX_MB = int(os.environ.get("AUDIO_STORE_MAX_MB", "2048"))
+audio_store = AudioStore(
+    AUDIO_STORE_DIR,
+    max_bytes=AUDIO_STORE_MAX_MB * 1024 * 1024
+) if AUDIO_STORE_DIR else None
+# The stub's tones must never be served as the model's audio from the store.
+# Audio is keyed by the checkpoint, whether it loads from the checkpoint or
+# its snapshot; a deployment that ships only the snapshot uses the checkpoint
+# fingerprint recorded in it.
+# MODEL_VERSION, if set, replaces the checkpoint fingerprint in every audio key
+# (bump it to invalidate the store, Redis and /api/audio URLs after a retrain).
+MODEL_VERSION = os.environ.get("MODEL_VERSION", "")
+if MODEL_VERSION:
+    MODEL_ID = MODEL_VERSION
+elif INFERENCE_BACKEND == "stub":
+    MODEL_ID = "stub"
+elif MODEL_SNAPSHOT_PATH and not os.path.exists(MODEL_PATH) and os.path.exists(MODEL_SNAPSHOT_PATH):
+    MODEL_ID = snapshot_source(MODEL_SNAPSHOT_PATH) or model_fingerprint(MODEL_SNAPSHOT_PATH)
+else:
+    MODEL_ID = model_fingerprint(MODEL_PATH)
+
+# Stored clips are served by content address from GET /api/audio/<hash>;
+# the address changes with the text, model or format, so responses are immutable
+AUDIO_HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+AUDIO_MAX_AGE = 365 * 24 * 3600
+
+# Opus/MP3 output: WAV is rendered once, then re-encoded per requested format
+# on a small pool of warm encoder threads. Each format is cached separately.
+AUDIO_ENCODER_WORKERS = int(os.environ.get("AUDIO_ENCODER_WORKERS", "2"))
+# (warm-up imports soundfile, which a news-only process only needs for ?format= requests;
+# with model replicas it waits until they are forked, see the end of this module)
+encoder_pool = EncoderPool(max_workers=AUDIO_ENCODER_WORKERS, warm=SYNTHESIS_ENABLED and MODEL_REPLICAS <= 1)
+
+# Prometheus metrics on GET /metrics, per worker process. Each response also
+# lists its stage timings in a Server-Timing header.
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram(
+    "tts_request_duration_seconds", "Request handling time (before the body is sent)", ["endpoint", "status"])
+STAGE_SECONDS = metrics.histogram(
+    "tts_stage_duration_seconds", "Time spent in each request stage", ["endpoint", "stage"])
+AUDIO_RESPONSES = metrics.counter(
+    "tts_audio_responses_total", "Synthesis responses by where the audio came from", ["source", "format"])
+AUDIO_BYTES = metrics.counter(
+    "tts_audio_response_bytes_total", "Audio bytes returned by /api/synthesize", ["source"])
+SCRAPE_SECONDS = metrics.histogram(
+    "news_scrape_duration_seconds", "News page refresh time", ["outcome"])
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "tts_queue_wait_seconds", "Time a text waited in the synthesis queue", ["priority"])
+# (endpoint, StageTimings) of the current non-Flask request (see asgi_app.py)
+request_timings = ContextVar("request_timings", default=None)
+
+# Pre-render: after each scrape, synthesize uncached headlines in the background
+# so the first listener gets a cache hit
+PRERENDER_ENABLED = os.environ.get("PRERENDER_ENABLED", "1") == "1"
+PRERENDER_WORKERS = int(os.environ.get("PRERENDER_WORKERS", "2"))
+prerender_lock = threading.Lock()
+last_prerender = None
+
+# News is served from a snapshot that a background thread refreshes with
+# conditional GETs, so /api/fetch-news never waits on Ada Derana. NEWS_URL
+# points it at another copy of the hot news page (e.g. a benchmark fixture).
+NEWS_REFRESH_SECONDS = int(os.environ.get("NEWS_REFRESH_SECONDS", "300"))
+NEWS_URL = os.environ.get("NEWS_URL", ADA_DERANA_URL)
+news_feed = NewsFeed(NEWS_URL, on_refresh=lambda seconds, outcome: SCRAPE_SECONDS.observe(seconds, outcome=outcome))
+
+# Every new or changed item the feed scrapes is upserted into a SQLite archive
+# (news_archive.py) that /api/news pages through and searches. All workers
+# share the file. Set NEWS_ARCHIVE_PATH="" to disable.
+NEWS_ARCHIVE_PATH = os.environ.get("NEWS_ARCHIVE_PATH", "news_archive.db")
+NEWS_PAGE_SIZE = int(os.environ.get("NEWS_PAGE_SIZE", "20"))
+news_archive = NewsArchive(NEWS_ARCHIVE_PATH) if NEWS_ARCHIVE_PATH else None
 
 # Sinhala Unicode range: U+0D80 to U+0DFF
 SINHALA_UNICODE_RANGE = re.compile(r'[\u0D80-\u0DFF\s\.,!?;:\-\(\)\[\]"]+')
@@ -48,33 +216,127 @@ SINHALA_UNICODE_RANGE = re.compile(r'[\u0D80-\u0DFF\s\.,!?;:\-\(\)\[\]"]+')
 
 def load_model():
     """Load the TTS model with error handling."""
-    global synth, model_loaded, model_error
+    global synth, synth_scheduler, model_pool, model_loaded, model_error, precision_info, model_weights
     
     if model_loaded:
         return True
     
     try:
+        if INFERENCE_BACKEND not in ("torch", "onnx", "stub"):
+            raise ValueError(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}' (use torch, onnx or stub)")
+        
+        if INFERENCE_PRECISION != "fp32" and INFERENCE_BACKEND != "torch":
+            raise ValueError(f"INFERENCE_PRECISION={INFERENCE_PRECISION} needs INFERENCE_BACKEND=torch")
+        
+        if MODEL_REPLICAS > 1 and INFERENCE_BACKEND == "onnx":
+            raise ValueError("MODEL_REPLICAS needs INFERENCE_BACKEND=torch or stub "
+                             "(onnxruntime sessions don't survive fork)")
+        replicas = MODEL_REPLICAS
+        
         # Check if model files exist
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
+        use_snapshot = bool(INFERENCE_BACKEND == "torch" and MODEL_SNAPSHOT_PATH
+                            and os.path.exists(MODEL_SNAPSHOT_PATH))
+        if INFERENCE_BACKEND == "onnx":
+            weights_path = ONNX_MODEL_PATH
+        else:
+            weights_path = MODEL_SNAPSHOT_PATH if use_snapshot else MODEL_PATH
+        if INFERENCE_BACKEND != "stub" and not os.path.exists(weights_path):
+            raise FileNotFoundError(f"Model file not found: {weights_path}")
         
-        if not os.path.exists(CONFIG_PATH):
+        if INFERENCE_BACKEND != "stub" and not os.path.exists(CONFIG_PATH):
             raise FileNotFoundError(f"Config file not found: {CONFIG_PATH}")
         
-        logger.info(f"Loading model from {MODEL_PATH}...")
-        use_cuda = torch.cuda.is_available()
-        device = "cuda" if use_cuda else "cpu"
-        logger.info(f"Using device: {device}")
+        if INFERENCE_BACKEND == "stub":
+            from benchmarks.stub_synth import StubSynthesizer
+            
+            logger.info(f"Using the stub synthesizer ({STUB_BASE_MS} ms + {STUB_MS_PER_CHAR} ms/char)")
+            synth = StubSynthesizer(base_ms=STUB_BASE_MS, ms_per_char=STUB_MS_PER_CHAR)
+        elif INFERENCE_BACKEND == "onnx":
+            from onnx_backend import OnnxSynthesizer
+            
+            logger.info(f"Loading ONNX model from {ONNX_MODEL_PATH} "
+                        f"(intra-op threads {ORT_INTRA_OP_THREADS}, inter-op threads {ORT_INTER_OP_THREADS})...")
+            synth = OnnxSynthesizer(
+                ONNX_MODEL_PATH,
+                CONFIG_PATH,
+                intra_op_threads=ORT_INTRA_OP_THREADS,
+                inter_op_threads=ORT_INTER_OP_THREADS
+            )
+        else:
+            import torch
+            from TTS.utils.synthesizer import Synthesizer
+            
+            use_cuda = torch.cuda.is_available()
+            device = "cuda" if use_cuda else "cpu"
+            logger.info(f"Using device: {device}")
+            
+            if replicas > 1 and use_cuda:
+                logger.warning("MODEL_REPLICAS is for CPU serving; using one in-process model on CUDA")
+                replicas = 1
+            elif replicas > 1:
+                # The replicas set their own thread counts; an OpenMP pool
+                # started here would be inherited broken by the forks
+                torch.set_num_threads(1)
+            
+            synth = None
+            if use_snapshot:
+                from model_snapshot import StaleSnapshotError, load_snapshot
+                
+                logger.info(f"Loading model snapshot from {MODEL_SNAPSHOT_PATH}...")
+                try:
+                    synth = load_snapshot(MODEL_SNAPSHOT_PATH, CONFIG_PATH, use_cuda=use_cuda,
+                                          source_checkpoint=MODEL_PATH)
+                    model_weights = {"source": "snapshot", "path": MODEL_SNAPSHOT_PATH}
+                except StaleSnapshotError as e:
+                    logger.warning(f"Ignoring stale model snapshot: {str(e)}. "
+                                   f"Rewrite it with python model_snapshot.py")
+            if synth is None:
+                logger.info(f"Loading model from {MODEL_PATH}...")
+                synth = Synthesizer(
+                    tts_checkpoint=MODEL_PATH,
+                    tts_config_path=CONFIG_PATH,
+                    use_cuda=use_cuda
+                )
+                model_weights = {"source": "checkpoint", "path": MODEL_PATH}
+            
+            if use_cuda and INFERENCE_PRECISION != "fp32":
+                logger.warning(f"INFERENCE_PRECISION={INFERENCE_PRECISION} is for CPU serving; using fp32 on CUDA")
+                precision_info = {"mode": "fp32"}
+            else:
+                from precision import apply_precision
+                
+                precision_info = apply_precision(synth.tts_model, INFERENCE_PRECISION)
         
-        synth = Synthesizer(
-            tts_checkpoint=MODEL_PATH,
-            tts_config_path=CONFIG_PATH,
-            use_cuda=use_cuda
+        # Every backend sits behind the queue; the ONNX graph can't be batched
+        # (see OnnxSynthesizer.tts_batch), so it takes one text at a time
+        batch_size = 1 if INFERENCE_BACKEND == "onnx" else max(BATCH_MAX_SIZE, 1)
+        run_batch = VitsBatchRunner(synth).tts_batch if INFERENCE_BACKEND == "torch" else synth.tts_batch
+        if replicas > 1:
+            # Each replica warms itself up before it takes requests
+            model_pool = ModelPool(
+                run_batch,
+                replicas=replicas,
+                threads_per_replica=MODEL_REPLICA_THREADS,
+                warmup_texts=[sinhala_to_roman(text) for text in WARMUP_TEXTS]
+            )
+            model_pool.start()
+            run_batch = model_pool.tts_batch
+        synth_scheduler = InferenceScheduler(
+            run_batch,
+            max_batch_size=batch_size,
+            max_wait_ms=BATCH_MAX_WAIT_MS if batch_size > 1 else 0,
+            max_batch_tokens=BATCH_MAX_TOKENS,
+            max_queue=QUEUE_MAX_SIZE,
+            slo_seconds=QUEUE_SLO_SECONDS,
+            workers=replicas
         )
+        if batch_size > 1:
+            logger.info(f"Micro-batching enabled (max {batch_size} items, {BATCH_MAX_WAIT_MS} ms)")
         
         model_loaded = True
         model_error = None
-        logger.info("Model loaded successfully!")
+        _, peak_rss = resident_memory_bytes()
+        logger.info(f"Model loaded successfully! (peak RSS {peak_rss / (1024 * 1024):.0f} MB)")
         return True
         
     except Exception as e:
@@ -83,6 +345,25 @@ def load_model():
         return False
 
 
+def backend_info():
+    """Inference backend settings for /api/health"""
+    info = {"name": INFERENCE_BACKEND}
+    if INFERENCE_BACKEND == "onnx":
+        info["model_path"] = ONNX_MODEL_PATH
+        info["intra_op_threads"] = ORT_INTRA_OP_THREADS
+        info["inter_op_threads"] = ORT_INTER_OP_THREADS
+    elif INFERENCE_BACKEND == "stub":
+        info["base_ms"] = STUB_BASE_MS
+        info["ms_per_char"] = STUB_MS_PER_CHAR
+    else:
+        # configured mode until the model has loaded
+        info["precision"] = precision_info or {"mode": INFERENCE_PRECISION}
+        info["weights"] = model_weights
+    if model_pool is not None:
+        info["replicas"] = model_pool.stats()
+    return info
+
+
 def validate_sinhala_text(text):
     """
     Validate that the text contains Sinhala characters.
@@ -117,32 +398,606 @@ def validate_sinhala_text(text):
     return True, None
 
 
+def parse_text_request():
+    """
+    Read and validate the JSON {"text": ...} body of a synthesis request.
+    
+    Returns:
+        tuple: (text, None) on success, (None, error_response) otherwise
+    """
+    # Get request data
+    if not request.is_json:
+        return None, (jsonify({
+            "error": "Request must be JSON",
+            "details": "Content-Type must be application/json"
+        }), 400)
+    
+    try:
+        data = request.get_json()
+    except Exception as e:
+        return None, (jsonify({
+            "error": "Invalid JSON",
+            "details": f"Failed to parse JSON: {str(e)}"
+        }), 400)
+    
+    if not data:
+        return None, (jsonify({
+            "error": "Empty request body",
+            "details": "Request body must contain a JSON object"
+        }), 400)
+    
+    # Extract text
+    text = data.get("text", "").strip()
+    
+    # Validate text
+    is_valid, error_msg = validate_sinhala_text(text)
+    if not is_valid:
+        return None, (jsonify({
+            "error": "Invalid text input",
+            "details": error_msg
+        }), 400)
+    
+    return text, None
+
+
+def parse_output_format():
+    """
+    Pick the response format from the body's "format"/"quality"/"bitrate"/
+    "sample_rate" fields (or the same query parameters), else the Accept header.
+    
+    Returns:
+        tuple: (OutputFormat, None) on success, (None, error_response) otherwise
+    """
+    data = request.get_json(silent=True) or {}
+    
+    def option(name):
+        return data.get(name) or request.args.get(name)
+    
+    try:
+        return negotiate_format(
+            accept=request.headers.get("Accept"),
+            requested=option("format"),
+            quality=option("quality"),
+            bitrate=option("bitrate"),
+            sample_rate=option("sample_rate")
+        ), None
+    except ValueError as e:
+        return None, (jsonify({
+            "error": "Invalid output format",
+            "details": str(e)
+        }), 400)
+
+
 def get_text_hash(text):
     """Generate hash for text caching"""
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
 
-def get_cached_audio(text):
-    """Get cached audio if available and not expired"""
+def get_cache_key(text, fmt=WAV):
+    """Cache key for text in fmt; plain text hash for WAV"""
     text_hash = get_text_hash(text)
-    if text_hash in audio_cache:
-        audio_bytes, timestamp = audio_cache[text_hash]
-        # Check if cache is still valid
-        if datetime.now() - timestamp < timedelta(hours=CACHE_EXPIRY_HOURS):
-            logger.info(f"Cache hit for text hash: {text_hash[:8]}...")
-            return audio_bytes
+    if fmt.codec == "wav":
+        return text_hash
+    return f"{text_hash}.{fmt.key}"
+
+
+def get_cached_audio(text, fmt=WAV):
+    """Get cached audio if available and not expired"""
+    cache_key = get_cache_key(text, fmt)
+    audio_bytes = audio_cache.get(cache_key)
+    if audio_bytes is not None:
+        logger.info(f"Cache hit for key: {cache_key[:8]}... ({fmt.key})")
+    return audio_bytes
+
+
+def get_cached_audio_many(texts):
+    """
+    Look up many texts at once (one Redis round trip for feed prefetch).
+    
+    Returns:
+        dict: {text: audio_bytes} for the texts that are cached
+    """
+    hashes = {get_text_hash(text): text for text in texts}
+    found = audio_cache.get_many(hashes)
+    return {hashes[text_hash]: audio_bytes for text_hash, audio_bytes in found.items()}
+
+
+def cache_audio(text, audio_bytes, fmt=WAV):
+    """Cache audio bytes in the configured cache backend"""
+    cache_key = get_cache_key(text, fmt)
+    if audio_cache.put(cache_key, audio_bytes):
+        logger.info(f"Cached audio for key: {cache_key[:8]}... ({fmt.key}, {audio_cache.name} cache)")
+    else:
+        logger.warning(f"Audio for key {cache_key[:8]}... ({fmt.key}) was not cached")
+
+
+def get_audio_hash(text, fmt=WAV):
+    """Content address of text's audio in fmt (its name in the store and /api/audio URL)"""
+    return audio_key(text, MODEL_ID, fmt.key)
+
+
+def get_stored_audio_path(text, fmt=WAV):
+    """Get the path of stored audio on disk, if any"""
+    if audio_store is None:
+        return None
+    key = get_audio_hash(text, fmt)
+    path = audio_store.get_path(key, fmt.extension)
+    if path:
+        logger.info(f"Audio store hit for key: {key[:8]}... ({fmt.key})")
+    return path
+
+
+def store_audio(text, audio_bytes, fmt=WAV):
+    """
+    Write audio to the shared on-disk store.
+    
+    Returns:
+        str: stored file path, or None if the store is disabled or the write failed
+    """
+    if audio_store is None:
+        return None
+    key = get_audio_hash(text, fmt)
+    try:
+        return audio_store.put(key, audio_bytes, fmt.extension)
+    except OSError as e:
+        logger.warning(f"Failed to write audio store entry {key[:8]}...: {str(e)}")
+        return None
+
+
+def record_stage(name, seconds, endpoint=None):
+    """Add a stage duration to the histogram and, inside a request, to Server-Timing"""
+    in_request = has_request_context()
+    current = None if in_request else request_timings.get()
+    if endpoint is None:
+        if in_request:
+            endpoint = request.endpoint or "unknown"
         else:
-            # Remove expired cache
-            del audio_cache[text_hash]
-            logger.info(f"Cache expired for text hash: {text_hash[:8]}...")
-    return None
+            endpoint = current[0] if current else "background"
+    STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=name)
+    if in_request:
+        timings = g.get("timings")
+    else:
+        timings = current[1] if current else None
+    if timings is not None:
+        timings.add(name, seconds)
 
 
-def cache_audio(text, audio_bytes):
-    """Cache audio bytes with timestamp"""
-    text_hash = get_text_hash(text)
-    audio_cache[text_hash] = (audio_bytes, datetime.now())
-    logger.info(f"Cached audio for text hash: {text_hash[:8]}... (Cache size: {len(audio_cache)})")
+@contextmanager
+def stage(name, endpoint=None):
+    """Time the enclosed block as a request stage (see record_stage)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start, endpoint)
+
+
+def count_audio_response(source, fmt, size):
+    """Count a synthesis response by audio source (store, cache, synthesized, shared)"""
+    AUDIO_RESPONSES.inc(source=source, format=fmt.codec)
+    AUDIO_BYTES.inc(size, source=source)
+
+
+def run_tts(roman_text, priority=PRIORITY_INTERACTIVE, endpoint=None, check_slo=True, admitted=False):
+    """
+    Synthesize through the scheduler's queue, recording the queue_wait and
+    inference stages. admitted=True: already let in by synth_scheduler.admit()
+    (see InferenceScheduler.submit), so never rejected.
+    
+    Raises:
+        AdmissionRejected: if the queue is full or the text would miss the SLO
+    """
+    future = synth_scheduler.submit(roman_text, priority, check_slo, admitted)
+    try:
+        return future.result()
+    finally:
+        if hasattr(future, "queue_seconds"):
+            record_stage("queue_wait", future.queue_seconds, endpoint)
+            QUEUE_WAIT_SECONDS.observe(future.queue_seconds, priority=PRIORITY_NAMES[priority])
+        if hasattr(future, "run_seconds"):
+            record_stage("inference", future.run_seconds, endpoint)
+
+
+def synthesis_priority(text, interactive=True):
+    """Queue priority for text: breaking headlines, then listeners, then pre-render"""
+    news_items, _ = news_feed.snapshot()
+    if any(item.get("isBreaking") and item.get("text") == text for item in news_items):
+        return PRIORITY_BREAKING
+    return PRIORITY_INTERACTIVE if interactive else PRIORITY_PRERENDER
+
+
+def promote_synthesis(text, priority):
+    """Let a listener's priority carry over to a queued (e.g. pre-render) synthesis of text"""
+    if synth_scheduler is not None:
+        synth_scheduler.promote(sinhala_to_roman(text), priority)
+
+
+def overloaded_response(rejection):
+    """503 with Retry-After for a text the synthesis queue turned away"""
+    return jsonify({
+        "error": "Server busy",
+        "details": f"Synthesis queue is {'full' if rejection.reason == 'queue_full' else 'too long'}. "
+                   f"Retry in {rejection.retry_after}s.",
+        "reason": rejection.reason,
+        "estimated_wait_seconds": round(rejection.estimated_wait, 1) if rejection.estimated_wait else None
+    }), 503, {"Retry-After": str(rejection.retry_after)}
+
+
+def warm_up_model():
+    """
+    Synthesize WARMUP_TEXTS (short, headline, paragraph) so the first real
+    request doesn't pay first-inference allocations. Model replicas have
+    already warmed themselves up; their timings are returned instead.
+    
+    Returns:
+        list: {"chars", "seconds"} per warm-up text
+    """
+    if model_pool is not None:
+        return [dict(timing, replica=replica.index)
+                for replica in model_pool.replicas for timing in replica.warmup or []]
+    timings = []
+    for text in WARMUP_TEXTS:
+        start = time.perf_counter()
+        run_tts(sinhala_to_roman(text), check_slo=False)
+        timings.append({"chars": len(text), "seconds": round(time.perf_counter() - start, 3)})
+    return timings
+
+
+model_loader = ModelLoader(load_model, warm_up=warm_up_model)
+
+# Stats other components already keep, read at scrape time
+metrics.gauge("tts_model_ready", "1 once the model is loaded and warmed up",
+              lambda: int(model_loader.is_ready()))
+metrics.gauge("tts_model_load_seconds", "Time the last model load took",
+              lambda: model_loader.status()["load_seconds"])
+metrics.gauge("tts_model_warmup_seconds", "Time the warm-up after loading took",
+              lambda: model_loader.status()["warmup_seconds"])
+metrics.gauge("tts_audio_cache_lookups_total", "Audio cache lookups by result",
+              lambda: {("hit",): audio_cache.hits, ("miss",): audio_cache.misses},
+              labelnames=["result"], kind="counter")
+metrics.gauge("tts_audio_cache_hit_ratio", "Audio cache hits / lookups",
+              lambda: audio_cache.stats()["hit_ratio"])
+metrics.gauge("tts_audio_cache_bytes", "Bytes held by the in-memory audio cache",
+              lambda: audio_cache.stats().get("bytes"))
+metrics.gauge("tts_audio_cache_entries", "Entries in the in-memory audio cache",
+              lambda: audio_cache.stats().get("entries"))
+metrics.gauge("tts_batch_queue_depth", "Texts waiting for the micro-batch scheduler",
+              lambda: synth_scheduler.queue_depth() if synth_scheduler else 0)
+metrics.gauge("tts_queue_rejections_total", "Synthesis requests turned away by admission control",
+              lambda: {(reason,): count for reason, count in synth_scheduler.stats()["rejected"].items()}
+              if synth_scheduler else None,
+              labelnames=["reason"], kind="counter")
+metrics.gauge("tts_queue_seconds_per_char", "Fitted inference seconds per romanized character",
+              lambda: synth_scheduler.seconds_per_char if synth_scheduler else None)
+metrics.gauge("tts_queue_batch_overhead_seconds", "Fitted fixed inference cost per batch",
+              lambda: synth_scheduler.batch_overhead if synth_scheduler else None)
+metrics.gauge("tts_model_replicas_alive", "Model replica processes running",
+              lambda: model_pool.stats()["alive"] if model_pool else None)
+metrics.gauge("tts_model_replica_in_flight", "Batches each model replica is working on",
+              lambda: {(str(replica["index"]),): replica["in_flight"]
+                       for replica in model_pool.stats()["per_replica"]} if model_pool else None,
+              labelnames=["replica"])
+metrics.gauge("tts_singleflight_in_flight", "Distinct texts being synthesized right now",
+              lambda: synthesis_flight.stats()["in_flight"])
+metrics.gauge("tts_singleflight_deduplicated_total", "Requests that waited on an identical synthesis",
+              lambda: synthesis_flight.stats()["deduplicated"], kind="counter")
+metrics.gauge("tts_encoder_pending", "Opus/MP3 encodes queued or running",
+              lambda: encoder_pool.stats()["pending"])
+metrics.gauge("news_items", "Headlines in the current news snapshot",
+              lambda: len(news_feed.snapshot()[0]))
+metrics.gauge("process_resident_memory_bytes", "Resident memory of this worker",
+              lambda: resident_memory_bytes()[0])
+metrics.gauge("process_max_resident_memory_bytes", "Peak resident memory of this worker (e.g. during model load)",
+              lambda: resident_memory_bytes()[1])
+metrics.gauge("process_uptime_seconds", "Seconds since this worker started",
+              lambda: round(time.monotonic() - STARTED_AT, 3))
+
+
+SYNTHESIS_DISABLED = {
+    "error": "Synthesis disabled",
+    "details": "This process serves news and health only (SYNTHESIS_ENABLED=0)"
+}
+
+
+def require_model():
+    """
+    Wait up to MODEL_WAIT_SECONDS for the background model load.
+    
+    Returns:
+        None when the model is ready, otherwise an error response
+        (503 with Retry-After while loading or with SYNTHESIS_ENABLED=0,
+        500 if loading failed)
+    """
+    if not SYNTHESIS_ENABLED:
+        return jsonify(SYNTHESIS_DISABLED), 503
+    if model_loader.wait(MODEL_WAIT_SECONDS):
+        return None
+    status = model_loader.status()
+    if status["state"] == "failed":
+        return jsonify({
+            "error": "Model failed to load",
+            "details": model_error or status["error"]
+        }), 500
+    return jsonify({
+        "error": "Model is loading",
+        "details": f"Model state: {status['state']}. Retry shortly."
+    }), 503, {"Retry-After": "5"}
+
+
+def cached_texts(texts):
+    """Return the texts that already have audio in the store or cache"""
+    stored = {text for text in texts if get_stored_audio_path(text)}
+    remaining = [text for text in texts if text not in stored]
+    return stored | set(get_cached_audio_many(remaining))
+
+
+def start_prerender(texts):
+    """Pre-render texts in a background thread unless a run is in progress"""
+    if not PRERENDER_ENABLED or not SYNTHESIS_ENABLED or not prerender_lock.acquire(blocking=False):
+        return False
+    
+    def run():
+        global last_prerender
+        try:
+            if not model_loader.wait():
+                logger.warning("Skipping pre-render: model not loaded")
+                return
+            last_prerender = prerender(
+                texts,
+                lambda text: synthesis_flight.do(
+                    get_text_hash(text), render_audio, text, synthesis_priority(text, interactive=False)
+                ),
+                cached_texts=cached_texts,
+                max_workers=PRERENDER_WORKERS
+            )
+            last_prerender["finished_at"] = datetime.now().isoformat()
+        except Exception as e:
+            logger.error(f"Pre-render failed: {str(e)}")
+        finally:
+            prerender_lock.release()
+    
+    threading.Thread(target=run, name="prerender", daemon=True).start()
+    return True
+
+
+def on_news_changed(changed_items):
+    """Archive the items that are new or changed and pre-render their headlines"""
+    if news_archive is not None:
+        try:
+            news_archive.upsert(changed_items)
+        except Exception as e:
+            logger.error(f"Error archiving news: {str(e)}")
+    start_prerender([item.get("text", "") for item in changed_items])
+
+
+def ensure_news_feed():
+    """Start the background news refresher (once per process)"""
+    news_feed.start_background_refresh(NEWS_REFRESH_SECONDS, on_change=on_news_changed)
+
+
+class SynthesisError(Exception):
+    """A failed synthesis step, carrying the API error message"""
+
+    def __init__(self, error, details):
+        super().__init__(details)
+        self.error = error
+        self.details = details
+
+
+def render_audio(text, priority=PRIORITY_INTERACTIVE):
+    """
+    Romanize, synthesize (queued at priority) and encode text, then cache the result.
+    
+    Returns:
+        bytes: WAV audio
+    
+    Raises:
+        SynthesisError: if romanization or audio generation fails
+        AdmissionRejected: if the synthesis queue turns the text away
+    """
+    # Convert Sinhala text to Romanized text
+    try:
+        with stage("romanize"):
+            roman_text = sinhala_to_roman(text)
+        logger.info(f"Romanized text: {roman_text[:50]}...")
+    except Exception as e:
+        logger.error(f"Romanization failed: {str(e)}")
+        raise SynthesisError("Text romanization failed", str(e))
+    
+    # Generate audio
+    try:
+        wav = run_tts(roman_text, priority)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"TTS generation failed: {str(e)}")
+        raise SynthesisError("Audio generation failed", str(e))
+    
+    # Encode in memory (not saved to disk)
+    with stage("wav_encode"):
+        audio_buffer = io.BytesIO()
+        synth.save_wav(wav, audio_buffer)
+        audio_bytes = audio_buffer.getvalue()
+    
+    with stage("cache_write"):
+        cache_audio(text, audio_bytes)
+        store_audio(text, audio_bytes)
+    return audio_bytes
+
+
+def get_saved_wav_audio(text):
+    """WAV bytes for text from the store or cache, or None"""
+    stored_path = get_stored_audio_path(text)
+    if stored_path:
+        try:
+            with open(stored_path, "rb") as f:
+                return f.read()
+        except OSError:
+            pass  # pruned in between; fall through
+    return get_cached_audio(text)
+
+
+def get_wav_audio(text, priority=PRIORITY_INTERACTIVE):
+    """WAV bytes for text from the store or cache, else synthesized (single-flight)"""
+    saved_audio = get_saved_wav_audio(text)
+    if saved_audio:
+        return saved_audio
+    audio_bytes, _ = synthesis_flight.do(get_text_hash(text), render_audio, text, priority)
+    return audio_bytes
+
+
+def render_encoded_audio(text, fmt, priority=PRIORITY_INTERACTIVE):
+    """
+    Audio for text in fmt, then cached and stored under that format.
+    
+    Raises:
+        SynthesisError: if synthesis or encoding fails
+        AdmissionRejected: if the synthesis queue turns the text away
+    """
+    if fmt.codec == "wav":
+        return render_audio(text, priority)
+    
+    wav_bytes = get_wav_audio(text, priority)
+    try:
+        with stage("encode"):
+            audio_bytes = encoder_pool.encode(wav_bytes, fmt)
+    except Exception as e:
+        logger.error(f"Encoding to {fmt.key} failed: {str(e)}")
+        raise SynthesisError("Audio encoding failed", str(e))
+    
+    with stage("cache_write"):
+        cache_audio(text, audio_bytes, fmt)
+        store_audio(text, audio_bytes, fmt)
+    return audio_bytes
+
+
+def audio_response(audio, fmt, text=None):
+    """
+    send_file for a path or bytes buffer in fmt; Vary so caches keep formats
+    apart. When the clip is in the store, its hash and GET URL are sent along.
+    """
+    response = send_file(
+        audio,
+        mimetype=fmt.mimetype,
+        as_attachment=True,
+        download_name=f"synthesized.{fmt.extension}"
+    )
+    response.headers["Vary"] = "Accept"
+    if text is not None and audio_store is not None:
+        audio_hash = get_audio_hash(text, fmt)
+        response.headers["X-Audio-Hash"] = audio_hash
+        response.headers["Content-Location"] = f"/api/audio/{audio_hash}"
+    return response
+
+
+def audio_location_response(text, fmt):
+    """
+    JSON pointing at GET /api/audio/<hash> instead of the audio itself.
+    
+    Returns:
+        Response, or None if the clip isn't in the audio store
+    """
+    if not get_stored_audio_path(text, fmt):
+        return None
+    audio_hash = get_audio_hash(text, fmt)
+    return jsonify({
+        "hash": audio_hash,
+        "url": f"/api/audio/{audio_hash}",
+        "content_type": fmt.mimetype,
+        "format": fmt.key
+    }), 200
+
+
+def news_payload():
+    """The /api/fetch-news body from the latest snapshot (sample items before the first scrape)"""
+    news_items, updated_at = news_feed.snapshot()
+    stale = updated_at is None
+    if stale:
+        logger.info("No news snapshot yet, returning sample data")
+        news_items = get_sample_news()
+    return {
+        "success": True,
+        "count": len(news_items),
+        "items": news_items,
+        "timestamp": datetime.now().isoformat(),
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        "stale": stale
+    }
+
+
+def health_status():
+    """The /api/health body; never loads or waits on the model"""
+    model_status = model_loader.status()
+    status = {
+        "status": "healthy" if model_status["ready"] or not SYNTHESIS_ENABLED else "loading",
+        "synthesis_enabled": SYNTHESIS_ENABLED,
+        "model_loaded": model_status["ready"],
+        "model": model_status,
+        "backend": backend_info(),
+        "cache": audio_cache.stats(),
+        "singleflight": synthesis_flight.stats(),
+        "batching": synth_scheduler.stats() if synth_scheduler else None,
+        "prerender": last_prerender,
+        "encoding": encoder_pool.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    if model_pool is not None and model_pool.stats()["alive"] < len(model_pool.replicas):
+        status["status"] = "degraded"
+    if model_error:
+        status["error"] = model_error
+        status["status"] = "degraded"
+    return status
+
+
+def readiness_status():
+    """The /api/health/ready body; a news-only process is ready as soon as it serves"""
+    model_status = model_loader.status()
+    model_status["synthesis_enabled"] = SYNTHESIS_ENABLED
+    if not SYNTHESIS_ENABLED:
+        model_status["ready"] = True
+    model_status["timestamp"] = datetime.now().isoformat()
+    return model_status
+
+
+def archive_payload(params, search=False):
+    """
+    The /api/news or /api/news/search body for query params
+    (limit, cursor, category, breaking and, when searching, q).
+    
+    Returns:
+        tuple: (body, HTTP status); 400 for a bad cursor, limit or query,
+        404 with the archive disabled
+    """
+    if news_archive is None:
+        return {
+            "success": False,
+            "error": "News archive disabled",
+            "details": "Set NEWS_ARCHIVE_PATH to enable it",
+            "items": []
+        }, 404
+    try:
+        items, next_cursor = news_archive.page(
+            limit=int(params.get("limit") or NEWS_PAGE_SIZE),
+            cursor=params.get("cursor") or None,
+            category=params.get("category") or None,
+            breaking=params.get("breaking", "").lower() in ("1", "true"),
+            query=params.get("q", "") if search else None
+        )
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": "Invalid news query",
+            "details": str(e),
+            "items": []
+        }, 400
+    return {
+        "success": True,
+        "count": len(items),
+        "items": items,
+        "next_cursor": next_cursor,
+        "timestamp": datetime.now().isoformat()
+    }, 200
 
 
 @app.route('/api/fetch-news', methods=['GET'])
@@ -151,18 +1006,17 @@ def fetch_news():
     Fetch news headlines from Ada Derana.
     
     Returns:
-        JSON response with news items array
+        JSON response with news items array from the latest snapshot
+        ("stale" sample items until the first scrape completes)
     """
     try:
-        logger.info("Fetching news from Ada Derana...")
-        news_items = scrape_adaderana()
+        ensure_news_feed()
+        with stage("snapshot"):
+            payload = news_payload()
         
-        return jsonify({
-            "success": True,
-            "count": len(news_items),
-            "items": news_items,
-            "timestamp": datetime.now().isoformat()
-        }), 200
+        with stage("serialize"):
+            response = jsonify(payload)
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error fetching news: {str(e)}")
@@ -174,6 +1028,94 @@ def fetch_news():
         }), 500
 
 
+@app.route('/api/news', methods=['GET'])
+def list_news():
+    """
+    Archived news, newest first, a page at a time.
+    
+    Query parameters:
+        limit: Page size (default NEWS_PAGE_SIZE, at most 100)
+        cursor: next_cursor from the previous page
+        category: Only this category
+        breaking: 1 for breaking news only
+    
+    Returns:
+        JSON response with items and next_cursor (null on the last page)
+    """
+    try:
+        ensure_news_feed()
+        with stage("archive_query"):
+            payload, status = archive_payload(request.args)
+        with stage("serialize"):
+            response = jsonify(payload)
+        return response, status
+        
+    except Exception as e:
+        logger.error(f"Error listing news: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Failed to list news",
+            "details": str(e),
+            "items": []
+        }), 500
+
+
+@app.route('/api/news/search', methods=['GET'])
+def search_news():
+    """
+    Full-text search of archived titles and bodies, newest first.
+    
+    Query parameters:
+        q: Words to search for (each must match, as a prefix)
+        limit, cursor, category, breaking: As for /api/news
+    
+    Returns:
+        JSON response with items and next_cursor; 400 without q
+    """
+    try:
+        ensure_news_feed()
+        with stage("archive_query"):
+            payload, status = archive_payload(request.args, search=True)
+        with stage("serialize"):
+            response = jsonify(payload)
+        return response, status
+        
+    except Exception as e:
+        logger.error(f"Error searching news: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Failed to search news",
+            "details": str(e),
+            "items": []
+        }), 500
+
+
+@app.route('/api/news/<int:item_id>', methods=['GET'])
+def get_news_item(item_id):
+    """
+    One archived item by its id.
+    
+    Returns:
+        JSON item, or JSON 404
+    """
+    try:
+        ensure_news_feed()
+        item = news_archive.get(item_id) if news_archive is not None else None
+        if item is None:
+            return jsonify({
+                "error": "News item not found",
+                "details": f"No archived item with id {item_id}"
+            }), 404
+        return jsonify(item), 200
+        
+    except Exception as e:
+        logger.error(f"Error getting news item {item_id}: {str(e)}")
+        return jsonify({
+            "error": "Failed to get news item",
+            "details": str(e)
+        }), 500
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
@@ -183,21 +1125,8 @@ def health_check():
         JSON response with server status
     """
     try:
-        # Try to load model if not loaded
-        if not model_loaded:
-            load_model()
-        
-        status = {
-            "status": "healthy",
-            "model_loaded": model_loaded,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        if model_error:
-            status["error"] = model_error
-            status["status"] = "degraded"
-        
-        return jsonify(status), 200
+        # Never loads or waits on the model; see /api/health/ready
+        return jsonify(health_status()), 200
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -208,6 +1137,35 @@ def health_check():
         }), 500
 
 
+@app.route('/api/health/live', methods=['GET'])
+def health_live():
+    """
+    Liveness probe: the process is up and serving requests.
+    
+    Returns:
+        JSON response, always 200
+    """
+    return jsonify({
+        "status": "alive",
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 3),
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
+
+@app.route('/api/health/ready', methods=['GET'])
+def health_ready():
+    """
+    Readiness probe: the model is loaded and warmed up.
+    
+    Returns:
+        JSON response with model load state and timings;
+        200 when ready (always, with SYNTHESIS_ENABLED=0), 503 while loading
+        or after a failed load
+    """
+    model_status = readiness_status()
+    return jsonify(model_status), 200 if model_status["ready"] else 503
+
+
 @app.route('/api/synthesize', methods=['POST'])
 def synthesize():
     """
@@ -215,115 +1173,247 @@ def synthesize():
     
     Request body (JSON):
         {
-            "text": "සිංහල පාඨය"
+            "text": "සිංහල පාඨය",
+            "format": "opus",       // optional: wav (default), opus, mp3
+            "quality": "medium",    // optional: high, medium, low
+            "bitrate": 24,          // optional: kbps, overrides quality
+            "sample_rate": 16000,   // optional: Hz, overrides quality
+            "return_url": true      // optional: reply with the audio's URL
         }
     
+    Without "format", the Accept header picks it (audio/ogg, audio/mpeg,
+    audio/wav); anything else gets WAV.
+    
     Returns:
-        WAV audio file or JSON error response
+        Audio file (with X-Audio-Hash/Content-Location when stored), JSON
+        {"hash", "url", "content_type", "format"} when return_url is set and
+        the audio store is enabled, or JSON error response
     """
     try:
         # Check if model is loaded
-        if not model_loaded:
-            if not load_model():
-                return jsonify({
-                    "error": "Model failed to load",
-                    "details": model_error
-                }), 500
-        
-        # Get request data
-        if not request.is_json:
-            return jsonify({
-                "error": "Request must be JSON",
-                "details": "Content-Type must be application/json"
-            }), 400
-        
-        try:
-            data = request.get_json()
-        except Exception as e:
-            return jsonify({
-                "error": "Invalid JSON",
-                "details": f"Failed to parse JSON: {str(e)}"
-            }), 400
+        with stage("model_wait"):
+            error_response = require_model()
+        if error_response:
+            return error_response
         
-        if not data:
-            return jsonify({
-                "error": "Empty request body",
-                "details": "Request body must contain a JSON object"
-            }), 400
-        
-        # Extract text
-        text = data.get("text", "").strip()
+        with stage("validate"):
+            text, error_response = parse_text_request()
+            if not error_response:
+                fmt, error_response = parse_output_format()
+        if error_response:
+            return error_response
         
-        # Validate text
-        is_valid, error_msg = validate_sinhala_text(text)
-        if not is_valid:
-            return jsonify({
-                "error": "Invalid text input",
-                "details": error_msg
-            }), 400
+        return_url = bool((request.get_json(silent=True) or {}).get("return_url"))
+        logger.info(f"Received synthesis request ({fmt.key}) for text: {text[:50]}...")
         
-        logger.info(f"Received synthesis request for text: {text[:50]}...")
+        # Check the shared disk store first; send_file streams it with sendfile
+        with stage("store_lookup"):
+            stored_path = get_stored_audio_path(text, fmt)
+        if stored_path:
+            logger.info("Returning stored audio")
+            count_audio_response("store", fmt, os.path.getsize(stored_path))
+            location = audio_location_response(text, fmt) if return_url else None
+            return location or audio_response(stored_path, fmt, text)
         
-        # Check cache first
-        cached_audio = get_cached_audio(text)
+        # Then the audio cache
+        with stage("cache_lookup"):
+            cached_audio = get_cached_audio(text, fmt)
         if cached_audio:
-            audio_buffer = io.BytesIO(cached_audio)
-            audio_buffer.seek(0)
             logger.info("Returning cached audio")
-            return send_file(
-                audio_buffer,
-                mimetype="audio/wav",
-                as_attachment=True,
-                download_name="synthesized.wav"
-            )
+            count_audio_response("cache", fmt, len(cached_audio))
+            # Put it on disk too, so it can be served from /api/audio/<hash>
+            stored = store_audio(text, cached_audio, fmt)
+            location = audio_location_response(text, fmt) if stored and return_url else None
+            return location or audio_response(io.BytesIO(cached_audio), fmt, text if stored else None)
         
-        # Convert Sinhala text to Romanized text
+        # Synthesize; concurrent requests for the same text wait for one result
+        priority = synthesis_priority(text)
+        promote_synthesis(text, priority)
+        start = time.perf_counter()
         try:
-            roman_text = sinhala_to_roman(text)
-            logger.info(f"Romanized text: {roman_text[:50]}...")
-        except Exception as e:
-            logger.error(f"Romanization failed: {str(e)}")
-            return jsonify({
-                "error": "Text romanization failed",
-                "details": str(e)
-            }), 500
-        
-        # Generate audio
-        try:
-            wav = synth.tts(roman_text)
-        except Exception as e:
-            logger.error(f"TTS generation failed: {str(e)}")
+            audio_bytes, shared = synthesis_flight.do(
+                get_cache_key(text, fmt), render_encoded_audio, text, fmt, priority
+            )
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected synthesis request: {str(e)}")
+            return overloaded_response(e)
+        except SynthesisError as e:
             return jsonify({
-                "error": "Audio generation failed",
-                "details": str(e)
+                "error": e.error,
+                "details": e.details
             }), 500
         
-        # Create in-memory audio file (temporary, not saved to disk)
-        audio_buffer = io.BytesIO()
-        synth.save_wav(wav, audio_buffer)
-        audio_buffer.seek(0)
+        if shared:
+            logger.info("Returning audio from a concurrent identical request")
+            record_stage("shared_wait", time.perf_counter() - start)
+        count_audio_response("shared" if shared else "synthesized", fmt, len(audio_bytes))
         
-        # Cache the audio
-        audio_bytes = audio_buffer.getvalue()
-        cache_audio(text, audio_bytes)
-        audio_buffer.seek(0)  # Reset for sending
+        location = audio_location_response(text, fmt) if return_url else None
+        if location:
+            return location
         
         # Return audio file directly from memory (no disk write)
-        return send_file(
-            audio_buffer,
+        return audio_response(io.BytesIO(audio_bytes), fmt, text)
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in synthesize endpoint: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e)
+        }), 500
+
+
+@app.route('/api/synthesize/stream', methods=['POST'])
+def synthesize_stream():
+    """
+    Synthesize Sinhala text sentence by sentence and stream the audio.
+    
+    Request body (JSON):
+        {
+            "text": "සිංහල පාඨය"
+        }
+    
+    Returns:
+        Chunked WAV stream (header, then PCM as each sentence is ready),
+        the cached WAV file if the text was synthesized before, or a JSON
+        error response. The stream itself isn't cached: it is split, gapped
+        and scaled differently from render_audio's file for the same text.
+    """
+    try:
+        with stage("model_wait"):
+            error_response = require_model()
+        if error_response:
+            return error_response
+        
+        with stage("validate"):
+            text, error_response = parse_text_request()
+        if error_response:
+            return error_response
+        
+        logger.info(f"Received streaming synthesis request for text: {text[:50]}...")
+        
+        # Already synthesized: no need to stream
+        with stage("store_lookup"):
+            stored_path = get_stored_audio_path(text)
+        if stored_path:
+            return send_file(stored_path, mimetype="audio/wav")
+        with stage("cache_lookup"):
+            cached_audio = get_cached_audio(text)
+        if cached_audio:
+            return send_file(io.BytesIO(cached_audio), mimetype="audio/wav")
+        
+        chunks = split_sentences(text)
+        sample_rate = synth.output_sample_rate
+        
+        # Once the headers are out the stream can't become a 503, so admission
+        # is checked (for the first sentence) up front, and every sentence is
+        # then queued as admitted: neither a full queue nor the SLO can cut
+        # the stream short
+        priority = synthesis_priority(text)
+        try:
+            synth_scheduler.admit(sinhala_to_roman(chunks[0]), priority)
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected streaming synthesis request: {str(e)}")
+            return overloaded_response(e)
+        
+        def generate():
+            yield wav_header(sample_rate)
+            for idx, chunk in enumerate(chunks):
+                try:
+                    # Runs after the response headers went out: histogram only
+                    wav = run_tts(sinhala_to_roman(chunk), priority, endpoint="synthesize_stream", admitted=True)
+                except Exception as e:
+                    # Headers are already sent; end the stream early
+                    logger.error(f"Streaming synthesis failed at chunk {idx + 1}/{len(chunks)}: {str(e)}")
+                    return
+                yield pcm16(wav, peak=STREAM_PEAK)
+        
+        return Response(
+            generate(),
             mimetype="audio/wav",
-            as_attachment=True,
-            download_name="synthesized.wav"
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # don't let proxies buffer the stream
+            }
         )
         
     except Exception as e:
-        logger.error(f"Unexpected error in synthesize endpoint: {str(e)}")
+        logger.error(f"Unexpected error in synthesize_stream endpoint: {str(e)}")
         return jsonify({
             "error": "Internal server error",
             "details": str(e)
         }), 500
 
 
+@app.route('/api/audio/<audio_hash>', methods=['GET'])
+def get_audio(audio_hash):
+    """
+    Serve stored audio by content hash (from X-Audio-Hash or return_url).
+    
+    Supports If-None-Match (304) and Range (206) requests and is cacheable
+    forever, so repeat plays and seeks never reach the synthesis path.
+    
+    Returns:
+        Audio file, 206 partial content, 304, or JSON 404
+    """
+    not_found_response = (jsonify({
+        "error": "Audio not found",
+        "details": "Unknown or expired audio hash; synthesize the text again"
+    }), 404)
+    
+    if audio_store is None or not AUDIO_HASH_PATTERN.fullmatch(audio_hash):
+        return not_found_response
+    
+    path, ext = audio_store.find(audio_hash, EXTENSION_MIMETYPES)
+    if path is None:
+        return not_found_response
+    
+    try:
+        response = send_file(
+            path,
+            mimetype=EXTENSION_MIMETYPES[ext],
+            conditional=True,
+            etag=audio_store.etag(audio_hash, path),
+            max_age=AUDIO_MAX_AGE
+        )
+    except FileNotFoundError:
+        # pruned since find()
+        return not_found_response
+    
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint for this worker process.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.timings = StageTimings()
+
+
+@app.after_request
+def add_server_timing(response):
+    """Send the request's stage timings as Server-Timing and record its latency"""
+    start = g.get("request_start")
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    response.headers["Server-Timing"] = g.timings.server_timing(total)
+    REQUEST_SECONDS.observe(total, endpoint=request.endpoint or "unknown", status=response.status_code)
+    return response
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -331,8 +1421,16 @@ def not_found(error):
         "error": "Endpoint not found",
         "available_endpoints": [
             "GET /api/health",
+            "GET /api/health/live",
+            "GET /api/health/ready",
             "GET /api/fetch-news",
-            "POST /api/synthesize"
+            "GET /api/news",
+            "GET /api/news/search",
+            "GET /api/news/<id>",
+            "GET /api/audio/<hash>",
+            "POST /api/synthesize",
+            "POST /api/synthesize/stream",
+            "GET /metrics"
         ]
     }), 404
 
@@ -354,13 +1452,22 @@ def internal_error(error):
     }), 500
 
 
+# Start loading as soon as the worker boots rather than on the first request.
+# Model replicas are forked by the load, which must happen before any other
+# thread starts (see model_pool.py), so with MODEL_REPLICAS > 1 the model is
+# always loaded here, in the importing thread, before the module returns; the
+# encoder warm-up, news refresher and request threads all start afterwards.
+if SYNTHESIS_ENABLED and MODEL_REPLICAS > 1:
+    model_loader.start(background=False)
+    encoder_pool.warm()
+elif MODEL_EAGER_LOAD and SYNTHESIS_ENABLED:
+    model_loader.start()
+
+
 if __name__ == "__main__":
-    # Load model on startup
     logger.info("Starting Flask API server...")
-    if load_model():
-        logger.info("Server ready!")
-    else:
-        logger.warning("Server starting but model failed to load. Check /api/health for status.")
+    ensure_news_feed()
+    logger.info("Model is loading in the background. Check /api/health/ready for status.")
     
     # Run the app
     app.run(
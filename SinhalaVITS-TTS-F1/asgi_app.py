@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+ASGI (FastAPI) variant of the Flask API in app.py, for uvicorn.
+
+Same endpoints, model, caches, audio store and metrics (they come from
+app.py), but requests are handled on an event loop: model inference runs on
+a dedicated thread pool, Opus/MP3 encoding on the encoder pool and store/
+cache I/O on a third pool, so /api/health, /api/fetch-news and cached audio
+are served while every inference thread is busy.
+
+Run with:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000 [--workers 2]
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+import app as api
+from audio_encoding import EXTENSION_MIMETYPES, negotiate_format
+from batch_scheduler import AdmissionRejected
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, StageTimings
+from romanizer import sinhala_to_roman
+from streaming import STREAM_PEAK, split_sentences, wav_header, pcm16
+
+logger = logging.getLogger(__name__)
+
+# Synthesis runs on ASGI_INFERENCE_THREADS threads, audio store and cache
+# lookups/writes on ASGI_IO_THREADS. Inference threads mostly wait on the
+# scheduler, so by default there is one per queue slot: requests then wait in
+# the scheduler's queue, where admission control sees them, not in this pool's.
+# Opus/MP3 encoding uses app.py's encoder pool (AUDIO_ENCODER_WORKERS).
+ASGI_INFERENCE_THREADS = int(os.environ.get(
+    "ASGI_INFERENCE_THREADS", str(api.QUEUE_MAX_SIZE or max(api.BATCH_MAX_SIZE, 1))
+))
+ASGI_IO_THREADS = int(os.environ.get("ASGI_IO_THREADS", "8"))
+inference_executor = ThreadPoolExecutor(max_workers=ASGI_INFERENCE_THREADS, thread_name_prefix="asgi-inference")
+io_executor = ThreadPoolExecutor(max_workers=ASGI_IO_THREADS, thread_name_prefix="asgi-io")
+
+# Identical requests on this event loop share one synthesis task (the
+# threads below still coalesce with pre-render through api.synthesis_flight)
+synthesis_tasks = {}
+
+
+def run_in(executor, fn, *args):
+    """Run fn(*args) on executor in the caller's context, so stages reach its Server-Timing"""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, context.run, fn, *args)
+
+
+class TimedRoute(APIRoute):
+    """Route that records request latency and sends Server-Timing, like app.py's after_request"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        endpoint = self.name
+
+        async def timed_handler(request):
+            start = time.perf_counter()
+            timings = StageTimings()
+            token = api.request_timings.set((endpoint, timings))
+            try:
+                response = await handler(request)
+            finally:
+                api.request_timings.reset(token)
+            total = time.perf_counter() - start
+            response.headers["Server-Timing"] = timings.server_timing(total)
+            api.REQUEST_SECONDS.observe(total, endpoint=endpoint, status=response.status_code)
+            return response
+
+        return timed_handler
+
+
+@asynccontextmanager
+async def lifespan(_):
+    api.ensure_news_feed()
+    yield
+    inference_executor.shutdown(wait=False, cancel_futures=True)
+    io_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="SinhalaVITS-TTS-F1", lifespan=lifespan, docs_url=None, redoc_url=None)
+app.router.route_class = TimedRoute
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Audio-Hash", "Content-Location", "Server-Timing"],
+)
+
+
+def error_response(status_code, error, details, headers=None):
+    return JSONResponse({"error": error, "details": details}, status_code=status_code, headers=headers)
+
+
+async def require_model():
+    """
+    Wait up to MODEL_WAIT_SECONDS for the background model load.
+
+    Returns:
+        None when the model is ready, otherwise an error response
+        (503 with Retry-After while loading or with SYNTHESIS_ENABLED=0,
+        500 if loading failed)
+    """
+    if not api.SYNTHESIS_ENABLED:
+        return JSONResponse(api.SYNTHESIS_DISABLED, status_code=503)
+    # Waiting blocks a thread, so use the default executor rather than the I/O pool
+    if api.model_loader.is_ready() or await asyncio.to_thread(api.model_loader.wait, api.MODEL_WAIT_SECONDS):
+        return None
+    status = api.model_loader.status()
+    if status["state"] == "failed":
+        return error_response(500, "Model failed to load", api.model_error or status["error"])
+    return error_response(503, "Model is loading", f"Model state: {status['state']}. Retry shortly.",
+                          headers={"Retry-After": "5"})
+
+
+async def parse_text_request(request):
+    """
+    Read and validate the JSON {"text": ...} body of a synthesis request.
+
+    Returns:
+        tuple: (text, body, None) on success, (None, None, error_response) otherwise
+    """
+    mimetype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if mimetype != "application/json" and not (mimetype.startswith("application/") and mimetype.endswith("+json")):
+        return None, None, error_response(400, "Request must be JSON", "Content-Type must be application/json")
+
+    try:
+        data = json.loads(await request.body())
+    except ValueError as e:
+        return None, None, error_response(400, "Invalid JSON", f"Failed to parse JSON: {str(e)}")
+
+    if not data or not isinstance(data, dict):
+        return None, None, error_response(400, "Empty request body", "Request body must contain a JSON object")
+
+    text = str(data.get("text", "")).strip()
+    is_valid, error_msg = api.validate_sinhala_text(text)
+    if not is_valid:
+        return None, None, error_response(400, "Invalid text input", error_msg)
+
+    return text, data, None
+
+
+def parse_output_format(request, data):
+    """
+    Pick the response format as app.parse_output_format does (body fields,
+    query parameters, then the Accept header).
+
+    Returns:
+        tuple: (OutputFormat, None) on success, (None, error_response) otherwise
+    """
+    def option(name):
+        return data.get(name) or request.query_params.get(name)
+
+    try:
+        return negotiate_format(
+            accept=request.headers.get("accept"),
+            requested=option("format"),
+            quality=option("quality"),
+            bitrate=option("bitrate"),
+            sample_rate=option("sample_rate")
+        ), None
+    except ValueError as e:
+        return None, error_response(400, "Invalid output format", str(e))
+
+
+def overloaded_response(rejection):
+    """503 with Retry-After for a text the synthesis queue turned away (see app.overloaded_response)"""
+    return JSONResponse({
+        "error": "Server busy",
+        "details": f"Synthesis queue is {'full' if rejection.reason == 'queue_full' else 'too long'}. "
+                   f"Retry in {rejection.retry_after}s.",
+        "reason": rejection.reason,
+        "estimated_wait_seconds": round(rejection.estimated_wait, 1) if rejection.estimated_wait else None
+    }, status_code=503, headers={"Retry-After": str(rejection.retry_after)})
+
+
+def save_audio(text, audio_bytes, fmt):
+    """Cache and store audio; returns the stored path, if any"""
+    api.cache_audio(text, audio_bytes, fmt)
+    return api.store_audio(text, audio_bytes, fmt)
+
+
+async def render_encoded_audio(text, fmt, priority):
+    """
+    Audio for text in fmt: WAV synthesized on the inference pool, other
+    formats re-encoded from it on the encoder pool, then cached and stored.
+
+    Raises:
+        SynthesisError: if synthesis or encoding fails
+        AdmissionRejected: if the synthesis queue turns the text away
+    """
+    if fmt.codec == "wav":
+        audio_bytes, _ = await run_in(
+            inference_executor, api.synthesis_flight.do, api.get_text_hash(text), api.render_audio, text, priority
+        )
+        return audio_bytes
+
+    # An already rendered WAV only needs encoding; don't queue for inference
+    wav_bytes = await run_in(io_executor, api.get_saved_wav_audio, text)
+    if not wav_bytes:
+        wav_bytes = await run_in(inference_executor, api.get_wav_audio, text, priority)
+    try:
+        with api.stage("encode"):
+            audio_bytes = await asyncio.wrap_future(api.encoder_pool.submit(wav_bytes, fmt))
+    except Exception as e:
+        logger.error(f"Encoding to {fmt.key} failed: {str(e)}")
+        raise api.SynthesisError("Audio encoding failed", str(e))
+
+    with api.stage("cache_write"):
+        await run_in(io_executor, save_audio, text, audio_bytes, fmt)
+    return audio_bytes
+
+
+async def synthesize_once(text, fmt, priority):
+    """
+    render_encoded_audio, shared by concurrent identical requests.
+
+    Returns:
+        tuple: (audio_bytes, shared)
+    """
+    key = api.get_cache_key(text, fmt)
+    task = synthesis_tasks.get(key)
+    shared = task is not None
+    if not shared:
+        task = asyncio.ensure_future(render_encoded_audio(text, fmt, priority))
+        synthesis_tasks[key] = task
+        task.add_done_callback(lambda _: synthesis_tasks.pop(key, None))
+    # A client that disconnects must not cancel the others' synthesis
+    return await asyncio.shield(task), shared
+
+
+def audio_response(audio, fmt, text=None):
+    """
+    Audio from a stored path or bytes in fmt, with the same headers as
+    app.audio_response (Vary, and X-Audio-Hash/Content-Location when stored).
+    """
+    headers = {"Vary": "Accept"}
+    if text is not None and api.audio_store is not None:
+        audio_hash = api.get_audio_hash(text, fmt)
+        headers["X-Audio-Hash"] = audio_hash
+        headers["Content-Location"] = f"/api/audio/{audio_hash}"
+    download_name = f"synthesized.{fmt.extension}"
+    if isinstance(audio, bytes):
+        headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+        return Response(audio, media_type=fmt.mimetype, headers=headers)
+    return FileResponse(audio, media_type=fmt.mimetype, filename=download_name, headers=headers)
+
+
+async def audio_location_response(text, fmt):
+    """
+    JSON pointing at GET /api/audio/<hash> instead of the audio itself.
+
+    Returns:
+        JSONResponse, or None if the clip isn't in the audio store
+    """
+    if not await run_in(io_executor, api.get_stored_audio_path, text, fmt):
+        return None
+    audio_hash = api.get_audio_hash(text, fmt)
+    return JSONResponse({
+        "hash": audio_hash,
+        "url": f"/api/audio/{audio_hash}",
+        "content_type": fmt.mimetype,
+        "format": fmt.key
+    })
+
+
+@app.get("/api/fetch-news")
+async def fetch_news():
+    """Latest news snapshot; see app.fetch_news"""
+    try:
+        api.ensure_news_feed()
+        with api.stage("snapshot"):
+            payload = api.news_payload()
+        with api.stage("serialize"):
+            response = JSONResponse(payload)
+        return response
+    except Exception as e:
+        logger.error(f"Error fetching news: {str(e)}")
+        return JSONResponse({
+            "success": False,
+            "error": "Failed to fetch news",
+            "details": str(e),
+            "items": []
+        }, status_code=500)
+
+
+async def archive_response(request, search=False):
+    with api.stage("archive_query"):
+        payload, status = await run_in(io_executor, api.archive_payload, dict(request.query_params), search)
+    with api.stage("serialize"):
+        return JSONResponse(payload, status_code=status)
+
+
+@app.get("/api/news")
+async def list_news(request: Request):
+    """Archived news, newest first, keyset-paginated; see app.list_news"""
+    try:
+        api.ensure_news_feed()
+        return await archive_response(request)
+    except Exception as e:
+        logger.error(f"Error listing news: {str(e)}")
+        return JSONResponse({
+            "success": False,
+            "error": "Failed to list news",
+            "details": str(e),
+            "items": []
+        }, status_code=500)
+
+
+@app.get("/api/news/search")
+async def search_news(request: Request):
+    """Full-text search of the archive; see app.search_news"""
+    try:
+        api.ensure_news_feed()
+        return await archive_response(request, search=True)
+    except Exception as e:
+        logger.error(f"Error searching news: {str(e)}")
+        return JSONResponse({
+            "success": False,
+            "error": "Failed to search news",
+            "details": str(e),
+            "items": []
+        }, status_code=500)
+
+
+@app.get("/api/news/{item_id}")
+async def get_news_item(item_id: int):
+    """One archived item by id; see app.get_news_item"""
+    try:
+        api.ensure_news_feed()
+        item = await run_in(io_executor, api.news_archive.get, item_id) if api.news_archive is not None else None
+        if item is None:
+            return error_response(404, "News item not found", f"No archived item with id {item_id}")
+        return JSONResponse(item)
+    except Exception as e:
+        logger.error(f"Error getting news item {item_id}: {str(e)}")
+        return error_response(500, "Failed to get news item", str(e))
+
+
+@app.get("/api/health")
+async def health_check():
+    """Server status; never loads or waits on the model"""
+    try:
+        return JSONResponse(api.health_status())
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return JSONResponse({
+            "status": "unhealthy",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }, status_code=500)
+
+
+@app.get("/api/health/live")
+async def health_live():
+    """Liveness probe: the process is up and serving requests"""
+    return JSONResponse({
+        "status": "alive",
+        "uptime_seconds": round(time.monotonic() - api.STARTED_AT, 3),
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+@app.get("/api/health/ready")
+async def health_ready():
+    """Readiness probe: 200 once the model is loaded and warmed up (or with SYNTHESIS_ENABLED=0), else 503"""
+    model_status = api.readiness_status()
+    return JSONResponse(model_status, status_code=200 if model_status["ready"] else 503)
+
+
+@app.post("/api/synthesize")
+async def synthesize(request: Request):
+    """Synthesize Sinhala text to speech; request and responses as in app.synthesize"""
+    try:
+        with api.stage("model_wait"):
+            error = await require_model()
+        if error:
+            return error
+
+        with api.stage("validate"):
+            text, data, error = await parse_text_request(request)
+            if not error:
+                fmt, error = parse_output_format(request, data)
+        if error:
+            return error
+
+        return_url = bool(data.get("return_url"))
+        logger.info(f"Received synthesis request ({fmt.key}) for text: {text[:50]}...")
+
+        with api.stage("store_lookup"):
+            stored_path = await run_in(io_executor, api.get_stored_audio_path, text, fmt)
+        if stored_path:
+            logger.info("Returning stored audio")
+            api.count_audio_response("store", fmt, os.path.getsize(stored_path))
+            location = await audio_location_response(text, fmt) if return_url else None
+            return location or audio_response(stored_path, fmt, text)
+
+        with api.stage("cache_lookup"):
+            cached_audio = await run_in(io_executor, api.get_cached_audio, text, fmt)
+        if cached_audio:
+            logger.info("Returning cached audio")
+            api.count_audio_response("cache", fmt, len(cached_audio))
+            stored = await run_in(io_executor, api.store_audio, text, cached_audio, fmt)
+            location = await audio_location_response(text, fmt) if stored and return_url else None
+            return location or audio_response(cached_audio, fmt, text if stored else None)
+
+        priority = api.synthesis_priority(text)
+        api.promote_synthesis(text, priority)
+        start = time.perf_counter()
+        try:
+            audio_bytes, shared = await synthesize_once(text, fmt, priority)
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected synthesis request: {str(e)}")
+            return overloaded_response(e)
+        except api.SynthesisError as e:
+            return error_response(500, e.error, e.details)
+
+        if shared:
+            logger.info("Returning audio from a concurrent identical request")
+            api.record_stage("shared_wait", time.perf_counter() - start)
+        api.count_audio_response("shared" if shared else "synthesized", fmt, len(audio_bytes))
+
+        location = await audio_location_response(text, fmt) if return_url else None
+        return location or audio_response(audio_bytes, fmt, text)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in synthesize endpoint: {str(e)}")
+        return error_response(500, "Internal server error", str(e))
+
+
+@app.post("/api/synthesize/stream")
+async def synthesize_stream(request: Request):
+    """Synthesize sentence by sentence and stream the WAV; see app.synthesize_stream"""
+    try:
+        with api.stage("model_wait"):
+            error = await require_model()
+        if error:
+            return error
+
+        with api.stage("validate"):
+            text, _, error = await parse_text_request(request)
+        if error:
+            return error
+
+        logger.info(f"Received streaming synthesis request for text: {text[:50]}...")
+
+        with api.stage("store_lookup"):
+            stored_path = await run_in(io_executor, api.get_stored_audio_path, text)
+        if stored_path:
+            return FileResponse(stored_path, media_type="audio/wav")
+        with api.stage("cache_lookup"):
+            cached_audio = await run_in(io_executor, api.get_cached_audio, text)
+        if cached_audio:
+            return Response(cached_audio, media_type="audio/wav")
+
+        chunks = split_sentences(text)
+        sample_rate = api.synth.output_sample_rate
+
+        # Once the headers are out the stream can't become a 503: admission is
+        # checked up front, then every sentence is queued as admitted
+        priority = api.synthesis_priority(text)
+        try:
+            api.synth_scheduler.admit(sinhala_to_roman(chunks[0]), priority)
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected streaming synthesis request: {str(e)}")
+            return overloaded_response(e)
+
+        async def generate():
+            yield wav_header(sample_rate)
+            for idx, chunk in enumerate(chunks):
+                try:
+                    # Runs after the response headers went out: histogram only
+                    wav = await run_in(inference_executor, functools.partial(api.run_tts, admitted=True),
+                                       sinhala_to_roman(chunk), priority, "synthesize_stream")
+                except Exception as e:
+                    # Headers are already sent; end the stream early
+                    logger.error(f"Streaming synthesis failed at chunk {idx + 1}/{len(chunks)}: {str(e)}")
+                    return
+                # Not cached: render_audio's file for this text is split, gapped and scaled differently
+                yield pcm16(wav, peak=STREAM_PEAK)
+
+        return StreamingResponse(
+            generate(),
+            media_type="audio/wav",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # don't let proxies buffer the stream
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error in synthesize_stream endpoint: {str(e)}")
+        return error_response(500, "Internal server error", str(e))
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value lists etag (or is *)"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag.strip('"') == etag:
+            return True
+    return False
+
+
+@app.get("/api/audio/{audio_hash}")
+async def get_audio(audio_hash: str, request: Request):
+    """
+    Serve stored audio by content hash, with If-None-Match (304) and Range
+    (206) support; see app.get_audio.
+    """
+    not_found_response = error_response(
+        404, "Audio not found", "Unknown or expired audio hash; synthesize the text again"
+    )
+
+    if api.audio_store is None or not api.AUDIO_HASH_PATTERN.fullmatch(audio_hash):
+        return not_found_response
+
+    path, ext = await run_in(io_executor, api.audio_store.find, audio_hash, EXTENSION_MIMETYPES)
+    if path is None:
+        return not_found_response
+
+    def stat_stored():
+        return os.stat(path), api.audio_store.etag(audio_hash, path)
+
+    try:
+        stat_result, etag = await run_in(io_executor, stat_stored)
+    except FileNotFoundError:
+        # pruned since find()
+        return not_found_response
+
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"public, max-age={api.AUDIO_MAX_AGE}, immutable"
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=EXTENSION_MIMETYPES[ext], stat_result=stat_result, headers=headers)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint for this worker process"""
+    return Response(api.metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.exception_handler(StarletteHTTPException)
+async def http_error(request, exc):
+    """404/405 bodies as in app.py"""
+    if exc.status_code == 404:
+        return JSONResponse({
+            "error": "Endpoint not found",
+            "available_endpoints": [
+                "GET /api/health",
+                "GET /api/health/live",
+                "GET /api/health/ready",
+                "GET /api/fetch-news",
+                "GET /api/news",
+                "GET /api/news/search",
+                "GET /api/news/<id>",
+                "GET /api/audio/<hash>",
+                "POST /api/synthesize",
+                "POST /api/synthesize/stream",
+                "GET /metrics"
+            ]
+        }, status_code=404)
+    if exc.status_code == 405:
+        return JSONResponse({"error": "Method not allowed"}, status_code=405)
+    return JSONResponse({"error": str(exc.detail)}, status_code=exc.status_code, headers=exc.headers)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logger.info("Starting ASGI API server...")
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,291 @@
+"""
+Audio cache backends: a bounded in-memory LRU/TTL cache and a shared Redis cache
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Interface behind get_cached_audio/cache_audio. Keys are text hashes,
+    values are encoded audio bytes. A backend missing get, put or delete
+    fails when it is constructed.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key):
+        """Return cached bytes for key, or None"""
+
+    @abstractmethod
+    def put(self, key, audio_bytes):
+        """Store audio_bytes under key; returns False if it wasn't stored"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Drop key if cached"""
+
+    def get_many(self, keys):
+        """Return {key: audio_bytes} for the keys that are cached."""
+        found = {}
+        for key in keys:
+            audio_bytes = self.get(key)
+            if audio_bytes is not None:
+                found[key] = audio_bytes
+        return found
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class AudioCache(CacheBackend):
+    """
+    Thread-safe LRU cache of audio bytes with a total byte budget, local to
+    one process.
+
+    Entries older than ttl_seconds are dropped lazily when they are looked up,
+    and by a full sweep that runs at most every sweep_interval seconds from
+    get()/put(), so stale entries don't pin memory until the next access.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl_seconds=24 * 3600,
+                 sweep_interval=300, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (audio_bytes, stored_at)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._last_sweep = clock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """Return cached bytes for key, or None if missing or expired."""
+        with self._lock:
+            now = self._clock()
+            self._maybe_sweep(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            audio_bytes, stored_at = entry
+            if now - stored_at >= self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio_bytes
+
+    def put(self, key, audio_bytes):
+        """
+        Store audio bytes under key, evicting least recently used entries
+        until the cache fits in max_bytes.
+
+        Returns:
+            bool: False if the item alone is larger than the budget
+        """
+        size = len(audio_bytes)
+        with self._lock:
+            now = self._clock()
+            self._maybe_sweep(now)
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return False
+            while self._entries and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = (audio_bytes, now)
+            self._bytes += size
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def sweep(self):
+        """Drop every expired entry. Returns the number removed."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def stats(self):
+        """Counters for health/metrics endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key):
+        audio_bytes, _ = self._entries.pop(key)
+        self._bytes -= len(audio_bytes)
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        # entries are in access order, not insertion order, so check them all
+        expired = [key for key, (_, stored_at) in self._entries.items()
+                   if now - stored_at >= self.ttl_seconds]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+
+class RedisAudioCache(CacheBackend):
+    """
+    Audio cache shared by every Flask host and Modal container pointing at the
+    same Redis. Expiry is left to Redis (SET ... EX ttl) and eviction to its
+    maxmemory policy. Connection errors are logged and treated as misses so a
+    Redis outage only costs extra synthesis.
+    """
+
+    name = "redis"
+
+    def __init__(self, url=None, client=None, ttl_seconds=24 * 3600,
+                 prefix="tts:audio:", max_connections=20, socket_timeout=2.0):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("RedisAudioCache requires the 'redis' package") from e
+            pool = redis.ConnectionPool.from_url(
+                url,
+                max_connections=max_connections,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+            )
+            client = redis.Redis(connection_pool=pool)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _count(self, hits=0, misses=0, errors=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.errors += errors
+
+    def get(self, key):
+        try:
+            audio_bytes = self.client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis get failed: {str(e)}")
+            self._count(misses=1, errors=1)
+            return None
+        if audio_bytes is None:
+            self._count(misses=1)
+        else:
+            self._count(hits=1)
+        return audio_bytes
+
+    def get_many(self, keys):
+        """Fetch many keys in one round trip (feed prefetch)."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(self._key(key))
+            values = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis pipelined get failed: {str(e)}")
+            self._count(misses=len(keys), errors=1)
+            return {}
+        found = {key: value for key, value in zip(keys, values) if value is not None}
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def put(self, key, audio_bytes):
+        try:
+            self.client.set(self._key(key), audio_bytes, ex=self.ttl_seconds)
+            return True
+        except Exception as e:
+            logger.warning(f"Redis set failed: {str(e)}")
+            self._count(errors=1)
+            return False
+
+    def delete(self, key):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis delete failed: {str(e)}")
+            self._count(errors=1)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "errors": self.errors,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+def create_audio_cache(redis_url=None, max_bytes=256 * 1024 * 1024, ttl_seconds=24 * 3600):
+    """
+    Return a RedisAudioCache when redis_url is set (falling back to memory if
+    the client can't be created), otherwise an in-process AudioCache.
+    """
+    if redis_url:
+        try:
+            cache = RedisAudioCache(redis_url, ttl_seconds=ttl_seconds)
+            logger.info("Using Redis audio cache")
+            return cache
+        except Exception as e:
+            logger.warning(f"Redis audio cache unavailable, using memory cache: {str(e)}")
+    return AudioCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
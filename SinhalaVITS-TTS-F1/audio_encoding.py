@@ -0,0 +1,291 @@
+"""
+Compressed output formats (Opus, MP3) and a warm pool of encoder threads
+"""
+
+import io
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# codec -> container details and what libsndfile accepts for it
+CODECS = {
+    "wav": {
+        "mimetype": "audio/wav",
+        "extension": "wav",
+        "sf_format": "WAV",
+        "subtype": "PCM_16",
+        "sample_rates": None,
+    },
+    "opus": {
+        "mimetype": "audio/ogg",
+        "extension": "opus",
+        "sf_format": "OGG",
+        "subtype": "OPUS",
+        "sample_rates": (8000, 12000, 16000, 24000, 48000),
+    },
+    "mp3": {
+        "mimetype": "audio/mpeg",
+        "extension": "mp3",
+        "sf_format": "MP3",
+        "subtype": "MPEG_LAYER_III",
+        "sample_rates": (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000),
+    },
+}
+
+# file extension -> Content-Type, for serving stored files
+EXTENSION_MIMETYPES = {codec["extension"]: codec["mimetype"] for codec in CODECS.values()}
+
+CODEC_ALIASES = {"ogg": "opus", "mpeg": "mp3", "wave": "wav"}
+
+# Accept header media types we can produce
+MIME_CODECS = {
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/vnd.wave": "wav",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+}
+
+# (sample rate, kbps) per quality tier. Speech from a 22.05 kHz model keeps
+# its intelligibility well below these rates.
+QUALITY_TIERS = {
+    "opus": {"high": (24000, 32), "medium": (16000, 24), "low": (16000, 12)},
+    "mp3": {"high": (22050, 64), "medium": (22050, 48), "low": (16000, 32)},
+}
+DEFAULT_QUALITY = "medium"
+
+
+class OutputFormat(namedtuple("OutputFormat", ["codec", "sample_rate", "bitrate"])):
+    """
+    A concrete output encoding. sample_rate None means the model's own rate;
+    bitrate (kbps) is None for WAV.
+    """
+    __slots__ = ()
+
+    @property
+    def mimetype(self):
+        return CODECS[self.codec]["mimetype"]
+
+    @property
+    def extension(self):
+        return CODECS[self.codec]["extension"]
+
+    @property
+    def key(self):
+        """Cache/store key component; "wav" for WAV so existing entries still hit"""
+        if self.codec == "wav":
+            return "wav"
+        return f"{self.codec}-{self.sample_rate}-{self.bitrate}k"
+
+
+WAV = OutputFormat("wav", None, None)
+
+
+def bitrate_range(codec, sample_rate):
+    """(min, max) kbps the encoder supports at this sample rate"""
+    if codec == "opus":
+        return 6, 256
+    if sample_rate >= 32000:  # MPEG-1
+        return 32, 320
+    if sample_rate >= 16000:  # MPEG-2
+        return 8, 160
+    return 8, 64  # MPEG-2.5
+
+
+def compression_level(fmt):
+    """
+    Map a target bitrate to libsndfile's 0..1 compression level, which it
+    maps linearly onto the codec's bitrate range (0 = highest bitrate).
+    """
+    low, high = bitrate_range(fmt.codec, fmt.sample_rate)
+    return min(1.0, max(0.0, (high - fmt.bitrate) / float(high - low)))
+
+
+def parse_accept(accept):
+    """
+    Media types from an Accept header, highest q first. Among equal q,
+    concrete types come before wildcards, otherwise header order is kept.
+    """
+    entries = []
+    for position, part in enumerate((accept or "").split(",")):
+        fields = [field.strip() for field in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            media_type = fields[0].lower()
+            entries.append((-q, media_type.endswith("/*"), position, media_type))
+    return [media_type for _, _, _, media_type in sorted(entries)]
+
+
+def negotiate_format(accept=None, requested=None, quality=None, bitrate=None, sample_rate=None):
+    """
+    Pick the output format for a request.
+
+    An explicit format ("wav", "opus", "mp3") wins over the Accept header;
+    without either, or when Accept only allows wildcards, the answer is WAV
+    so existing clients are unaffected.
+
+    Raises:
+        ValueError: for an unknown format, tier, sample rate or bitrate
+    """
+    if requested:
+        codec = CODEC_ALIASES.get(requested.lower(), requested.lower())
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported format '{requested}'. Use one of: {', '.join(CODECS)}")
+    else:
+        codec = "wav"
+        for media_type in parse_accept(accept):
+            if media_type in MIME_CODECS:
+                codec = MIME_CODECS[media_type]
+                break
+            if media_type in ("audio/*", "*/*"):
+                break
+
+    if codec == "wav":
+        return WAV
+
+    tier = (quality or DEFAULT_QUALITY).lower()
+    if tier not in QUALITY_TIERS[codec]:
+        raise ValueError(f"Unknown quality '{quality}'. Use one of: {', '.join(QUALITY_TIERS[codec])}")
+    default_rate, default_bitrate = QUALITY_TIERS[codec][tier]
+
+    rate = int(sample_rate) if sample_rate else default_rate
+    if rate not in CODECS[codec]["sample_rates"]:
+        allowed = ", ".join(str(r) for r in CODECS[codec]["sample_rates"])
+        raise ValueError(f"Unsupported sample rate {rate} for {codec}. Use one of: {allowed}")
+
+    kbps = int(bitrate) if bitrate else default_bitrate
+    low, high = bitrate_range(codec, rate)
+    if not low <= kbps <= high:
+        raise ValueError(f"Bitrate {kbps} kbps out of range for {codec} at {rate} Hz ({low}-{high})")
+
+    return OutputFormat(codec, rate, kbps)
+
+
+def resample(samples, src_rate, dst_rate):
+    """
+    Resample a mono float waveform. Downsampling low-passes first (windowed
+    sinc) so content above the new Nyquist frequency doesn't alias.
+    """
+    import numpy as np
+
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if dst_rate < src_rate:
+        cutoff = 0.45 * dst_rate / src_rate
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    length = int(round(len(samples) * dst_rate / float(src_rate)))
+    positions = np.arange(length) * (src_rate / float(dst_rate))
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def encode_audio(wav_bytes, fmt):
+    """Re-encode WAV bytes to fmt. Runs in-process through libsndfile."""
+    import soundfile as sf
+
+    if fmt.codec == "wav":
+        return wav_bytes
+
+    samples, rate = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    samples = resample(samples, rate, fmt.sample_rate)
+
+    codec = CODECS[fmt.codec]
+    out = io.BytesIO()
+    sf.write(out, samples, fmt.sample_rate, format=codec["sf_format"], subtype=codec["subtype"],
+             compression_level=compression_level(fmt),
+             bitrate_mode="CONSTANT" if fmt.codec == "mp3" else None)
+    return out.getvalue()
+
+
+class EncoderPool:
+    """
+    Fixed pool of encoder threads, warmed at startup.
+
+    libsndfile (with its bundled Opus and LAME encoders) runs in-process and
+    releases the GIL while encoding, so threads encode in parallel without a
+    subprocess or pipe per request. Warm-up encodes a short silence in every
+    codec so the first real request doesn't pay library initialization.
+    """
+
+    def __init__(self, max_workers=2, warm=True):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio-encoder")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.encodes = {}
+        self.seconds = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        if warm:
+            self.warm()
+
+    def warm(self):
+        """Encode a short silence in every codec on a pool thread (starting it)"""
+        self._executor.submit(self._warm)
+
+    def _warm(self):
+        from streaming import wav_header
+
+        silence = wav_header(22050, data_size=4410) + b"\0" * 4410
+        for codec in QUALITY_TIERS:
+            try:
+                encode_audio(silence, negotiate_format(requested=codec))
+            except Exception as e:
+                logger.warning(f"Encoder warm-up failed for {codec}: {str(e)}")
+
+    def _run(self, wav_bytes, fmt):
+        start = time.perf_counter()
+        try:
+            encoded = encode_audio(wav_bytes, fmt)
+            with self._lock:
+                self.bytes_in += len(wav_bytes)
+                self.bytes_out += len(encoded)
+            return encoded
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.encodes[fmt.codec] = self.encodes.get(fmt.codec, 0) + 1
+                self.seconds[fmt.codec] = self.seconds.get(fmt.codec, 0.0) + time.perf_counter() - start
+
+    def submit(self, wav_bytes, fmt):
+        """Start encoding on a pool thread; returns a Future of the encoded bytes"""
+        if fmt.codec == "wav":
+            future = Future()
+            future.set_result(wav_bytes)
+            return future
+        with self._lock:
+            self._pending += 1
+        return self._executor.submit(self._run, wav_bytes, fmt)
+
+    def encode(self, wav_bytes, fmt, timeout=None):
+        """Encode on a pool thread and wait for the result"""
+        return self.submit(wav_bytes, fmt).result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "encodes": dict(self.encodes),
+                "avg_ms": {codec: round(self.seconds[codec] / count * 1000, 2)
+                           for codec, count in self.encodes.items()},
+                "compression_ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+            }
@@ -0,0 +1,202 @@
+"""
+Content-addressed on-disk audio store shared by all server processes
+"""
+
+import hashlib
+import io
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+
+# model_fingerprint hashes this much from each end of the checkpoint
+FINGERPRINT_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def model_fingerprint(model_path):
+    """
+    Identify a checkpoint by its content so audio from a different model
+    never hits: name, size and a sha1 of the first and last
+    FINGERPRINT_SAMPLE_BYTES. A retrained checkpoint of the same architecture
+    has the same name and size but different weights at both ends. Hashing
+    the whole ~950MB file would slow startup.
+    """
+    try:
+        size = os.path.getsize(model_path)
+        digest = hashlib.sha1(str(size).encode("ascii"))
+        with open(model_path, "rb") as f:
+            digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+            if size > 2 * FINGERPRINT_SAMPLE_BYTES:
+                f.seek(size - FINGERPRINT_SAMPLE_BYTES)
+            digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    except OSError:
+        return f"{os.path.basename(model_path)}:0"
+    return f"{os.path.basename(model_path)}:{size}:{digest.hexdigest()[:16]}"
+
+
+class _SnapshotHeader(pickle.Unpickler):
+    """Unpickles a torch.save file's metadata without torch: tensors come back as None"""
+
+    def find_class(self, module, name):
+        if (module, name) == ("collections", "OrderedDict"):
+            return dict
+        return lambda *args, **kwargs: None
+
+    def persistent_load(self, pid):
+        return None
+
+
+def snapshot_source(snapshot_path):
+    """
+    The model_fingerprint of the checkpoint a model snapshot (model_snapshot.py)
+    was written from, read without importing torch; None if unreadable.
+    """
+    try:
+        with zipfile.ZipFile(snapshot_path) as archive:
+            name = next(name for name in archive.namelist() if name.endswith("/data.pkl"))
+            header = _SnapshotHeader(io.BytesIO(archive.read(name))).load()
+        return header.get("source") if isinstance(header, dict) else None
+    except Exception as e:
+        logger.warning(f"Could not read the source of {snapshot_path}: {str(e)}")
+        return None
+
+
+def audio_key(text, model_id, audio_format="wav"):
+    """Content address for a synthesized clip."""
+    material = "\0".join([model_id, audio_format, text])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AudioStore:
+    """
+    Audio files stored as <root>/<key[:2]>/<key>.<ext>.
+
+    Writes go to a temp file in the same directory and are os.replace()d into
+    place, so concurrent workers only ever see complete files. Reads hand out
+    paths (for send_file/sendfile) or read-only mmaps, never Python copies.
+
+    A file's mtime is when it was written (see etag()); reads bump its atime,
+    which prune() uses for recency.
+    """
+
+    def __init__(self, root, max_bytes=None, prune_every=100):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._puts = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key, ext="wav"):
+        return os.path.join(self.root, key[:2], f"{key}.{ext}")
+
+    def get_path(self, key, ext="wav"):
+        """Return the file path for key if stored, else None."""
+        path = self.path_for(key, ext)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        try:
+            # bump atime so prune() keeps recently served files
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except OSError:
+            pass
+        return path
+
+    def find(self, key, exts):
+        """Return (path, ext) for the first of exts stored under key, else (None, None)."""
+        for ext in exts:
+            path = self.get_path(key, ext)
+            if path:
+                return path, ext
+        return None, None
+
+    @staticmethod
+    def etag(key, path):
+        """
+        Strong validator for a stored file: the key plus its write time, so a
+        clip re-rendered after pruning (different bytes) gets a new ETag.
+        """
+        return f"{key}-{os.stat(path).st_mtime_ns:x}"
+
+    def open_mmap(self, key, ext="wav"):
+        """Return a read-only mmap of the stored file, or None."""
+        path = self.get_path(key, ext)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def put(self, key, audio_bytes, ext="wav"):
+        """Atomically write audio bytes under key. Returns the final path."""
+        path = self.path_for(key, ext)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        # pruning walks the whole tree, so only do it every prune_every writes
+        self._puts += 1
+        if self.max_bytes and self._puts % self.prune_every == 0:
+            self.prune(self.max_bytes)
+        return path
+
+    def delete(self, key, ext="wav"):
+        try:
+            os.unlink(self.path_for(key, ext))
+        except FileNotFoundError:
+            pass
+
+    def usage(self):
+        """Return (file_count, total_bytes)."""
+        count = total = 0
+        for _, _, size in self._iter_files():
+            count += 1
+            total += size
+        return count, total
+
+    def prune(self, max_bytes):
+        """Delete least recently used (by atime) files until the store fits in max_bytes."""
+        files = sorted(self._iter_files(), key=lambda f: f[1])
+        total = sum(size for _, _, size in files)
+        removed = 0
+        for path, _, size in files:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            logger.info(f"Pruned {removed} files from audio store ({total} bytes kept)")
+        return removed
+
+    def _iter_files(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, max(st.st_atime, st.st_mtime), st.st_size
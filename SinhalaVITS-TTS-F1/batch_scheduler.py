@@ -0,0 +1,384 @@
+"""
+Dynamic micro-batching for VITS inference.
+
+Requests that arrive within a few milliseconds of each other are collected
+and run through the model as one padded batch, then split back per request.
+The queue in front of the model is bounded and ordered by priority, so a
+burst is turned away early instead of timing out later.
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Synthesizer.tts puts this much silence between sentences
+SENTENCE_GAP_SAMPLES = 10000
+
+
+class VitsBatchRunner:
+    """
+    Batched replacement for Synthesizer.tts on a single-speaker VITS model.
+
+    Mirrors what Synthesizer.tts does per text (sentence split, tokenize,
+    optional silence trim, 10000-sample gap after each sentence) but runs all
+    sentences of all texts in one forward pass. Falls back to calling
+    synth.tts per text if the batched pass fails.
+    """
+
+    def __init__(self, synth):
+        self.synth = synth
+        self.model = synth.tts_model
+        self.use_cuda = synth.use_cuda
+        audio_config = synth.tts_config.audio
+        self.trim = "do_trim_silence" in audio_config and bool(audio_config["do_trim_silence"])
+
+    def tts(self, text):
+        return self.tts_batch([text])[0]
+
+    def tts_batch(self, texts):
+        """Return one waveform (list of floats) per input text."""
+        try:
+            return self._tts_batch(texts)
+        except Exception as e:
+            logger.warning(f"Batched inference failed, falling back to per-text: {str(e)}")
+            return [self.synth.tts(text) for text in texts]
+
+    def _tts_batch(self, texts):
+        import numpy as np
+        import torch
+        from TTS.tts.utils.synthesis import trim_silence
+
+        # (text index, token ids) for every sentence, in order
+        sentences = []
+        for idx, text in enumerate(texts):
+            for sentence in self.synth.split_into_sentences(text):
+                ids = self.model.tokenizer.text_to_ids(sentence)
+                sentences.append((idx, ids))
+
+        wavs = [[] for _ in texts]
+        if not sentences:
+            return wavs
+
+        lengths = [len(ids) for _, ids in sentences]
+        padded = np.zeros((len(sentences), max(lengths)), dtype=np.int64)
+        for row, (_, ids) in enumerate(sentences):
+            padded[row, :len(ids)] = ids
+
+        device = "cuda" if self.use_cuda else "cpu"
+        x = torch.from_numpy(padded).to(device)
+        x_lengths = torch.tensor(lengths, dtype=torch.long, device=device)
+
+        with torch.no_grad():
+            outputs = self.model.inference(x, aux_input={"x_lengths": x_lengths})
+
+        audio = outputs["model_outputs"]  # [B, 1, T_wav]
+        y_mask = outputs["y_mask"]  # [B, 1, T_frames]
+        samples_per_frame = audio.shape[-1] // y_mask.shape[-1]
+        frames = y_mask.sum(dim=(1, 2)).long().tolist()
+        audio = audio.squeeze(1).cpu().numpy()
+
+        for row, (idx, _) in enumerate(sentences):
+            waveform = audio[row, :frames[row] * samples_per_frame]
+            if self.trim:
+                waveform = trim_silence(waveform, self.model.ap)
+            wavs[idx] += list(waveform)
+            wavs[idx] += [0] * SENTENCE_GAP_SAMPLES
+        return wavs
+
+
+# Job priorities, most urgent first. A breaking headline is about to be
+# played by everyone, so it outranks one listener's play; pre-render is
+# background work that only matters if nobody is waiting.
+PRIORITY_BREAKING = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_PRERENDER = 2
+PRIORITY_NAMES = {PRIORITY_BREAKING: "breaking", PRIORITY_INTERACTIVE: "interactive", PRIORITY_PRERENDER: "prerender"}
+
+# Weight of the newest batch in the batch cost model
+COST_SMOOTHING = 0.1
+
+
+class AdmissionRejected(Exception):
+    """
+    A job turned away because the queue is full ("queue_full") or it would
+    finish after the latency SLO ("slo"). retry_after is in whole seconds.
+    """
+
+    def __init__(self, reason, retry_after, estimated_wait=None):
+        detail = f", estimated wait {estimated_wait:.1f}s" if estimated_wait is not None else ""
+        super().__init__(f"Synthesis queue rejected the job ({reason}{detail})")
+        self.reason = reason
+        self.retry_after = retry_after
+        self.estimated_wait = estimated_wait
+
+
+class _Job:
+    __slots__ = ("text", "priority", "future", "enqueued_at", "taken")
+
+    def __init__(self, text, priority):
+        self.text = text
+        self.priority = priority
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.taken = False
+
+
+class InferenceScheduler:
+    """
+    Collects submitted texts on a priority queue and hands them to run_batch in groups.
+
+    Jobs are taken by priority (PRIORITY_*), then shortest text first, then
+    arrival. A batch is closed when it reaches max_batch_size items, when
+    adding the next text would exceed max_batch_tokens characters, or
+    max_wait_ms after its first item was taken. workers background threads
+    run batches (one each at a time), so callers never touch the model
+    concurrently; more than one only makes sense when run_batch spreads
+    batches over several model replicas (see model_pool.ModelPool).
+
+    Admission control: with max_queue set, submit() raises AdmissionRejected
+    once that many jobs are waiting. With slo_seconds set, it also raises when
+    the estimated time to finish the job (the rest of the running batch, then
+    the jobs that would be taken before it and the job itself, shared
+    between the workers) exceeds the SLO. Batch cost is modelled as batch_overhead + seconds_per_char * chars,
+    fitted to recent batches. Pre-render jobs are never rejected for the SLO.
+
+    The futures submit() returns carry queue_seconds (submit to batch start)
+    and run_seconds (the batch's inference time) once resolved.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10, max_batch_tokens=2000,
+                 max_queue=0, slo_seconds=0, workers=1):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_tokens = max_batch_tokens
+        self.max_queue = max_queue
+        self.slo_seconds = slo_seconds
+        self.workers = max(1, workers)
+        self._cond = threading.Condition()
+        # (priority, length, seq, job); entries left behind by promote() are skipped
+        self._heap = []
+        self._seq = itertools.count()
+        self._queued = {}
+        self._depth = 0
+        # worker -> (chars, start) of the batch it is running
+        self._running = {}
+        self.seconds_per_char = None
+        self.batch_overhead = None
+        # decayed sums for the cost fit: weight, chars, seconds, chars^2, chars*seconds
+        self._cost_sums = (0.0, 0.0, 0.0, 0.0, 0.0)
+        self.batches = 0
+        self.items = 0
+        self.rejected = {"queue_full": 0, "slo": 0}
+        self.queue_seconds = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.queued_jobs = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._threads = [threading.Thread(target=self._loop, args=(worker,), daemon=True,
+                                          name="inference-scheduler" if self.workers == 1
+                                          else f"inference-scheduler-{worker}")
+                         for worker in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, text, priority=PRIORITY_INTERACTIVE, check_slo=True, admitted=False):
+        """
+        Queue text for synthesis. Returns a Future resolving to the waveform.
+        check_slo=False skips the SLO check (e.g. warm-up). admitted=True skips
+        admission altogether, for work admit() already let in (the sentences of
+        a stream whose response has started): it is queued even over max_queue.
+
+        Raises:
+            AdmissionRejected: if the queue is full or the job would miss the SLO
+        """
+        with self._cond:
+            if not admitted:
+                self._admit(len(text), priority, check_slo)
+            job = _Job(text, priority)
+            self._push(job)
+            self._queued[text] = job
+            self._depth += 1
+            self._cond.notify()
+        return job.future
+
+    def tts(self, text, timeout=None, priority=PRIORITY_INTERACTIVE):
+        """Blocking drop-in for Synthesizer.tts."""
+        return self.submit(text, priority).result(timeout=timeout)
+
+    def admit(self, text, priority=PRIORITY_INTERACTIVE):
+        """
+        Check whether text would be admitted now, without queueing it.
+
+        Returns:
+            float: estimated seconds until it would be synthesized, or None before the first batch
+
+        Raises:
+            AdmissionRejected: as submit() would
+        """
+        with self._cond:
+            return self._admit(len(text), priority)
+
+    def promote(self, text, priority):
+        """Raise a queued job for text to priority (e.g. a listener now waits on a pre-render)"""
+        with self._cond:
+            job = self._queued.get(text)
+            if job is None or job.taken or priority >= job.priority:
+                return False
+            job.priority = priority
+            self._push(job)
+            self._cond.notify()
+            return True
+
+    def queue_depth(self):
+        with self._cond:
+            return self._depth
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "queue_depth": self._depth,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "workers": self.workers,
+                "running_batches": len(self._running),
+                "max_queue": self.max_queue,
+                "slo_seconds": self.slo_seconds,
+                "seconds_per_char": round(self.seconds_per_char, 6) if self.seconds_per_char is not None else None,
+                "batch_overhead_seconds": round(self.batch_overhead, 4) if self.batch_overhead is not None else None,
+                "rejected": dict(self.rejected),
+                "avg_queue_ms": {name: round(self.queue_seconds[name] / count * 1000, 1)
+                                 for name, count in self.queued_jobs.items() if count},
+            }
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.priority, len(job.text), next(self._seq), job))
+
+    def _peek(self):
+        """The next job to take (dropping stale heap entries), or None"""
+        while self._heap:
+            priority, _, _, job = self._heap[0]
+            if not job.taken and priority == job.priority:
+                return job
+            heapq.heappop(self._heap)
+        return None
+
+    def _take(self):
+        _, _, _, job = heapq.heappop(self._heap)
+        job.taken = True
+        self._depth -= 1
+        if self._queued.get(job.text) is job:
+            del self._queued[job.text]
+        return job
+
+    def _observe_batch(self, chars, seconds):
+        """Refit batch_overhead and seconds_per_char (weighted least squares) with a finished batch"""
+        decay = 1.0 - COST_SMOOTHING
+        w, sx, sy, sxx, sxy = (value * decay for value in self._cost_sums)
+        w, sx, sy, sxx, sxy = w + 1, sx + chars, sy + seconds, sxx + chars * chars, sxy + chars * seconds
+        self._cost_sums = (w, sx, sy, sxx, sxy)
+
+        spread = w * sxx - sx * sx
+        per_char = (w * sxy - sx * sy) / spread if spread > 1e-6 * w * sxx else None
+        if per_char is None or per_char < 0:
+            # batches too alike (or too noisy) to separate the two: charge it all per character
+            per_char = sy / sx if sx else 0.0
+        overhead = (sy - per_char * sx) / w
+        if overhead < 0:
+            overhead, per_char = 0.0, sy / sx
+        self.batch_overhead = overhead
+        self.seconds_per_char = per_char
+
+    def _estimate_wait(self, chars, priority):
+        """Seconds until a new job of chars at priority would be done, or None before the first batch"""
+        if self.seconds_per_char is None:
+            return None
+        ahead = [len(job.text) for p, length, _, job in self._heap
+                 if not job.taken and p == job.priority and (p, length) <= (priority, chars)]
+        batches = math.ceil((len(ahead) + 1) / self.max_batch_size)
+        running = 0.0
+        if len(self._running) >= self.workers:
+            # every worker is busy: the first free one starts the queue
+            now = time.monotonic()
+            running = min(max(0.0, self.batch_overhead + running_chars * self.seconds_per_char - (now - since))
+                          for running_chars, since in self._running.values())
+        queued = batches * self.batch_overhead + (sum(ahead) + chars) * self.seconds_per_char
+        return running + queued / self.workers
+
+    def _admit(self, chars, priority, check_slo=True):
+        estimate = self._estimate_wait(chars, priority)
+        if self.max_queue and self._depth >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            # room opens up when the running batch finishes
+            running = self._estimate_wait(0, -1) or 1.0
+            raise AdmissionRejected("queue_full", max(1, math.ceil(running)), estimate)
+        if (check_slo and self.slo_seconds and estimate is not None and priority < PRIORITY_PRERENDER
+                and estimate > self.slo_seconds):
+            self.rejected["slo"] += 1
+            raise AdmissionRejected("slo", max(1, math.ceil(estimate - self.slo_seconds)), estimate)
+        return estimate
+
+    def _next_batch(self, worker):
+        with self._cond:
+            while self._peek() is None:
+                self._cond.wait()
+            first = self._take()
+            batch = [first]
+            tokens = len(first.text)
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                job = self._peek()
+                if job is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    continue
+                if tokens + len(job.text) > self.max_batch_tokens:
+                    # starts the next batch instead
+                    break
+                batch.append(self._take())
+                tokens += len(job.text)
+
+            now = time.monotonic()
+            for job in batch:
+                job.future.queue_seconds = now - job.enqueued_at
+                name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+                self.queue_seconds[name] = self.queue_seconds.get(name, 0.0) + job.future.queue_seconds
+                self.queued_jobs[name] = self.queued_jobs.get(name, 0) + 1
+            self._running[worker] = (tokens, now)
+        return batch, tokens
+
+    def _loop(self, worker):
+        while True:
+            batch, tokens = self._next_batch(worker)
+            start = time.monotonic()
+            try:
+                results = self.run_batch([job.text for job in batch])
+            except Exception as e:
+                results, error = None, e
+            run_seconds = time.monotonic() - start
+
+            with self._cond:
+                del self._running[worker]
+                if results is not None:
+                    self.batches += 1
+                    self.items += len(batch)
+                    if tokens:
+                        self._observe_batch(tokens, run_seconds)
+
+            for job in batch:
+                job.future.run_seconds = run_seconds
+            if results is None:
+                for job in batch:
+                    job.future.set_exception(error)
+                continue
+            for job, result in zip(batch, results):
+                job.future.set_result(result)
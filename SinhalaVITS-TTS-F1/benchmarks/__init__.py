@@ -0,0 +1,8 @@
+"""
+Benchmarks for the API and its building blocks.
+
+Standalone scripts (bench_*.py) compare one optimization against the code
+it replaced. The suite (python -m benchmarks) runs the micro-benchmarks and
+a load test against the stub synthesizer and writes JSON that
+python -m benchmarks.compare diffs between commits.
+"""
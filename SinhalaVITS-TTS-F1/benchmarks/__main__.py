@@ -0,0 +1,41 @@
+"""
+Run the benchmark suite (micro-benchmarks, then the stub load test) and write one JSON result.
+
+Usage (from SinhalaVITS-TTS-F1/):
+    python -m benchmarks [--output benchmarks/results/$(git rev-parse --short HEAD).json]
+                         [--repeat 30] [load test options, see benchmarks/loadgen.py]
+
+Compare two results with:
+    python -m benchmarks.compare old.json new.json
+"""
+
+import argparse
+import sys
+
+from benchmarks import loadgen, micro
+from benchmarks.report import environment, write_result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    parser.add_argument("--repeat", type=int, default=30, help="micro-benchmark passes")
+    parser.add_argument("--skip-load", action="store_true")
+    loadgen.add_arguments(parser)
+    args = parser.parse_args()
+
+    result = {"environment": environment()}
+    # The load test first: its in-process server configures app.py before the
+    # micro-benchmarks import it
+    if not args.skip_load:
+        print("Running load test...", file=sys.stderr)
+        result["load"] = loadgen.run(args)
+        result["load"]["config"].pop("repeat", None)
+        result["load"]["config"].pop("skip_load", None)
+    print("Running micro-benchmarks...", file=sys.stderr)
+    result["micro"] = micro.run(args.repeat)
+    write_result(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Health/news latency while synthesis is saturated: gunicorn + Flask vs uvicorn + FastAPI.
+
+Each server runs as a subprocess on the stub synthesizer (INFERENCE_BACKEND=stub,
+--stub-base-ms per call, roughly a CPU forward pass) with the news feed
+reading the saved Ada Derana fixture from a local server. A prober sends
+GET /api/health and GET /api/fetch-news every --probe-interval seconds,
+first with the server idle, then while --synth-clients threads keep
+POSTing new (uncached) texts to /api/synthesize. With sync gunicorn
+workers the probes queue behind synthesis; the ASGI app should answer
+them at close to its idle latency.
+
+Usage:
+    python -m benchmarks.bench_asgi [--servers flask asgi] [--duration 20] [--synth-clients 8]
+                                    [--stub-base-ms 800] [--gunicorn-args "--workers 2"]
+                                    [--uvicorn-args "--workers 2"] [--output asgi.json]
+"""
+
+import argparse
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_crawler import make_handler  # noqa: E402
+from benchmarks.report import environment, load_headlines, read_fixture, summarize, write_result  # noqa: E402
+
+PROBES = {"health": "/api/health", "fetch_news": "/api/fetch-news"}
+
+
+def server_command(name, port, args):
+    if name == "flask":
+        return [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+                *shlex.split(args.gunicorn_args)]
+    return [sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", *shlex.split(args.uvicorn_args)]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name, args, news_url, log):
+    """
+    Start one server on the stub synthesizer and wait until it is ready.
+
+    Returns:
+        tuple: (base URL, Popen, store TemporaryDirectory)
+    """
+    store_dir = tempfile.TemporaryDirectory(prefix=f"bench-asgi-{name}-")
+    env = dict(os.environ)
+    env.update({
+        "INFERENCE_BACKEND": "stub",
+        "STUB_BASE_MS": str(args.stub_base_ms),
+        "STUB_MS_PER_CHAR": str(args.stub_ms_per_char),
+        "AUDIO_STORE_DIR": store_dir.name,
+        "PRERENDER_ENABLED": "0",
+        "MODEL_EAGER_LOAD": "1",
+        "NEWS_URL": news_url,
+    })
+    env.pop("REDIS_URL", None)
+
+    port = free_port()
+    process = subprocess.Popen(server_command(name, port, args), cwd=ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+
+    # Every worker must have loaded (and warmed up) the stub; require a run of ready answers
+    deadline = time.monotonic() + 120
+    ready_in_a_row = 0
+    while ready_in_a_row < 10:
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            store_dir.cleanup()
+            raise SystemExit(f"{name} server did not become ready; see {log.name}")
+        try:
+            ready = requests.get(f"{base_url}/api/health/ready", timeout=5).status_code == 200
+        except requests.RequestException:
+            ready = False
+        ready_in_a_row = ready_in_a_row + 1 if ready else 0
+        time.sleep(0.1 if ready else 0.5)
+    # let the first news refresh land
+    requests.get(f"{base_url}/api/fetch-news", timeout=30)
+    return base_url, process, store_dir
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def probe(base_url, stop, interval, latencies, errors, timeout):
+    """GET each probe path in turn every interval seconds until stop is set"""
+    session = requests.Session()
+    while not stop.is_set():
+        for kind, path in PROBES.items():
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"{base_url}{path}", timeout=timeout).status_code == 200
+            except requests.RequestException:
+                ok = False
+            latencies[kind].append(time.perf_counter() - start)
+            if not ok:
+                errors[kind] += 1
+        stop.wait(interval)
+
+
+def synthesize_loop(base_url, stop, texts, latencies, errors, timeout):
+    """POST new texts back to back until stop is set"""
+    session = requests.Session()
+    for text in texts:
+        if stop.is_set():
+            return
+        start = time.perf_counter()
+        try:
+            ok = session.post(f"{base_url}/api/synthesize", json={"text": text}, timeout=timeout).status_code == 200
+        except requests.RequestException:
+            ok = False
+        latencies["synthesize"].append(time.perf_counter() - start)
+        if not ok:
+            errors["synthesize"] += 1
+
+
+def new_texts(headlines, rng, client):
+    """Endless texts no server has seen: two headlines plus a per-run nonce"""
+    nonce = random.SystemRandom().randrange(10 ** 6)
+    i = 0
+    while True:
+        first, second = rng.sample(headlines, 2)
+        yield f"{first}. {second} {nonce:06d}-{client}-{i}"
+        i += 1
+
+
+def run_phase(base_url, seconds, synth_clients, args, headlines, rng):
+    """Probe for seconds with synth_clients synthesizing; returns per kind summaries"""
+    stop = threading.Event()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    threads = [threading.Thread(target=probe, args=(base_url, stop, args.probe_interval, latencies, errors,
+                                                    args.timeout))]
+    threads += [threading.Thread(target=synthesize_loop,
+                                 args=(base_url, stop, new_texts(headlines, rng, client), latencies, errors,
+                                       args.timeout))
+                for client in range(synth_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    result = {}
+    for kind, seconds_list in sorted(latencies.items()):
+        result[kind] = summarize(seconds_list)
+        result[kind]["errors"] = errors[kind]
+    if synth_clients:
+        completed = len(latencies["synthesize"]) - errors["synthesize"]
+        result["throughput_rps"] = round(completed / wall, 2)
+    return result
+
+
+def bench_server(name, args, news_url, headlines):
+    rng = random.Random(args.seed)
+    with tempfile.NamedTemporaryFile("w", prefix=f"bench-asgi-{name}-", suffix=".log", delete=False) as log:
+        print(f"Starting {name} server (log: {log.name})...", file=sys.stderr)
+        base_url, process, store_dir = start_server(name, args, news_url, log)
+        try:
+            print(f"  idle for {args.idle_seconds}s", file=sys.stderr)
+            idle = run_phase(base_url, args.idle_seconds, 0, args, headlines, rng)
+            print(f"  saturated for {args.duration}s ({args.synth_clients} synthesis clients)", file=sys.stderr)
+            saturated = run_phase(base_url, args.duration, args.synth_clients, args, headlines, rng)
+        finally:
+            stop_server(process)
+            store_dir.cleanup()
+    return {"command": " ".join(server_command(name, 0, args)[1:]), "idle": idle, "saturated": saturated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--servers", nargs="+", default=["flask", "asgi"], choices=["flask", "asgi"])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of saturated synthesis")
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--synth-clients", type=int, default=8)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--stub-base-ms", type=float, default=800.0)
+    parser.add_argument("--stub-ms-per-char", type=float, default=1.0)
+    parser.add_argument("--gunicorn-args", default="--workers 2 --timeout 120",
+                        help="extra gunicorn arguments (default: 2 sync workers)")
+    parser.add_argument("--uvicorn-args", default="--workers 2", help="extra uvicorn arguments")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    headlines = load_headlines()
+    news_server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        make_handler({"/sinhala-hot-news.php": read_fixture("adaderana_hot_news.html")}, 0, 0, defaultdict(int))
+    )
+    threading.Thread(target=news_server.serve_forever, daemon=True).start()
+    news_url = f"http://127.0.0.1:{news_server.server_address[1]}/sinhala-hot-news.php"
+
+    servers = {}
+    try:
+        for name in args.servers:
+            servers[name] = bench_server(name, args, news_url, headlines)
+    finally:
+        news_server.shutdown()
+
+    print(f"\n{'server':<8}{'phase':<11}{'health p50':>12}{'p99':>10}{'news p50':>12}{'p99':>10}"
+          f"{'synth/s':>9}", file=sys.stderr)
+    for name, result in servers.items():
+        for phase in ("idle", "saturated"):
+            summary = result[phase]
+            print(f"{name:<8}{phase:<11}"
+                  f"{summary['health']['p50_ms']:10.1f}ms{summary['health']['p99_ms']:8.1f}ms"
+                  f"{summary['fetch_news']['p50_ms']:10.1f}ms{summary['fetch_news']['p99_ms']:8.1f}ms"
+                  f"{summary.get('throughput_rps', 0):9.2f}", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_result({"environment": environment(), "servers": servers, "config": config}, args.output)
+
+
+if __name__ == "__main__":
+    main()
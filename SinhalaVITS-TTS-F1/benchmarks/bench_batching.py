@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Throughput/latency benchmark: per-request synth.tts vs the micro-batching scheduler.
+
+Needs the model files (see download_model.sh).
+
+Usage:
+    python benchmarks/bench_batching.py [--requests 64] [--concurrency 16]
+                                        [--max-batch 8] [--max-wait-ms 10]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.report import percentile  # noqa: E402
+from romanizer import sinhala_to_roman  # noqa: E402
+from batch_scheduler import InferenceScheduler, VitsBatchRunner  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "adaderana_headlines.txt")
+
+
+def drive(tts, texts, concurrency):
+    """Fire texts at tts from concurrency threads; return (wall seconds, latencies)."""
+    latencies = []
+
+    def one(text):
+        start = time.perf_counter()
+        tts(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, texts))
+    return time.perf_counter() - start, latencies
+
+
+def report(name, wall, latencies):
+    print(f"{name:<12} {len(latencies) / wall:8.2f} req/s   "
+          f"p50 {percentile(latencies, 50) * 1e3:8.1f} ms   "
+          f"p95 {percentile(latencies, 95) * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "Nipunika_210000.pth"))
+    parser.add_argument("--config", default=os.path.join(ROOT, "Nipunika_config.json"))
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model) or not os.path.exists(args.config):
+        raise SystemExit("Model files not found - run download_model.sh first")
+
+    import torch
+    from TTS.utils.synthesizer import Synthesizer
+
+    synth = Synthesizer(tts_checkpoint=args.model, tts_config_path=args.config,
+                        use_cuda=torch.cuda.is_available())
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        headlines = [sinhala_to_roman(line.strip()) for line in f if line.strip()]
+    texts = (headlines * (args.requests // len(headlines) + 1))[:args.requests]
+
+    # warm-up so neither path pays first-inference allocations
+    synth.tts(texts[0])
+
+    lock = threading.Lock()
+
+    def per_request(text):
+        with lock:
+            return synth.tts(text)
+
+    scheduler = InferenceScheduler(VitsBatchRunner(synth).tts_batch,
+                                   max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"max batch {args.max_batch}, max wait {args.max_wait_ms} ms")
+    report("per-request", *drive(per_request, texts, args.concurrency))
+    report("batched", *drive(scheduler.tts, texts, args.concurrency))
+    print(f"scheduler: {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Cold start: loading the training checkpoint vs the inference-only snapshot (model_snapshot.py).
+
+Needs the model files (see download_model.sh), or --random-weights for a
+randomly initialised checkpoint of the same architecture (which has no
+optimizer state, so it understates the checkpoint's load cost).
+
+The snapshot is written to a temp directory first. Each run is a fresh
+process that loads the model one way and reports the load time, resident
+memory before and after loading, the peak while loading (sampled) and the
+first synthesis. With --drop-caches (root, Linux) the page cache is dropped
+before every run, as on a new container; otherwise the files are read from
+memory.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 3] [--drop-caches] [--random-weights]
+                                          [--output cold_start.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, percentile, write_result  # noqa: E402
+
+SOURCES = ("checkpoint", "snapshot")
+FIRST_TEXT = "ayubowan. sri lankawe arthika pratisanskarana."
+
+
+def drop_caches():
+    subprocess.run(["sync"], check=True)
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def peak_rss_during(fn, interval=0.002):
+    """
+    Run fn, sampling this process's RSS meanwhile (the kernel's peak also
+    covers the imports, which outweigh the load).
+
+    Returns:
+        tuple: (fn's result, peak RSS in bytes)
+    """
+    from metrics import resident_memory_bytes
+
+    done = threading.Event()
+    peak = [resident_memory_bytes()[0] or 0]
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], resident_memory_bytes()[0] or 0)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = fn()
+    finally:
+        done.set()
+        sampler.join()
+    return result, max(peak[0], resident_memory_bytes()[0] or 0)
+
+
+def child(args):
+    """Load the model from args.child's file in this fresh process; writes a JSON result to args.out"""
+    from metrics import resident_memory_bytes
+
+    start = time.perf_counter()
+    import torch  # noqa: F401
+    from TTS.utils.synthesizer import Synthesizer
+    import model_snapshot
+    imported = time.perf_counter()
+
+    rss_imported, peak_imported = resident_memory_bytes()
+    if args.child == "snapshot":
+        synth, peak_loading = peak_rss_during(lambda: model_snapshot.load_snapshot(args.snapshot, args.config))
+    else:
+        synth, peak_loading = peak_rss_during(lambda: Synthesizer(tts_checkpoint=args.model,
+                                                                  tts_config_path=args.config, use_cuda=False))
+    loaded = time.perf_counter()
+    rss_loaded, _ = resident_memory_bytes()
+
+    synth.tts(FIRST_TEXT)
+    first = time.perf_counter()
+    rss, peak = resident_memory_bytes()
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "import_seconds": imported - start,
+            "load_seconds": loaded - imported,
+            "first_synthesis_seconds": first - loaded,
+            "rss_imported_mb": rss_imported / (1024 * 1024) if rss_imported else None,
+            "peak_imported_mb": peak_imported / (1024 * 1024),
+            "rss_loaded_mb": rss_loaded / (1024 * 1024) if rss_loaded else None,
+            "peak_loading_mb": peak_loading / (1024 * 1024) if peak_loading else None,
+            "rss_mb": rss / (1024 * 1024) if rss else None,
+            "peak_mb": peak / (1024 * 1024),
+        }, f)
+
+
+def run_source(source, args, model_path, snapshot_path, workdir):
+    """Median of args.runs fresh-process loads of source"""
+    out = os.path.join(workdir, f"{source}.json")
+    command = [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", source, "--out", out,
+               "--model", model_path, "--snapshot", snapshot_path, "--config", args.config]
+    runs = []
+    for _ in range(args.runs):
+        if args.drop_caches:
+            drop_caches()
+        # the synthesizer logs to stdout
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        with open(out) as f:
+            runs.append(json.load(f))
+    result = {key: round(percentile([run[key] for run in runs], 50), 3)
+              for key in runs[0] if runs[0][key] is not None}
+    result["runs"] = len(runs)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "Nipunika_210000.pth"))
+    parser.add_argument("--config", default=os.path.join(ROOT, "Nipunika_config.json"))
+    parser.add_argument("--random-weights", action="store_true",
+                        help="benchmark a randomly initialised model instead of --model")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--drop-caches", action="store_true", help="drop the page cache before each run (root)")
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    parser.add_argument("--child", choices=SOURCES, help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    if not os.path.exists(args.config) or not (args.random_weights or os.path.exists(args.model)):
+        raise SystemExit("Model files not found - run download_model.sh first (or pass --random-weights)")
+
+    with tempfile.TemporaryDirectory(prefix="bench-cold-start-") as workdir:
+        model_path = args.model
+        if args.random_weights:
+            from benchmarks.bench_replicas import random_checkpoint
+
+            model_path = os.path.join(workdir, "random.pth")
+            print("Building a random-weights checkpoint...", file=sys.stderr)
+            random_checkpoint(args.config, model_path)
+
+        from model_snapshot import write_snapshot
+
+        print("Writing the snapshot...", file=sys.stderr)
+        snapshot_path = os.path.join(workdir, "model.snapshot.pt")
+        start = time.perf_counter()
+        sizes = write_snapshot(model_path, args.config, snapshot_path)
+        sizes["write_seconds"] = round(time.perf_counter() - start, 2)
+
+        results = {}
+        for source in SOURCES:
+            print(f"Loading from the {source} ({args.runs} runs)...", file=sys.stderr)
+            results[source] = run_source(source, args, model_path, snapshot_path, workdir)
+
+    print(f"\n{'':<12}{'file MB':>9}{'import s':>10}{'load s':>8}{'first s':>9}"
+          f"{'RSS before':>12}{'peak loading':>14}{'RSS loaded':>12}", file=sys.stderr)
+    for source in SOURCES:
+        result = results[source]
+        print(f"{source:<12}{sizes[source + '_mb']:9.0f}{result['import_seconds']:10.2f}"
+              f"{result['load_seconds']:8.2f}{result['first_synthesis_seconds']:9.2f}"
+              f"{result.get('rss_imported_mb', 0):9.0f} MB{result.get('peak_loading_mb', 0):11.0f} MB"
+              f"{result.get('rss_loaded_mb', 0):9.0f} MB", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "child", "snapshot", "out")}
+    write_result({"environment": environment(), "files": sizes, "sources": results, "config": config},
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Crawl benchmark against a local stub of Ada Derana serving the saved fixtures.
+
+The stub serves the hot news fixture as the section page and the article
+fixture for every news.php?nid=... link, with ETags, optional added latency
+and optional transient 503s. Compares fetching every article one at a time
+over a requests session with the async crawler, cold and then warm (304s).
+
+Usage:
+    python benchmarks/bench_crawler.py [--latency-ms 50] [--per-host 8] [--fail-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_scraper import create_session, parse_adaderana_html  # noqa: E402
+from news_crawler import NewsCrawler, parse_article_html  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def make_handler(pages, latency, fail_rate, counts):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            body = pages.get(path)
+            time.sleep(latency)
+            counts["requests"] += 1
+            if body is None:
+                self.send_error(404)
+                return
+            if random.random() < fail_rate:
+                counts["failures"] += 1
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag:
+                counts["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def sequential(base_url):
+    """Section page then each article, one request at a time."""
+    session = create_session()
+    response = session.get(f"{base_url}/sinhala-hot-news.php", timeout=15)
+    items = parse_adaderana_html(response.content, base_url=base_url)
+    for item in items:
+        body = parse_article_html(session.get(item["link"], timeout=15).content)
+        if body:
+            item["body"] = body
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    pages = {
+        "/sinhala-hot-news.php": read_fixture("adaderana_hot_news.html"),
+        "/news.php": read_fixture("adaderana_article.html"),
+    }
+    counts = {"requests": 0, "failures": 0, "not_modified": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 make_handler(pages, args.latency_ms / 1000.0, args.fail_rate, counts))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    section = f"{base_url}/sinhala-hot-news.php"
+
+    print(f"stub at {base_url}, latency {args.latency_ms} ms, fail rate {args.fail_rate}, "
+          f"per-host limit {args.per_host}")
+
+    if args.fail_rate == 0:
+        start = time.perf_counter()
+        items = sequential(base_url)
+        print(f"sequential : {time.perf_counter() - start:7.3f} s  {len(items)} items")
+
+    crawler = NewsCrawler(sections=[section], base_url=base_url,
+                          per_host_limit=args.per_host, backoff=0.05)
+
+    async def run(label):
+        start = time.perf_counter()
+        first = None
+        items = []
+        async for item in crawler.crawl():
+            if first is None:
+                first = time.perf_counter() - start
+            items.append(item)
+        elapsed = time.perf_counter() - start
+        with_body = sum(1 for item in items if item.get("body"))
+        print(f"{label:<11}: {elapsed:7.3f} s  {len(items)} items ({with_body} with body), "
+              f"first item after {first * 1e3:.1f} ms")
+
+    async def both():
+        await run("async cold")
+        await run("async warm")
+        await crawler.close()
+
+    asyncio.run(both())
+    print(f"crawler: {crawler.stats()}")
+    print(f"stub: {counts}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
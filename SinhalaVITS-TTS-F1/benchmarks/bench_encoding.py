@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Output size and encode time per format/quality tier, plus encoder pool throughput.
+
+Uses the WAV files given on the command line (e.g. saved /api/synthesize
+responses); without any, a 6 s speech-like test signal at 22.05 kHz.
+
+Usage:
+    python benchmarks/bench_encoding.py [--repeat 5] [--workers 2] [clip.wav ...]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_encoding import QUALITY_TIERS, EncoderPool, encode_audio, negotiate_format  # noqa: E402
+
+
+def test_signal(seconds=6.0, rate=22050):
+    """Voiced harmonics under a syllable-rate envelope with short pauses."""
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 140 + 25 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.4 * t) > -0.6)
+    noise = np.random.default_rng(0).normal(0, 0.02, len(t))
+    wav = (voiced * envelope * 0.2 + noise).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, wav, rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=32, help="encodes for the pool throughput run")
+    parser.add_argument("wavs", nargs="*")
+    args = parser.parse_args()
+
+    clips = []
+    for path in args.wavs:
+        with open(path, "rb") as f:
+            clips.append(f.read())
+    if not clips:
+        clips = [test_signal()]
+    seconds = sum(sf.info(io.BytesIO(clip)).duration for clip in clips)
+    wav_bytes = sum(len(clip) for clip in clips)
+
+    print(f"{len(clips)} clip(s), {seconds:.1f} s of audio, {wav_bytes / 1024:.1f} KiB as WAV")
+    print(f"{'format':<16} {'KiB':>8} {'kbps':>7} {'ratio':>7} {'ms/clip':>9} {'x realtime':>11}")
+
+    formats = [negotiate_format(requested=codec, quality=tier)
+               for codec in QUALITY_TIERS for tier in QUALITY_TIERS[codec]]
+    for fmt in formats:
+        encode_audio(clips[0], fmt)  # warm
+        best = float("inf")
+        size = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = sum(len(encode_audio(clip, fmt)) for clip in clips)
+            best = min(best, time.perf_counter() - start)
+        print(f"{fmt.key:<16} {size / 1024:8.1f} {size * 8 / seconds / 1000:7.1f} "
+              f"{wav_bytes / size:7.1f} {best / len(clips) * 1e3:9.1f} {seconds / best:11.0f}")
+
+    pool = EncoderPool(max_workers=args.workers)
+    fmt = negotiate_format(requested="opus")
+    jobs = [clips[i % len(clips)] for i in range(args.jobs)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers * 4) as clients:
+        list(clients.map(lambda clip: pool.encode(clip, fmt), jobs))
+    elapsed = time.perf_counter() - start
+    print(f"pool ({args.workers} workers, {fmt.key}): {args.jobs / elapsed:.1f} encodes/s")
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
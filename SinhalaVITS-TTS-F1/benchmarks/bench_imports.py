@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Import time of the API modules, and a guard against heavy imports creeping back in.
+
+Each run is a fresh `python -X importtime -c "import <module>"` configured
+as a news/health process (SYNTHESIS_ENABLED=0, the stub backend, no eager
+model load). The report gives the module's cumulative import time (median
+of --runs) and the packages that account for most of it. The exit status
+is 1 if any run imports one of the --forbid packages (torch and TTS by
+default: only the synthesis backend may pull them in) or the median
+exceeds --max-ms.
+
+Usage:
+    python -m benchmarks.bench_imports [--modules app asgi_app] [--runs 5] [--max-ms 1500]
+                                       [--forbid torch TTS ...] [--output imports.json]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, percentile, write_result  # noqa: E402
+
+FORBIDDEN = ("torch", "TTS", "transformers", "onnxruntime", "librosa", "scipy")
+NEWS_ONLY_ENV = {
+    "SYNTHESIS_ENABLED": "0",
+    "INFERENCE_BACKEND": "stub",
+    "MODEL_EAGER_LOAD": "0",
+    "PRERENDER_ENABLED": "0",
+}
+
+
+def parse_importtime(stderr):
+    """[(name, self us, cumulative us, depth)] from -X importtime output, in import order"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped.lstrip("- ").strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def import_once(module):
+    """One fresh-process import of module; returns its parsed -X importtime output"""
+    env = dict(os.environ, **NEWS_ONLY_ENV)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def run_module(module, args):
+    totals = []
+    packages = {}
+    forbidden = set()
+    for _ in range(args.runs):
+        imports = import_once(module)
+        modules = len(imports)
+        totals.append(next(cumulative for name, _, cumulative, depth in imports
+                           if name == module and depth == 0))
+        for name, self_us, _, _ in imports:
+            package = name.split(".", 1)[0]
+            packages.setdefault(package, []).append(self_us)
+            if package in args.forbid:
+                forbidden.add(package)
+
+    # packages by their mean self time per run
+    runs = len(totals)
+    heaviest = sorted(((package, sum(times) / runs) for package, times in packages.items()),
+                      key=lambda item: -item[1])[:args.top]
+    return {
+        "import_ms": round(percentile(totals, 50) / 1000.0, 1),
+        "import_ms_min": round(min(totals) / 1000.0, 1),
+        "modules": modules,
+        "heaviest_packages_ms": {package: round(us / 1000.0, 1) for package, us in heaviest},
+        "forbidden_imports": sorted(forbidden),
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["app", "asgi_app"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to report")
+    parser.add_argument("--max-ms", type=float, default=1500.0,
+                        help="fail if a module's median import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=list(FORBIDDEN),
+                        help="packages a news/health process must not import")
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for module in args.modules:
+        print(f"Importing {module} ({args.runs} runs)...", file=sys.stderr)
+        result = results[module] = run_module(module, args)
+        if result["forbidden_imports"]:
+            failures.append(f"{module} imports {', '.join(result['forbidden_imports'])}")
+        if result["import_ms"] > args.max_ms:
+            failures.append(f"{module} takes {result['import_ms']:.0f} ms to import (limit {args.max_ms:.0f} ms)")
+
+    print(f"\n{'module':<12}{'import ms':>11}{'modules':>9}  heaviest packages (ms)", file=sys.stderr)
+    for module, result in results.items():
+        heaviest = ", ".join(f"{package} {ms:.0f}" for package, ms in list(result["heaviest_packages_ms"].items())[:4])
+        print(f"{module:<12}{result['import_ms']:11.0f}{result['modules']:9}  {heaviest}", file=sys.stderr)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_result({"environment": environment(), "imports": results, "config": config}, args.output)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
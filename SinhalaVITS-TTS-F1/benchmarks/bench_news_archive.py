@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+News archive (news_archive.py): query latency with --items stored items.
+
+Fills an archive with synthetic items: titles and bodies are drawn, Zipf
+distributed, from the headline fixture's words and then made-up ones (the
+long tail of names and places); timestamps are a few minutes apart, with a
+random category and ~3% breaking, the way the real feed spreads them. The
+archive is kept at --db and reused by later runs with the same --items.
+
+Each query runs --repeat times, at random depths where it takes a cursor:
+the first and a deep page of the listing (with the OFFSET query it
+replaces, for comparison), category and breaking filters, search for a
+word in 10%, one in 1% and a rare one, a two-word search, a lookup by id, and
+an upsert of one scrape's worth of items. The query plans are reported
+alongside, to check that each one uses its index.
+
+Usage:
+    python -m benchmarks.bench_news_archive [--items 1000000] [--db /tmp/news_archive_1000000.db]
+                                            [--repeat 50] [--output news_archive.json]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, load_headlines, summarize, write_result  # noqa: E402
+from news_archive import COLUMNS, NewsArchive  # noqa: E402
+
+CATEGORIES = ["උණුසුම් පුවත්", "රජය", "ව්‍යාපාරික", "ක්‍රීඩා", "කලා", "තාක්ෂණ"]
+CATEGORY_WEIGHTS = [50, 20, 12, 10, 5, 3]
+START = datetime(2015, 1, 1)
+BATCH = 10000
+SCRAPE_SIZE = 30
+
+
+def vocabulary(size):
+    """
+    size words and their Zipf cumulative weights: the fixture's words first
+    (the common ones), then made-up words from Sinhala syllables for the long
+    tail of names and places a real archive has
+    """
+    words = sorted({word for headline in load_headlines() for word in headline.split()})
+    consonants = [chr(c) for c in range(0x0D9A, 0x0DC7) if chr(c).isalpha()]
+    vowel_signs = ["", "\u0dcf", "\u0dd2", "\u0dd4", "\u0dd9", "\u0ddc"]
+    syllables = [consonant + sign for consonant in consonants for sign in vowel_signs]
+    seen = set(words)
+    n = 0
+    while len(words) < size:
+        word = "".join(syllables[(n // len(syllables) ** i) % len(syllables)] for i in range(3))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+        n += 7919
+    cumulative = list(itertools.accumulate(1.0 / rank for rank in range(1, size + 1)))
+    return words[:size], cumulative
+
+
+def synthetic_items(start_id, count, vocab, rng, body_words):
+    """count items with ids from start_id, timestamps a few minutes apart"""
+    words, cumulative = vocab
+    items = []
+    for item_id in range(start_id, start_id + count):
+        title = " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 10)))
+        items.append({
+            "id": item_id,
+            "title": title,
+            "link": f"https://sinhala.adaderana.lk/news.php?nid={item_id}",
+            "time": "",
+            "timestamp": (START + timedelta(seconds=item_id * 270 + rng.randint(0, 120))).isoformat(),
+            "category": rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            "isBreaking": rng.random() < 0.03,
+            "body": " ".join(rng.choices(words, cum_weights=cumulative, k=body_words)) if body_words else None,
+            "text": title,
+        })
+    return items
+
+
+def fill(archive, count, vocab, body_words, seed):
+    """Upsert count synthetic items in batches; returns seconds taken"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for batch_start in range(1, count + 1, BATCH):
+        archive.upsert(synthetic_items(batch_start, min(BATCH, count + 1 - batch_start), vocab, rng, body_words))
+        done = min(batch_start + BATCH - 1, count)
+        if done % (BATCH * 20) == 0 or done == count:
+            print(f"  {done} items ({time.perf_counter() - start:.0f}s)", file=sys.stderr)
+    return time.perf_counter() - start
+
+
+def search_terms(archive, items):
+    """Indexed words (with their document counts) in about 10%, 1% and 0.001% of items"""
+    connection = archive._connection()
+    connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.news_terms USING fts5vocab(main, news_fts, row)")
+    rows = connection.execute("SELECT term, doc FROM temp.news_terms WHERE length(term) > 2").fetchall()
+    return {name: min(rows, key=lambda row: abs(row[1] - max(1, items * share)))
+            for name, share in (("common", 0.1), ("one_percent", 0.01), ("rare", 0.00001))}
+
+
+def cursor_at(archive, depth, category=None):
+    """The cursor that starts the listing (of category) at depth items in"""
+    connection = archive._connection()
+    if category:
+        row = connection.execute("SELECT position FROM news WHERE category = ? "
+                                 "ORDER BY position DESC LIMIT 1 OFFSET ?", (category, depth)).fetchone()
+    else:
+        row = connection.execute("SELECT position FROM news ORDER BY position DESC LIMIT 1 OFFSET ?",
+                                 (depth,)).fetchone()
+    return str(row[0])
+
+
+def timed(fn, repeat, prepare=None):
+    seconds = []
+    for _ in range(repeat):
+        arg = prepare() if prepare else None
+        start = time.perf_counter()
+        fn(arg)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def query_plan(archive, sql, params):
+    return [row[3] for row in archive._connection().execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--db", help="archive to build or reuse (default: /tmp/news_archive_<items>.db)")
+    parser.add_argument("--body-words", type=int, default=40, help="words per synthetic body (0 for none)")
+    parser.add_argument("--vocabulary", type=int, default=50000, help="distinct words in the synthetic text")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join("/tmp", f"news_archive_{args.items}.db")
+    archive = NewsArchive(path)
+    stored = archive.stats()["items"]
+    build = None
+    if stored != args.items:
+        if stored:
+            raise SystemExit(f"{path} holds {stored} items, not {args.items}; pass another --db")
+        print(f"Filling {path} with {args.items} items...", file=sys.stderr)
+        build = {"seconds": round(fill(archive, args.items, vocabulary(args.vocabulary), args.body_words, args.seed), 1)}
+        archive._connection().execute("ANALYZE")
+        archive._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_mb = round(os.path.getsize(path) / (1024 * 1024), 1)
+
+    rng = random.Random(args.seed)
+    limit = args.page_size
+    terms = search_terms(archive, args.items)
+    category = CATEGORIES[2]
+    deep_cursors = [cursor_at(archive, rng.randrange(args.items // 2, args.items - limit)) for _ in range(10)]
+    category_cursors = [cursor_at(archive, rng.randrange(args.items // 20), category) for _ in range(10)]
+    next_id = [args.items + 1]
+
+    def scrape(_):
+        # half the page already archived, half new
+        known = [{**item, "title": item["title"] + " (updated)"}
+                 for item in archive.page(limit=SCRAPE_SIZE // 2)[0]]
+        archive.upsert(known + synthetic_items(next_id[0], SCRAPE_SIZE // 2, (["නව", "පුවත"], [1.0, 2.0]), rng, 0))
+        next_id[0] += SCRAPE_SIZE // 2
+
+    def offset_page(depth):
+        archive._connection().execute(f"SELECT {COLUMNS} FROM news ORDER BY news.position DESC LIMIT ? OFFSET ?",
+                                      (limit, depth)).fetchall()
+
+    cases = {
+        "latest_page": (lambda _: archive.page(limit), None),
+        "deep_page_keyset": (lambda cursor: archive.page(limit, cursor=cursor),
+                             lambda: rng.choice(deep_cursors)),
+        "deep_page_offset": (offset_page, lambda: rng.randrange(args.items // 2, args.items - limit)),
+        "category_page": (lambda _: archive.page(limit, category=category), None),
+        "category_deep_page": (lambda cursor: archive.page(limit, cursor=cursor, category=category),
+                               lambda: rng.choice(category_cursors)),
+        "breaking_page": (lambda _: archive.page(limit, breaking=True), None),
+        "search_common": (lambda _: archive.page(limit, query=terms["common"][0]), None),
+        "search_one_percent": (lambda _: archive.page(limit, query=terms["one_percent"][0]), None),
+        "search_rare": (lambda _: archive.page(limit, query=terms["rare"][0]), None),
+        "search_two_words": (lambda _: archive.page(limit, query=f"{terms['common'][0]} {terms['one_percent'][0]}"),
+                             None),
+        "search_category": (lambda _: archive.page(limit, query=terms["one_percent"][0], category=category), None),
+        "get_by_id": (lambda item_id: archive.get(item_id), lambda: rng.randint(1, args.items)),
+        "upsert_scrape": (scrape, None),
+    }
+
+    results = {}
+    for name, (fn, prepare) in cases.items():
+        print(f"Running {name}...", file=sys.stderr)
+        fn(prepare() if prepare else None)
+        results[name] = summarize(timed(fn, args.repeat, prepare))
+
+    # the archive is reused by the next run: drop the scraped items
+    with archive._connection() as connection:
+        connection.execute("BEGIN")
+        connection.execute("DELETE FROM news WHERE id > ?", (args.items,))
+
+    plans = {
+        "listing": query_plan(archive, "SELECT id FROM news WHERE position < ? ORDER BY position DESC LIMIT 21", (0,)),
+        "category": query_plan(archive, "SELECT id FROM news WHERE category = ? AND position < ? "
+                                        "ORDER BY position DESC LIMIT 21", (category, 0)),
+        "breaking": query_plan(archive, "SELECT id FROM news WHERE is_breaking = 1 "
+                                        "ORDER BY position DESC LIMIT 21", ()),
+        "search": query_plan(archive, "SELECT news.id FROM news_fts JOIN news ON news.position = news_fts.rowid "
+                                      "WHERE news_fts MATCH ? AND news_fts.rowid < ? "
+                                      "ORDER BY news_fts.rowid DESC LIMIT 21", ('"x"*', 0)),
+    }
+
+    print(f"\n{args.items} items, {size_mb} MB; search terms (documents): "
+          + ", ".join(f"{kind} {term} ({docs})" for kind, (term, docs) in terms.items()), file=sys.stderr)
+    print(f"{'query':<22}{'p50 ms':>9}{'p99 ms':>9}", file=sys.stderr)
+    for name, result in results.items():
+        print(f"{name:<22}{result['p50_ms']:9.2f}{result['p99_ms']:9.2f}", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    config["db"] = path
+    write_result({
+        "environment": environment(),
+        "archive": {"items": args.items, "size_mb": size_mb, "build": build,
+                    "search_terms": {kind: {"term": term, "documents": docs} for kind, (term, docs) in terms.items()}},
+        "queries": results,
+        "plans": plans,
+        "config": config,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
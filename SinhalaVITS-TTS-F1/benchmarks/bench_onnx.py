@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime vs PyTorch backend: waveform parity check, then latency and throughput.
+
+Needs the model files (see download_model.sh) and an export made with
+`python onnx_backend.py`.
+
+Parity runs both backends with the noise scales set to 0, so synthesis is
+deterministic, and checks the cosine similarity of the waveforms per headline.
+Exits non-zero if any headline falls below --min-similarity.
+
+Usage:
+    python benchmarks/bench_onnx.py [--requests 40] [--intra-op 0] [--inter-op 0]
+                                    [--min-similarity 0.98] [--skip-parity]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.report import cosine_similarity, percentile  # noqa: E402
+from romanizer import sinhala_to_roman  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "adaderana_headlines.txt")
+
+
+def parity(torch_synth, onnx_synth, texts, min_similarity):
+    model = torch_synth.tts_model
+    saved = (model.inference_noise_scale, model.inference_noise_scale_dp)
+    saved_scales = onnx_synth.scales.copy()
+    model.inference_noise_scale = model.inference_noise_scale_dp = 0.0
+    onnx_synth.scales[0] = onnx_synth.scales[2] = 0.0
+    try:
+        worst = 1.0
+        failures = 0
+        for text in texts:
+            reference = torch_synth.tts(text)
+            candidate = onnx_synth.tts(text)
+            similarity = cosine_similarity(reference, candidate)
+            length_ratio = len(candidate) / max(1, len(reference))
+            worst = min(worst, similarity)
+            if similarity < min_similarity:
+                failures += 1
+                print(f"  below threshold: similarity {similarity:.4f}, length ratio {length_ratio:.3f}: {text[:40]}")
+        print(f"parity: {len(texts)} texts, worst cosine similarity {worst:.4f}, "
+              f"{failures} below {min_similarity}")
+        return failures == 0
+    finally:
+        model.inference_noise_scale, model.inference_noise_scale_dp = saved
+        onnx_synth.scales[:] = saved_scales
+
+
+def measure(name, synth, texts, sample_rate):
+    synth.tts(texts[0])  # warm-up
+    latencies = []
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    for text in texts:
+        item_start = time.perf_counter()
+        wav = synth.tts(text)
+        latencies.append(time.perf_counter() - item_start)
+        audio_seconds += len(wav) / float(sample_rate)
+    wall = time.perf_counter() - start
+    print(f"{name:<8} {len(texts) / wall:7.2f} req/s   "
+          f"p50 {percentile(latencies, 50) * 1e3:8.1f} ms   "
+          f"p95 {percentile(latencies, 95) * 1e3:8.1f} ms   "
+          f"RTF {wall / audio_seconds:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "Nipunika_210000.pth"))
+    parser.add_argument("--config", default=os.path.join(ROOT, "Nipunika_config.json"))
+    parser.add_argument("--onnx", default=os.path.join(ROOT, "Nipunika_210000.onnx"))
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--intra-op", type=int, default=0)
+    parser.add_argument("--inter-op", type=int, default=0)
+    parser.add_argument("--min-similarity", type=float, default=0.98)
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    for path in (args.model, args.config):
+        if not os.path.exists(path):
+            raise SystemExit("Model files not found - run download_model.sh first")
+    if not os.path.exists(args.onnx):
+        raise SystemExit(f"{args.onnx} not found - run `python onnx_backend.py` first")
+
+    import torch
+    from TTS.utils.synthesizer import Synthesizer
+    from onnx_backend import OnnxSynthesizer
+
+    torch_synth = Synthesizer(tts_checkpoint=args.model, tts_config_path=args.config, use_cuda=False)
+    onnx_synth = OnnxSynthesizer(args.onnx, args.config,
+                                 intra_op_threads=args.intra_op, inter_op_threads=args.inter_op)
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        headlines = [sinhala_to_roman(line.strip()) for line in f if line.strip()]
+    texts = (headlines * (args.requests // len(headlines) + 1))[:args.requests]
+
+    ok = True
+    if not args.skip_parity:
+        ok = parity(torch_synth, onnx_synth, headlines, args.min_similarity)
+
+    print(f"{args.requests} sequential requests, torch threads {torch.get_num_threads()}, "
+          f"onnx intra-op {args.intra_op or 'default'}, inter-op {args.inter_op or 'default'}")
+    measure("torch", torch_synth, texts, torch_synth.output_sample_rate)
+    measure("onnx", onnx_synth, texts, onnx_synth.output_sample_rate)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Precision modes (fp32, int8, bf16): quality against fp32, real-time factor and resident memory.
+
+Needs the model files (see download_model.sh).
+
+Each mode runs in its own process so resident memory isn't shared between
+them. Quality synthesizes every fixture headline with the noise scales set
+to 0 (deterministic), then compares each mode's waveforms with fp32: cosine
+similarity, length ratio and mean log-mel distance in dB. Exits non-zero if
+a headline falls below --min-similarity or above --max-mel-distance.
+
+Usage:
+    python benchmarks/bench_precision.py [--modes fp32,int8,bf16] [--requests 20]
+                                         [--min-similarity 0.98] [--max-mel-distance 1.5]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.report import cosine_similarity, percentile  # noqa: E402
+from romanizer import sinhala_to_roman  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "adaderana_headlines.txt")
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels):
+    """HTK-style triangular filters, [n_mels, n_fft // 2 + 1]"""
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(0.0), to_mel(sample_rate / 2.0), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    filters = np.zeros((n_mels, len(bins)))
+    for i in range(n_mels):
+        low, center, high = edges[i:i + 3]
+        filters[i] = np.clip(np.minimum((bins - low) / (center - low), (high - bins) / (high - center)), 0, None)
+    return filters
+
+
+def log_mel(wav, sample_rate, n_fft=1024, hop=256, n_mels=80):
+    """Log-mel spectrogram in dB, [frames, n_mels]"""
+    wav = np.asarray(wav, dtype=np.float64)
+    if len(wav) < n_fft:
+        wav = np.pad(wav, (0, n_fft - len(wav)))
+    frames = np.lib.stride_tricks.sliding_window_view(wav, n_fft)[::hop] * np.hanning(n_fft)
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    return 10.0 * np.log10(np.maximum(power @ mel_filterbank(sample_rate, n_fft, n_mels).T, 1e-10))
+
+
+def mel_distance(reference, candidate, sample_rate):
+    """Mean absolute log-mel difference (dB) over the frames both waveforms have"""
+    a = log_mel(reference, sample_rate)
+    b = log_mel(candidate, sample_rate)
+    n = min(len(a), len(b))
+    return float(np.mean(np.abs(a[:n] - b[:n])))
+
+
+def memory_mb():
+    """(current, peak) resident set size in MB"""
+    current = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+    return current, peak
+
+
+def worker(args):
+    """Load one precision mode, synthesize the quality set and time the requests"""
+    import torch
+    from TTS.utils.synthesizer import Synthesizer
+    from precision import apply_precision
+
+    baseline, _ = memory_mb()
+    synth = Synthesizer(tts_checkpoint=args.model, tts_config_path=args.config, use_cuda=False)
+    info = apply_precision(synth.tts_model, args.worker)
+    loaded, _ = memory_mb()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        headlines = [sinhala_to_roman(line.strip()) for line in f if line.strip()]
+    texts = (headlines * (args.requests // len(headlines) + 1))[:args.requests]
+
+    model = synth.tts_model
+    saved = (model.inference_noise_scale, model.inference_noise_scale_dp)
+    model.inference_noise_scale = model.inference_noise_scale_dp = 0.0
+    try:
+        quality = [np.asarray(synth.tts(text), dtype=np.float32) for text in headlines]
+    finally:
+        model.inference_noise_scale, model.inference_noise_scale_dp = saved
+
+    synth.tts(texts[0])  # warm-up
+    latencies = []
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    for text in texts:
+        item_start = time.perf_counter()
+        wav = synth.tts(text)
+        latencies.append(time.perf_counter() - item_start)
+        audio_seconds += len(wav) / float(synth.output_sample_rate)
+    wall = time.perf_counter() - start
+    current, peak = memory_mb()
+
+    np.savez(args.out + ".npz", *quality)
+    with open(args.out + ".json", "w") as f:
+        json.dump({
+            "precision": info,
+            "sample_rate": synth.output_sample_rate,
+            "threads": torch.get_num_threads(),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "rtf": wall / audio_seconds,
+            "rss_model": loaded - baseline if loaded and baseline else None,
+            "rss": current,
+            "rss_peak": peak,
+        }, f)
+
+
+def run_mode(mode, args, workdir):
+    out = os.path.join(workdir, mode)
+    command = [sys.executable, os.path.abspath(__file__), "--worker", mode, "--out", out,
+               "--model", args.model, "--config", args.config, "--requests", str(args.requests)]
+    subprocess.run(command, check=True)
+    with open(out + ".json") as f:
+        result = json.load(f)
+    with np.load(out + ".npz") as data:
+        result["waveforms"] = [data[key] for key in data.files]
+    return result
+
+
+def compare(mode, reference, candidate, sample_rate, min_similarity, max_mel_distance):
+    """Print per-mode quality against fp32; True if every headline is within bounds"""
+    similarities, distances, failures = [], [], 0
+    for ref, cand in zip(reference, candidate):
+        similarity = cosine_similarity(ref, cand)
+        distance = mel_distance(ref, cand, sample_rate)
+        length_ratio = len(cand) / max(1, len(ref))
+        similarities.append(similarity)
+        distances.append(distance)
+        if similarity < min_similarity or distance > max_mel_distance:
+            failures += 1
+            print(f"  {mode}: similarity {similarity:.4f}, mel distance {distance:.2f} dB, "
+                  f"length ratio {length_ratio:.3f}")
+    print(f"{mode:<6} quality: worst cosine similarity {min(similarities):.4f}, "
+          f"mean mel distance {np.mean(distances):.2f} dB (worst {max(distances):.2f}), "
+          f"{failures}/{len(reference)} out of bounds")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "Nipunika_210000.pth"))
+    parser.add_argument("--config", default=os.path.join(ROOT, "Nipunika_config.json"))
+    parser.add_argument("--modes", default="fp32,int8,bf16")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--min-similarity", type=float, default=0.98)
+    parser.add_argument("--max-mel-distance", type=float, default=1.5, help="dB")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    for path in (args.model, args.config):
+        if not os.path.exists(path):
+            raise SystemExit("Model files not found - run download_model.sh first")
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    if "fp32" in modes:
+        modes.remove("fp32")
+    modes.insert(0, "fp32")
+
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {mode: run_mode(mode, args, workdir) for mode in modes}
+
+        reference = results["fp32"]["waveforms"]
+        for mode in modes[1:]:
+            ok = compare(mode, reference, results[mode]["waveforms"], results["fp32"]["sample_rate"],
+                         args.min_similarity, args.max_mel_distance) and ok
+
+    print(f"\n{args.requests} sequential requests, torch threads {results['fp32']['threads']}")
+    print(f"{'mode':<6} {'p50 ms':>8} {'p95 ms':>8} {'RTF':>7} {'weights MB':>11} "
+          f"{'model RSS MB':>13} {'RSS MB':>8} {'peak MB':>8}")
+    for mode in modes:
+        result = results[mode]
+        model_rss = f"{result['rss_model']:13.0f}" if result["rss_model"] is not None else f"{'-':>13}"
+        print(f"{mode:<6} {result['p50'] * 1e3:8.1f} {result['p95'] * 1e3:8.1f} {result['rtf']:7.3f} "
+              f"{result['precision']['weights_mb']:11.1f} {model_rss} "
+              f"{result['rss'] or 0:8.0f} {result['rss_peak']:8.0f}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
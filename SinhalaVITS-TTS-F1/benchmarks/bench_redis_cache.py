@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Redis audio cache (audio_cache.RedisAudioCache): self-check and feed prefetch timing.
+
+Runs against --url (a real redis-server; use a scratch database, keys go
+under a bench prefix and are deleted afterwards) or, without it, an
+in-process fakeredis server (pip install fakeredis). The check covers
+misses, round trips, the SET ... EX TTL and expiry, delete, that get_many
+fetches a whole feed in one pipelined round trip, and that an unreachable
+Redis degrades to misses. Then it times one feed's worth of lookups as
+get_many against a loop of get() calls. With fakeredis the timings only
+show client overhead; against a real server they include the round trips
+that pipelining saves. Exits 1 if any check fails.
+
+Usage:
+    python -m benchmarks.bench_redis_cache [--url redis://localhost:6379/15] [--feed 30]
+                                           [--repeat 200] [--output redis_cache.json]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from audio_cache import RedisAudioCache  # noqa: E402
+from benchmarks.report import environment, summarize, write_result  # noqa: E402
+
+PREFIX = "tts:bench:"
+
+
+class CountingClient:
+    """Redis client proxy counting direct get() calls and pipelines"""
+
+    def __init__(self, client):
+        self.client = client
+        self.gets = 0
+        self.pipelines = 0
+
+    def get(self, *args, **kwargs):
+        self.gets += 1
+        return self.client.get(*args, **kwargs)
+
+    def pipeline(self, *args, **kwargs):
+        self.pipelines += 1
+        return self.client.pipeline(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def connect(url):
+    if url:
+        import redis
+
+        return redis.Redis.from_url(url)
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("Pass --url redis://... or pip install fakeredis")
+    return fakeredis.FakeRedis()
+
+
+def self_check(client, feed):
+    """Returns a list of failed checks (empty if all pass)"""
+    failures = []
+
+    def check(name, ok):
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}", file=sys.stderr)
+        if not ok:
+            failures.append(name)
+
+    counting = CountingClient(client)
+    cache = RedisAudioCache(client=counting, ttl_seconds=3600, prefix=PREFIX)
+    check("miss returns None", cache.get("missing") is None and cache.stats()["misses"] == 1)
+    check("put stores", cache.put("a", b"RIFF-a") is True)
+    check("get returns the bytes", cache.get("a") == b"RIFF-a" and cache.stats()["hits"] == 1)
+    ttl = client.ttl(PREFIX + "a")
+    check(f"SET carries the TTL ({ttl}s)", 3590 <= ttl <= 3600)
+    cache.delete("a")
+    check("delete removes", cache.get("a") is None)
+
+    keys = [f"k{i}" for i in range(feed)]
+    for key in keys[::2]:
+        cache.put(key, key.encode("ascii"))
+    gets, pipelines = counting.gets, counting.pipelines
+    found = cache.get_many(keys)
+    check("get_many returns only cached keys",
+          found == {key: key.encode("ascii") for key in keys[::2]})
+    check("get_many is one pipelined round trip",
+          counting.pipelines - pipelines == 1 and counting.gets == gets)
+    check("get_many of nothing skips Redis", cache.get_many([]) == {} and counting.pipelines - pipelines == 1)
+
+    short = RedisAudioCache(client=client, ttl_seconds=1, prefix=PREFIX)
+    short.put("short", b"x")
+    time.sleep(1.2)
+    check("entries expire after ttl_seconds", short.get("short") is None)
+
+    try:
+        down = RedisAudioCache(url="redis://127.0.0.1:1/0", socket_timeout=0.5)
+        outage_ok = (down.get("a") is None and down.put("a", b"x") is False and down.get_many(["a", "b"]) == {}
+                     and down.stats()["errors"] == 3)
+    except ImportError:
+        outage_ok = False
+    check("unreachable Redis degrades to misses", outage_ok)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="redis:// URL (default: in-process fakeredis)")
+    parser.add_argument("--feed", type=int, default=30, help="keys per feed prefetch")
+    parser.add_argument("--clip-kb", type=int, default=120, help="size of each cached clip")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    client = connect(args.url)
+    print("Self-check...", file=sys.stderr)
+    failures = self_check(client, args.feed)
+
+    cache = RedisAudioCache(client=client, prefix=PREFIX)
+    keys = [f"feed{i}" for i in range(args.feed)]
+    clip = os.urandom(args.clip_kb * 1024)
+    for key in keys:
+        cache.put(key, clip)
+
+    print("Timing feed prefetch...", file=sys.stderr)
+    timings = {"get_many": [], "get_loop": []}
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cache.get_many(keys)
+        timings["get_many"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key)
+        timings["get_loop"].append(time.perf_counter() - start)
+    results = {name: summarize(seconds) for name, seconds in timings.items()}
+
+    for key in client.scan_iter(PREFIX + "*"):
+        client.delete(key)
+
+    print(f"\n{args.feed} x {args.clip_kb} KB clips ({'redis ' + args.url if args.url else 'fakeredis'})",
+          file=sys.stderr)
+    for name, result in results.items():
+        print(f"{name:<10}{result['p50_ms']:9.2f} ms p50{result['p99_ms']:9.2f} ms p99", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_result({"environment": environment(), "failures": failures, "prefetch": results, "config": config},
+                 args.output)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Model replicas (model_pool.ModelPool): throughput and resident memory against replica count.
+
+Needs the model files (see download_model.sh), or --random-weights to
+build a randomly initialised checkpoint of the same architecture from the
+config (same size and compute, meaningless audio).
+
+Each replica count runs in its own process, which loads the checkpoint
+once, forks the replicas (even a single one, so the counts compare like
+for like) and drives --requests headlines through InferenceScheduler from
+--concurrency threads. Memory is summed over the parent and its replicas
+from /proc/<pid>/smaps_rollup: RSS counts shared weight pages once per
+process, PSS splits them between the processes sharing them, so PSS is
+what the host actually spends. "separate" is replicas x the single
+replica PSS, roughly what as many independently loaded workers would use.
+
+Usage:
+    python -m benchmarks.bench_replicas [--replicas 1 2 4] [--threads-per-replica 0]
+                                        [--requests 32] [--concurrency 16] [--max-batch 8]
+                                        [--random-weights] [--output replicas.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, load_headlines, summarize, write_result  # noqa: E402
+from romanizer import sinhala_to_roman  # noqa: E402
+
+
+def memory_mb(pids):
+    """{"rss_mb", "pss_mb", "private_mb"} summed over pids (Linux only)"""
+    totals = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in totals:
+                    totals[key] += int(value.split()[0])
+    return {
+        "rss_mb": round(totals["Rss"] / 1024.0, 1),
+        "pss_mb": round(totals["Pss"] / 1024.0, 1),
+        "private_mb": round((totals["Private_Clean"] + totals["Private_Dirty"]) / 1024.0, 1),
+    }
+
+
+def random_checkpoint(config_path, path):
+    """Save a randomly initialised model with config_path's architecture to path"""
+    import torch
+    from TTS.tts.configs.vits_config import VitsConfig
+    from TTS.tts.models.vits import Vits
+
+    config = VitsConfig()
+    config.load_json(config_path)
+    torch.save({"model": Vits.init_from_config(config).state_dict()}, path)
+
+
+def child(args):
+    """Load once, fork args.child replicas, drive the requests; writes a JSON result to args.out"""
+    import torch
+    from TTS.utils.synthesizer import Synthesizer
+    from batch_scheduler import InferenceScheduler, VitsBatchRunner
+    from model_pool import ModelPool
+
+    texts = [sinhala_to_roman(headline) for headline in load_headlines()]
+    texts = (texts * (args.requests // len(texts) + 1))[:args.requests]
+
+    # as app.load_model does: no OpenMP pool in the process the replicas fork from
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    synth = Synthesizer(tts_checkpoint=args.model, tts_config_path=args.config, use_cuda=False)
+    pool = ModelPool(VitsBatchRunner(synth).tts_batch, replicas=args.child,
+                     threads_per_replica=args.threads_per_replica, warmup_texts=texts[:1])
+    pool.start()
+    startup = time.perf_counter() - start
+    pids = [os.getpid()] + pool.pids()
+    loaded = memory_mb(pids)
+
+    scheduler = InferenceScheduler(pool.tts_batch, max_batch_size=args.max_batch,
+                                   max_wait_ms=args.max_wait_ms, workers=args.child)
+    latencies = []
+    audio_seconds = []
+
+    def one(text):
+        item_start = time.perf_counter()
+        wav = scheduler.tts(text)
+        latencies.append(time.perf_counter() - item_start)
+        audio_seconds.append(len(wav) / float(synth.output_sample_rate))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(one, texts))
+    wall = time.perf_counter() - start
+    served = memory_mb(pids)
+    stats = pool.stats()
+    pool.close()
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "replicas": args.child,
+            "cpus": [replica["cpus"] for replica in stats["per_replica"]],
+            "batches": [replica["batches"] for replica in stats["per_replica"]],
+            "startup_seconds": round(startup, 2),
+            "throughput_rps": round(len(texts) / wall, 2),
+            "audio_seconds_per_second": round(sum(audio_seconds) / wall, 2),
+            "latency": summarize(latencies),
+            "memory_loaded": loaded,
+            "memory_served": served,
+        }, f)
+
+
+def run_count(replicas, args, model_path, workdir):
+    out = os.path.join(workdir, f"{replicas}.json")
+    command = [sys.executable, "-m", "benchmarks.bench_replicas", "--child", str(replicas), "--out", out,
+               "--model", model_path, "--config", args.config,
+               "--threads-per-replica", str(args.threads_per_replica), "--requests", str(args.requests),
+               "--concurrency", str(args.concurrency), "--max-batch", str(args.max_batch),
+               "--max-wait-ms", str(args.max_wait_ms)]
+    # the synthesizer prints to stdout, which is ours for the JSON result
+    subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    with open(out) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "Nipunika_210000.pth"))
+    parser.add_argument("--config", default=os.path.join(ROOT, "Nipunika_config.json"))
+    parser.add_argument("--random-weights", action="store_true",
+                        help="benchmark a randomly initialised model instead of --model")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-replica", type=int, default=0, help="0 splits the CPUs evenly")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    if not os.path.exists(args.config) or not (args.random_weights or os.path.exists(args.model)):
+        raise SystemExit("Model files not found - run download_model.sh first (or pass --random-weights)")
+
+    with tempfile.TemporaryDirectory(prefix="bench-replicas-") as workdir:
+        model_path = args.model
+        if args.random_weights:
+            model_path = os.path.join(workdir, "random.pth")
+            print("Building a random-weights checkpoint...", file=sys.stderr)
+            random_checkpoint(args.config, model_path)
+
+        results = []
+        for replicas in args.replicas:
+            print(f"Running {replicas} replica(s)...", file=sys.stderr)
+            results.append(run_count(replicas, args, model_path, workdir))
+
+    single = next((result for result in results if result["replicas"] == 1), None)
+    print(f"\n{args.requests} requests, concurrency {args.concurrency}, max batch {args.max_batch}, "
+          f"{os.cpu_count()} CPUs", file=sys.stderr)
+    print(f"{'replicas':>8}{'req/s':>8}{'audio s/s':>11}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'RSS MB':>9}{'PSS MB':>9}{'separate MB':>13}", file=sys.stderr)
+    for result in results:
+        memory = result["memory_served"]
+        if single:
+            result["separate_pss_mb"] = round(single["memory_served"]["pss_mb"] * result["replicas"], 1)
+        separate = f"{result['separate_pss_mb']:13.0f}" if single else f"{'-':>13}"
+        print(f"{result['replicas']:>8}{result['throughput_rps']:8.2f}{result['audio_seconds_per_second']:11.2f}"
+              f"{result['latency']['p50_ms']:9.0f}{result['latency']['p99_ms']:9.0f}"
+              f"{memory['rss_mb']:9.0f}{memory['pss_mb']:9.0f}{separate}", file=sys.stderr)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "child", "out")}
+    write_result({"environment": environment(), "replicas": results, "config": config}, args.output)
+
+
+if __name__ == "__main__":
+    main()
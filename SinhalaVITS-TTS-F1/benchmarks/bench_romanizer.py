@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy multi-pass romanizer vs the precompiled single-pass engine,
+plus the romanize_many bulk path over an archive-sized batch.
+
+Usage:
+    python benchmarks/bench_romanizer.py [--repeat 20] [--batch 20000] [--processes 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import romanizer  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "adaderana_headlines.txt")
+
+
+def legacy_sinhala_to_roman(text):
+    """The original implementation: one re.sub per mapping entry."""
+    text = text.replace("\u200D", "")
+    text = romanizer.replace_all(text, romanizer.ro_conso_combi)
+    text = romanizer.replace_all(text, romanizer.ro_specials)
+    return text
+
+
+def load_headlines(path=FIXTURE):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def time_path(func, headlines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in headlines:
+            func(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--batch", type=int, default=200000, help="texts in the bulk batch")
+    parser.add_argument("--processes", type=int, default=4, help="pool size for the bulk batch")
+    args = parser.parse_args()
+
+    headlines = load_headlines()
+
+    # Outputs must be identical before timings mean anything
+    for text in headlines:
+        expected = legacy_sinhala_to_roman(text)
+        actual = romanizer.sinhala_to_roman(text)
+        if expected != actual:
+            raise SystemExit(f"Mismatch for {text!r}: {expected!r} != {actual!r}")
+
+    calls = len(headlines) * args.repeat
+    legacy = time_path(legacy_sinhala_to_roman, headlines, args.repeat)
+    compiled = time_path(romanizer.sinhala_to_roman, headlines, args.repeat)
+
+    print(f"corpus: {len(headlines)} headlines x {args.repeat} passes = {calls} calls")
+    print(f"legacy   : {legacy * 1e6 / calls:9.1f} us/headline")
+    print(f"compiled : {compiled * 1e6 / calls:9.1f} us/headline")
+    print(f"speedup  : {legacy / compiled:9.1f}x")
+
+    batch = (headlines * (args.batch // len(headlines) + 1))[:args.batch]
+    start = time.perf_counter()
+    expected = [romanizer.sinhala_to_roman(text) for text in batch]
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk_result = romanizer.romanize_many(batch)
+    bulk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled_result = romanizer.romanize_many(batch, processes=args.processes)
+    pooled = time.perf_counter() - start
+
+    if bulk_result != expected or pooled_result != expected:
+        raise SystemExit("romanize_many output differs from sinhala_to_roman")
+
+    print(f"\nbatch: {len(batch)} texts")
+    print(f"one-by-one          : {one_by_one * 1e3:9.1f} ms")
+    print(f"romanize_many       : {bulk * 1e3:9.1f} ms")
+    print(f"romanize_many (x{args.processes:<2}) : {pooled * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy BeautifulSoup hot-news parser vs the single-pass lxml engine.
+
+Every saved page in benchmarks/fixtures/*.html is parsed by both; items are
+compared field by field (timestamps only where the page carries a full date) and
+the per-page parse time is reported.
+
+Usage:
+    python benchmarks/bench_scraper.py [--repeat 50] [fixture.html ...]
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_scraper  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "*.html")))
+
+def legacy_parse_time_string(time_str):
+    """
+    Parse time strings like "December 30, 2025 2:15 pm", "1:24 pm today", etc.
+    Returns datetime object or None
+    """
+    if not time_str:
+        return None
+    
+    time_str = time_str.strip()
+    now = datetime.now()
+    
+    # Handle format: "December 30, 2025 2:15 pm"
+    date_time_match = re.search(r'(\w+)\s+(\d+),\s+(\d+)\s+(\d{1,2}):(\d{2})\s*(am|pm)', time_str, re.I)
+    if date_time_match:
+        month_name = date_time_match.group(1)
+        day = int(date_time_match.group(2))
+        year = int(date_time_match.group(3))
+        hour = int(date_time_match.group(4))
+        minute = int(date_time_match.group(5))
+        ampm = date_time_match.group(6).lower()
+        
+        month_map = {
+            'january': 1, 'february': 2, 'march': 3, 'april': 4,
+            'may': 5, 'june': 6, 'july': 7, 'august': 8,
+            'september': 9, 'october': 10, 'november': 11, 'december': 12
+        }
+        month = month_map.get(month_name.lower(), now.month)
+        
+        if ampm == "pm" and hour != 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        
+        try:
+            return datetime(year, month, day, hour, minute)
+        except:
+            pass
+    
+    # Handle "today" with time
+    time_str_lower = time_str.lower()
+    if "today" in time_str_lower or "අද" in time_str:
+        time_match = re.search(r'(\d{1,2}):(\d{2})\s*(am|pm)', time_str_lower)
+        if time_match:
+            hour = int(time_match.group(1))
+            minute = int(time_match.group(2))
+            ampm = time_match.group(3)
+            if ampm == "pm" and hour != 12:
+                hour += 12
+            elif ampm == "am" and hour == 12:
+                hour = 0
+            return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    
+    # Handle "X hours ago" or "X minutes ago"
+    hours_ago = re.search(r'(\d+)\s*(hour|hours|පැය)', time_str_lower)
+    if hours_ago:
+        hours = int(hours_ago.group(1))
+        return now - timedelta(hours=hours)
+    
+    minutes_ago = re.search(r'(\d+)\s*(minute|minutes|මිනිත්තු)', time_str_lower)
+    if minutes_ago:
+        minutes = int(minutes_ago.group(1))
+        return now - timedelta(minutes=minutes)
+    
+    # Handle "yesterday" or "ඊයේ"
+    if "yesterday" in time_str_lower or "ඊයේ" in time_str:
+        return now - timedelta(days=1)
+    
+    return now
+
+
+def legacy_parse_adaderana_html(content):
+    """The original BeautifulSoup implementation, kept verbatim as the reference."""
+    news_items = []
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Find all h2 headings which contain news titles on the Sinhala page
+    # Based on the page structure, news items are in h2 tags
+    news_headings = soup.find_all('h2')
+    
+    for idx, heading in enumerate(news_headings[:50]):  # Limit to 50 items
+        try:
+            # Extract title from h2
+            title = heading.get_text(strip=True)
+            if not title or len(title) < 10:
+                continue
+            
+            # Skip if it's not a news headline (like page title)
+            if title in ["උණුසුම් පුවත්", "Hot News", "Most Viewed"]:
+                continue
+            
+            # Find the parent container to get link and time
+            parent = heading.find_parent(['div', 'article', 'section'])
+            if not parent:
+                parent = heading
+            
+            # Extract link - look for anchor tag near the heading
+            link = ""
+            link_elem = heading.find('a', href=True)
+            if not link_elem:
+                # Try to find link in parent or next sibling
+                link_elem = parent.find('a', href=True) if parent else None
+            
+            if link_elem:
+                link = link_elem.get('href', '')
+                if link and not link.startswith('http'):
+                    if link.startswith('/'):
+                        link = f"https://sinhala.adaderana.lk{link}"
+                    else:
+                        link = f"https://sinhala.adaderana.lk/{link}"
+            
+            # Extract time - look for timestamp pattern in text after heading
+            time_str = ""
+            timestamp = None
+            
+            # Look for time in the same container or next elements
+            time_pattern = re.compile(r'(December|January|February|March|April|May|June|July|August|September|October|November)\s+\d+,\s+\d+\s+\d+:\d+\s+(am|pm)', re.I)
+            
+            # Check parent and siblings for time
+            search_area = parent if parent else heading
+            time_text = search_area.get_text()
+            time_match = time_pattern.search(time_text)
+            
+            if time_match:
+                time_str = time_match.group(0).strip()
+                timestamp = legacy_parse_time_string(time_str)
+            else:
+                # Try to find time element
+                time_elem = search_area.find(string=re.compile(r'\d+:\d+\s*(am|pm)', re.I))
+                if time_elem:
+                    time_str = time_elem.strip()
+                    timestamp = legacy_parse_time_string(time_str)
+            
+            # Extract category - this page is for "උණුසුම් පුවත්" (Hot News)
+            # But we can try to detect from title or URL
+            category = news_scraper.categorize_news(title, "")
+            
+            # Determine if breaking news
+            is_breaking = any(word in title for word in ["විශේෂ", "බිඳී", "උත්තරීතර", "විශේෂයෙන්"])
+            
+            news_item = {
+                "id": news_scraper.stable_item_id(link, title),
+                "title": title,
+                "link": link or f"{news_scraper.ADA_DERANA_URL}#{idx}",
+                "time": time_str or "මෑතකදී",
+                "timestamp": timestamp.isoformat() if timestamp else datetime.now().isoformat(),
+                "category": category,
+                "isBreaking": is_breaking,
+                "text": title  # For TTS, we'll use the title
+            }
+            
+            news_items.append(news_item)
+            
+        except Exception as e:
+            logger.warning(f"Error parsing article {idx}: {str(e)}")
+            continue
+    
+    return news_items
+
+
+def compare(legacy_items, new_items):
+    """Return a list of human-readable mismatches (empty when identical)."""
+    problems = []
+    if len(legacy_items) != len(new_items):
+        problems.append(f"item count {len(legacy_items)} != {len(new_items)}")
+    for idx, (old, new) in enumerate(zip(legacy_items, new_items)):
+        for field in old:
+            # Items without a full date are stamped relative to datetime.now(),
+            # which differs between the two calls
+            if field == "timestamp" and not news_scraper.DATE_TIME_PATTERN.search(old["time"]):
+                continue
+            if old[field] != new.get(field):
+                problems.append(f"item {idx} {field}: {old[field]!r} != {new.get(field)!r}")
+    return problems
+
+
+def best_of(fn, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("fixtures", nargs="*", default=FIXTURES)
+    args = parser.parse_args()
+
+    if not args.fixtures:
+        raise SystemExit("No HTML fixtures found")
+
+    failed = False
+    for path in args.fixtures:
+        with open(path, "rb") as f:
+            content = f.read()
+
+        legacy_items = legacy_parse_adaderana_html(content)
+        new_items = news_scraper.parse_adaderana_html(content)
+        problems = compare(legacy_items, new_items)
+
+        legacy_s = best_of(legacy_parse_adaderana_html, content, args.repeat)
+        new_s = best_of(news_scraper.parse_adaderana_html, content, args.repeat)
+
+        print(f"{os.path.basename(path)}: {len(new_items)} items, {len(content) / 1024:.1f} KiB")
+        print(f"  legacy bs4 : {legacy_s * 1e3:8.2f} ms/page")
+        print(f"  lxml       : {new_s * 1e3:8.2f} ms/page  ({legacy_s / new_s:.1f}x)")
+        if problems:
+            failed = True
+            print(f"  MISMATCH ({len(problems)}):")
+            for problem in problems[:20]:
+                print(f"    {problem}")
+        else:
+            print("  output identical")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark results (from python -m benchmarks) and flag regressions.
+
+Latencies, times per op and error counts should go down; throughputs
+should go up. A metric that moves the wrong way by more than --threshold
+(relative) is a regression, and the exit status is 1 if there is any.
+Stage timings from Server-Timing are shown with --all but never fail the
+comparison, since they overlap.
+
+Usage:
+    python -m benchmarks.compare old.json new.json [--threshold 0.10] [--all]
+"""
+
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "us_per_op_min", "us_per_op_median", "wall_seconds", "errors")
+HIGHER_IS_BETTER = ("ops_per_sec", "throughput_rps")
+SKIPPED_SECTIONS = ("environment", "config", "statuses")
+
+
+def flatten(value, prefix=""):
+    """{dotted path: number} for every numeric leaf outside the skipped sections"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, child in value.items():
+            if key in SKIPPED_SECTIONS:
+                continue
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def direction(path):
+    """-1 if lower is better, 1 if higher is better, 0 if not compared"""
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf in HIGHER_IS_BETTER:
+        return 1
+    if leaf in LOWER_IS_BETTER or leaf.endswith("_ms"):
+        return -1
+    return 0
+
+
+def compare(old, new, threshold):
+    """Rows of (path, old, new, relative change, verdict)"""
+    old_flat, new_flat = flatten(old), flatten(new)
+    rows = []
+    for path in sorted(set(old_flat) & set(new_flat)):
+        better = direction(path)
+        if better == 0:
+            continue
+        before, after = old_flat[path], new_flat[path]
+        if before == 0:
+            change = 0.0 if after == 0 else float("inf")
+        else:
+            change = (after - before) / abs(before)
+        worse = change * better < 0 and abs(change) > threshold
+        improved = change * better > 0 and abs(change) > threshold
+        if path.startswith("load.stages."):
+            verdict = "info"
+        else:
+            verdict = "REGRESSION" if worse else "improved" if improved else "ok"
+        rows.append((path, before, after, change, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--all", action="store_true", help="also show unchanged metrics and stages")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    old_commit = old.get("environment", {}).get("commit")
+    new_commit = new.get("environment", {}).get("commit")
+    print(f"{old_commit or args.old} -> {new_commit or args.new} (threshold {args.threshold:.0%})")
+
+    rows = compare(old, new, args.threshold)
+    for path, before, after, change, verdict in rows:
+        if args.all or verdict in ("REGRESSION", "improved"):
+            print(f"{verdict:<10} {path:<60} {before:>12g} -> {after:<12g} {change:+.1%}")
+
+    regressions = sum(1 for row in rows if row[4] == "REGRESSION")
+    print(f"{len(rows)} metrics compared, {regressions} regressions")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
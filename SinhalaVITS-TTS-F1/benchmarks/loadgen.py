@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Load test: /api/synthesize and /api/fetch-news at a set concurrency and cache-hit mix.
+
+Without --url the API runs in-process on the stub synthesizer
+(INFERENCE_BACKEND=stub) with a throwaway audio store, and the news feed
+reads the saved Ada Derana fixture from a local server, so a run needs no
+model files or network and repeats exactly. With --url it drives a running
+server (e.g. gunicorn with the real model).
+
+The request sequence is fixed by --seed. A fraction --news-ratio of the
+requests go to /api/fetch-news. Of the synthesis requests, --hit-ratio
+reuse a small set of headlines synthesized before the run (cache hits) and
+the rest are texts never requested before (misses).
+
+Usage:
+    python -m benchmarks.loadgen [--requests 300] [--concurrency 8] [--hit-ratio 0.7]
+                                 [--news-ratio 0.2] [--format wav] [--url http://...]
+                                 [--output load.json]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, load_headlines, read_fixture, summarize, write_result  # noqa: E402
+
+SERVER_TIMING_ENTRY = re.compile(r'([\w-]+);dur=([\d.]+)')
+
+
+def plan_requests(headlines, count, hit_ratio, news_ratio, hot_texts, seed):
+    """
+    The run's request sequence: ("fetch_news", None), ("synthesize_hit", text)
+    or ("synthesize_miss", text). Miss texts pair two headlines plus a
+    per-run nonce, so they are new to a long-running server too.
+    """
+    rng = random.Random(seed)
+    nonce = random.SystemRandom().randrange(10 ** 6)
+    hot = headlines[:hot_texts]
+    plan = []
+    for i in range(count):
+        if rng.random() < news_ratio:
+            plan.append(("fetch_news", None))
+        elif rng.random() < hit_ratio:
+            plan.append(("synthesize_hit", rng.choice(hot)))
+        else:
+            first, second = rng.sample(headlines, 2)
+            plan.append(("synthesize_miss", f"{first}. {second} {nonce:06d}-{i}"))
+    return hot, plan
+
+
+def start_local_server(base_ms, ms_per_char, batch_size):
+    """
+    Run the API in-process on the stub synthesizer.
+
+    Returns:
+        tuple: (base URL, shutdown callable)
+    """
+    from werkzeug.serving import make_server
+
+    if "app" in sys.modules:
+        raise RuntimeError("app was imported before the stub server could configure it")
+
+    from benchmarks.bench_crawler import make_handler
+
+    store_dir = tempfile.TemporaryDirectory(prefix="loadgen-store-")
+    os.environ.update({
+        "INFERENCE_BACKEND": "stub",
+        "STUB_BASE_MS": str(base_ms),
+        "STUB_MS_PER_CHAR": str(ms_per_char),
+        "TTS_BATCH_MAX_SIZE": str(batch_size),
+        "AUDIO_STORE_DIR": store_dir.name,
+        "PRERENDER_ENABLED": "0",
+        "MODEL_EAGER_LOAD": "1",
+    })
+    os.environ.pop("REDIS_URL", None)
+
+    news_server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        make_handler({"/sinhala-hot-news.php": read_fixture("adaderana_hot_news.html")}, 0, 0, defaultdict(int))
+    )
+    threading.Thread(target=news_server.serve_forever, daemon=True).start()
+
+    import app as api
+
+    api.news_feed.url = f"http://127.0.0.1:{news_server.server_address[1]}/sinhala-hot-news.php"
+    if not api.model_loader.wait(60):
+        raise SystemExit(f"Stub model failed to load: {api.model_loader.status()}")
+
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def shutdown():
+        server.shutdown()
+        news_server.shutdown()
+        store_dir.cleanup()
+
+    return f"http://127.0.0.1:{server.server_port}", shutdown
+
+
+def run_load(base_url, plan, hot, concurrency, audio_format, timeout=120):
+    """
+    Warm the hot texts, then send the plan from concurrency threads.
+
+    Returns:
+        dict: per request kind summaries, stage timings and throughput
+    """
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def send(kind, text):
+        if kind == "fetch_news":
+            return session().get(f"{base_url}/api/fetch-news", timeout=timeout)
+        return session().post(f"{base_url}/api/synthesize", json={"text": text, "format": audio_format},
+                              timeout=timeout)
+
+    for text in hot:
+        response = send("synthesize_hit", text)
+        if response.status_code != 200:
+            raise SystemExit(f"Warm-up failed with {response.status_code}: {response.text[:200]}")
+    send("fetch_news", None)
+
+    lock = threading.Lock()
+    latencies = defaultdict(list)
+    sizes = defaultdict(int)
+    statuses = defaultdict(lambda: defaultdict(int))
+    stages = defaultdict(list)
+
+    def one(entry):
+        kind, text = entry
+        start = time.perf_counter()
+        try:
+            response = send(kind, text)
+            status, size = response.status_code, len(response.content)
+            timing = response.headers.get("Server-Timing", "")
+        except requests.RequestException as e:
+            status, size, timing = type(e).__name__, 0, ""
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies[kind].append(elapsed)
+            sizes[kind] += size
+            statuses[kind][str(status)] += 1
+            for name, ms in SERVER_TIMING_ENTRY.findall(timing):
+                if name != "total":
+                    stages[f"{kind}.{name}"].append(float(ms) / 1e3)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, plan))
+    wall = time.perf_counter() - start
+
+    kinds = {}
+    for kind, seconds in sorted(latencies.items()):
+        summary = summarize(seconds)
+        summary["errors"] = sum(n for status, n in statuses[kind].items() if not status.startswith("2"))
+        summary["statuses"] = dict(statuses[kind])
+        summary["mean_bytes"] = round(sizes[kind] / len(seconds))
+        kinds[kind] = summary
+
+    return {
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(plan) / wall, 2),
+        "errors": sum(summary["errors"] for summary in kinds.values()),
+        "requests": kinds,
+        "stages": {name: summarize(seconds) for name, seconds in sorted(stages.items())},
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--url", help="running API to drive; default: in-process stub server")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hit-ratio", type=float, default=0.7, help="share of synthesis requests that hit")
+    parser.add_argument("--news-ratio", type=float, default=0.2, help="share of requests to /api/fetch-news")
+    parser.add_argument("--hot-texts", type=int, default=10, help="distinct texts the hits cycle through")
+    parser.add_argument("--format", default="wav", choices=["wav", "opus", "mp3"])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stub-base-ms", type=float, default=50.0)
+    parser.add_argument("--stub-ms-per-char", type=float, default=1.0)
+    parser.add_argument("--batch-size", type=int, default=8, help="TTS_BATCH_MAX_SIZE for the stub server")
+
+
+def run(args):
+    """Run the load test described by parsed args; returns the result dict"""
+    headlines = load_headlines()
+    hot, plan = plan_requests(headlines, args.requests, args.hit_ratio, args.news_ratio,
+                              args.hot_texts, args.seed)
+    shutdown = None
+    base_url = args.url
+    if not base_url:
+        base_url, shutdown = start_local_server(args.stub_base_ms, args.stub_ms_per_char, args.batch_size)
+    try:
+        result = run_load(base_url.rstrip("/"), plan, hot, args.concurrency, args.format)
+    finally:
+        if shutdown:
+            shutdown()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "func")}
+    config["server"] = "external" if args.url else "in-process stub"
+    result["config"] = config
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(f"{args.requests} requests, concurrency {args.concurrency}: "
+          f"{result['throughput_rps']} req/s, {result['errors']} errors", file=sys.stderr)
+    for kind, summary in result["requests"].items():
+        print(f"  {kind:<16} n={summary['count']:<5} p50 {summary['p50_ms']:9.1f} ms   "
+              f"p99 {summary['p99_ms']:9.1f} ms", file=sys.stderr)
+    write_result({"environment": environment(), "load": result}, args.output)
+
+
+if __name__ == "__main__":
+    main()
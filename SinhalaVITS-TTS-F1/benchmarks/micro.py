@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks: romanization, text validation and news page parsing on the fixtures.
+
+Each benchmark runs its inputs --repeat times and reports the best and
+median time per operation.
+
+Usage:
+    python -m benchmarks.micro [--repeat 30] [--output micro.json]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.report import environment, load_headlines, read_fixture, write_result  # noqa: E402
+
+# Rejected inputs take a different path through validate_sinhala_text
+INVALID_TEXTS = [
+    "",
+    "   ",
+    "... !!",
+    "Breaking news from Colombo",
+    "Новости дня",
+    "ශ්‍රී ලංකා news 2025",
+]
+
+
+def time_op(func, inputs, repeat):
+    """Best and median microseconds per call of func over inputs"""
+    for item in inputs[:3]:
+        func(item)  # warm
+    per_op = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        per_op.append((time.perf_counter() - start) / len(inputs))
+    best = min(per_op)
+    return {
+        "inputs": len(inputs),
+        "repeat": repeat,
+        "us_per_op_min": round(best * 1e6, 3),
+        "us_per_op_median": round(statistics.median(per_op) * 1e6, 3),
+        "ops_per_sec": round(1.0 / best, 1),
+    }
+
+
+def run(repeat=30):
+    """Run every micro-benchmark; returns {name: timings}"""
+    # app.py builds its caches and pools at import; keep it from loading the model
+    os.environ.setdefault("MODEL_EAGER_LOAD", "0")
+    os.environ.setdefault("PRERENDER_ENABLED", "0")
+    os.environ.setdefault("AUDIO_STORE_DIR", "")
+
+    from romanizer import sinhala_to_roman
+    from news_scraper import parse_adaderana_html
+    from news_crawler import parse_article_html
+    from app import validate_sinhala_text
+
+    headlines = load_headlines()
+    hot_news = read_fixture("adaderana_hot_news.html")
+    article = read_fixture("adaderana_article.html")
+
+    return {
+        "sinhala_to_roman": time_op(sinhala_to_roman, headlines, repeat),
+        "validate_sinhala_text": time_op(validate_sinhala_text, headlines, repeat),
+        "validate_sinhala_text_invalid": time_op(validate_sinhala_text, INVALID_TEXTS, repeat),
+        "parse_adaderana_html": time_op(parse_adaderana_html, [hot_news], repeat),
+        "parse_article_html": time_op(parse_article_html, [article], repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", default="-", help="JSON file, or - for stdout")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, timing in results.items():
+        print(f"{name:<32} {timing['us_per_op_min']:12.2f} us/op (median {timing['us_per_op_median']:.2f})",
+              file=sys.stderr)
+    write_result({"environment": environment(), "micro": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark suite: latency summaries and JSON results
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name, mode="rb"):
+    with open(os.path.join(FIXTURES, name), mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        return f.read()
+
+
+def load_headlines():
+    return [line.strip() for line in read_fixture("adaderana_headlines.txt", "r").splitlines() if line.strip()]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def cosine_similarity(a, b):
+    """Cosine similarity of two waveforms over their common length"""
+    import numpy as np
+
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n = min(len(a), len(b))
+    if n == 0:
+        return 0.0
+    a, b = a[:n], b[:n]
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def summarize(seconds):
+    """Latency summary in milliseconds"""
+    if not seconds:
+        return {"count": 0}
+    return {
+        "count": len(seconds),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1e3, 3),
+        "p50_ms": round(percentile(seconds, 50) * 1e3, 3),
+        "p90_ms": round(percentile(seconds, 90) * 1e3, 3),
+        "p99_ms": round(percentile(seconds, 99) * 1e3, 3),
+        "max_ms": round(max(seconds) * 1e3, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    """Where and when the numbers were taken"""
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_result(result, path):
+    """Write result as JSON to path ("-" for stdout)"""
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if path == "-":
+        sys.stdout.write(text + "\n")
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"Wrote {path}", file=sys.stderr)
@@ -0,0 +1,76 @@
+"""
+Deterministic stand-in for the Coqui Synthesizer, for load tests without the checkpoint
+
+Serve with INFERENCE_BACKEND=stub. Each call sleeps for
+base_ms + ms_per_char * characters (time.sleep releases the GIL like torch
+does), and the waveform is a tone whose pitch and length depend only on the
+text, so cache keys, audio sizes and encoder work are the same on every run.
+"""
+
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from batch_scheduler import SENTENCE_GAP_SAMPLES
+from streaming import pcm16, wav_header
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+class StubSynthesizer:
+    """
+    Provides the parts of Synthesizer the API uses (tts, tts_batch,
+    split_into_sentences, save_wav, output_sample_rate).
+
+    Args:
+        base_ms: Fixed cost per model call (a batch is one call)
+        ms_per_char: Added cost per romanized character
+        seconds_per_char: Audio produced per romanized character
+        sample_rate: Output sample rate
+    """
+
+    name = "stub"
+
+    def __init__(self, base_ms=50.0, ms_per_char=1.0, seconds_per_char=0.06, sample_rate=22050):
+        self.base_ms = base_ms
+        self.ms_per_char = ms_per_char
+        self.seconds_per_char = seconds_per_char
+        self.output_sample_rate = sample_rate
+        self.calls = 0
+
+    def split_into_sentences(self, text):
+        return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+    def _waveform(self, sentence):
+        digest = hashlib.sha1(sentence.encode("utf-8")).digest()
+        pitch = 110 + digest[0] % 120
+        samples = max(1, int(len(sentence) * self.seconds_per_char * self.output_sample_rate))
+        t = np.arange(samples) / float(self.output_sample_rate)
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t + digest[1] / 40.0)
+        return (0.3 * envelope * np.sin(2 * np.pi * pitch * t)).astype(np.float32)
+
+    def _render(self, text):
+        wav = []
+        for sentence in self.split_into_sentences(text):
+            wav += self._waveform(sentence).tolist()
+            wav += [0] * SENTENCE_GAP_SAMPLES
+        return wav
+
+    def tts(self, text):
+        return self.tts_batch([text])[0]
+
+    def tts_batch(self, texts):
+        self.calls += 1
+        time.sleep((self.base_ms + self.ms_per_char * sum(len(text) for text in texts)) / 1000.0)
+        return [self._render(text) for text in texts]
+
+    def save_wav(self, wav, path):
+        pcm = pcm16(wav)
+        data = wav_header(self.output_sample_rate, data_size=len(pcm)) + pcm
+        if hasattr(path, "write"):
+            path.write(data)
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
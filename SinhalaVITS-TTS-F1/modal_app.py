@@ -8,7 +8,10 @@ import io
 import re
 import hashlib
 import json
+import asyncio
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -24,9 +27,21 @@ app = modal.App("sinhala-tts")  # Updated: embedded functions to fix import issu
 # Create a volume to store the model files (persistent storage)
 model_volume = modal.Volume.from_name("sinhala-tts-models", create_if_missing=True)
 
+# Optional shared Redis audio cache, taken from REDIS_URL at deploy time
+redis_secret = modal.Secret.from_dict({"REDIS_URL": os.environ.get("REDIS_URL", "")})
+
 # Create a volume to cache news data (persistent storage)
 news_cache_volume = modal.Volume.from_name("sinhala-tts-news-cache", create_if_missing=True)
 
+# Each synthesize container's singleflight counters, keyed by its task id, for
+# the health endpoint (which runs in containers of its own). A container
+# publishes at most every FLIGHT_STATS_INTERVAL seconds while it synthesizes;
+# entries older than FLIGHT_STATS_MAX_AGE (containers scaled down or idle)
+# are dropped by the health endpoint.
+flight_stats = modal.Dict.from_name("sinhala-tts-flight-stats", create_if_missing=True)
+FLIGHT_STATS_INTERVAL = 15
+FLIGHT_STATS_MAX_AGE = 600
+
 # News cache file path
 NEWS_CACHE_FILE = "/news_cache/latest_news.json"
 
@@ -35,99 +50,43 @@ image = (
     modal.Image.debian_slim(python_version="3.10")
     .apt_install("git", "ffmpeg")
     .pip_install(
-        "torch>=2.0.0",
+        "torch>=2.1.0",
         "TTS==0.20.0",
         "numpy",
-        "soundfile",
+        "soundfile>=0.13.0",
         "pydub",
         "fastapi>=0.104.0",
-        "beautifulsoup4>=4.12.0",
         "requests>=2.31.0",
         "lxml>=4.9.0",
         "huggingface-hub",
+        "redis>=5.0.0",
     )
     .env({"PYTHONPATH": "/root"})
+    .add_local_python_source(
+        "romanizer", "audio_cache", "singleflight", "batch_scheduler", "streaming", "prerender", "news_scraper",
+        "audio_encoding", "audio_store", "model_snapshot",
+    )
 )
 
-# Embed news_scraper and romanizer functions directly to avoid mounting issues
-# This ensures the code is always available in the Modal container
-
-# Romanizer function (from romanizer.py)
-def sinhala_to_roman(text):
-    """Convert Sinhala text to Romanized text."""
-    import re
-    ro_specials = [['ඓ', 'ai'], ['ඖ', 'au'], ['ඍ', 'ṛ'], ['ඎ', 'ṝ'], ['ඐ', 'ḹ'], ['අ', 'a'], ['ආ', 'ā'], ['ඇ', 'æ'], ['ඈ', 'ǣ'], ['ඉ', 'i'], ['ඊ', 'ī'], ['උ', 'u'], ['ඌ', 'ū'], ['එ', 'e'], ['ඒ', 'ē'], ['ඔ', 'o'], ['ඕ', 'ō'], ['ඞ්', 'ṅ'], ['ං', 'ṁ'], ['ඃ', 'ḥ']]
-    ro_consonants = [['ඛ', 'kh'], ['ඨ', 'ṭh'], ['ඝ', 'gh'], ['ඡ', 'ch'], ['ඣ', 'jh'], ['ඦ', 'ñj'], ['ඪ', 'ḍh'], ['ඬ', 'ṇḍ'], ['ථ', 'th'], ['ධ', 'dh'], ['ඵ', 'ph'], ['භ', 'bh'], ['ඹ', 'mb'], ['ඳ', 'ṉd'], ['ඟ', 'ṉg'], ['ඥ', 'gn'], ['ක', 'k'], ['ග', 'g'], ['ච', 'c'], ['ජ', 'j'], ['ඤ', 'ñ'], ['ට', 'ṭ'], ['ඩ', 'ḍ'], ['ණ', 'ṇ'], ['ත', 't'], ['ද', 'd'], ['න', 'n'], ['ප', 'p'], ['බ', 'b'], ['ම', 'm'], ['ය', 'y'], ['ර', 'r'], ['ල', 'l'], ['ව', 'v'], ['ශ', 'ś'], ['ෂ', 'ş'], ['ස', 's'], ['හ', 'h'], ['ළ', 'ḷ'], ['ෆ', 'f']]
-    ro_combinations = [['', '', '්'], ['', 'a', ''], ['', 'ā', 'ා'], ['', 'æ', 'ැ'], ['', 'ǣ', 'ෑ'], ['', 'i', 'ි'], ['', 'ī', 'ී'], ['', 'u', 'ු'], ['', 'ū', 'ූ'], ['', 'e', 'ෙ'], ['', 'ē', 'ේ'], ['', 'ai', 'ෛ'], ['', 'o', 'ො'], ['', 'ō', 'ෝ'], ['', 'ṛ', 'ෘ'], ['', 'ṝ', 'ෲ'], ['', 'au', 'ෞ']]
-    def create_conso_combi(combinations, consonants):
-        conso_combi = []
-        for combi in combinations:
-            for conso in consonants:
-                base_sinh = conso[0] + combi[2]
-                base_rom = combi[0] + conso[1] + combi[1]
-                conso_combi.append((base_sinh, base_rom))
-        return conso_combi
-    ro_conso_combi = create_conso_combi(ro_combinations, ro_consonants)
-    def replace_all(text, mapping):
-        mapping = sorted(mapping, key=lambda x: len(x[0]), reverse=True)
-        for sinh, rom in mapping:
-            text = re.sub(sinh, rom, text)
-        return text
-    text = text.replace("\u200D", "")
-    text = replace_all(text, ro_conso_combi)
-    text = replace_all(text, ro_specials)
-    return text
-
-# News scraper function (from news_scraper.py)  
+# Romanizer (from romanizer.py) is shipped with the image so its transliteration
+# table is compiled once per container instead of on every call
+from romanizer import sinhala_to_roman
+from audio_cache import create_audio_cache
+from singleflight import SingleFlight
+from batch_scheduler import InferenceScheduler, VitsBatchRunner
+from streaming import STREAM_PEAK, split_sentences, wav_header, pcm16
+from prerender import prerender
+from news_scraper import fetch_adaderana, get_sample_news
+from audio_encoding import WAV, EncoderPool, negotiate_format
+
+
 def scrape_adaderana():
-    """Scrape Ada Derana Sinhala hot news page."""
-    import requests
-    from bs4 import BeautifulSoup
-    from datetime import datetime, timedelta
-    import re
-    
-    ADA_DERANA_URL = "https://sinhala.adaderana.lk/sinhala-hot-news.php"
-    news_items = []
-    
+    """Scrape Ada Derana Sinhala hot news page (lxml engine from news_scraper.py)."""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36', 'Accept': 'text/html,application/xhtml+xml', 'Accept-Language': 'si,en-US,en;q=0.9'}
-        response = requests.get(ADA_DERANA_URL, headers=headers, timeout=15)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.content, 'html.parser')
-        news_headings = soup.find_all('h2')
-        
-        for idx, heading in enumerate(news_headings[:50]):
-            try:
-                title = heading.get_text(strip=True)
-                if not title or len(title) < 10 or title in ["උණුසුම් පුවත්", "Hot News", "Most Viewed"]:
-                    continue
-                parent = heading.find_parent(['div', 'article', 'section']) or heading
-                link_elem = heading.find('a', href=True) or (parent.find('a', href=True) if parent else None)
-                link = ""
-                if link_elem:
-                    link = link_elem.get('href', '')
-                    if link and not link.startswith('http'):
-                        link = f"https://sinhala.adaderana.lk{link}" if link.startswith('/') else f"https://sinhala.adaderana.lk/{link}"
-                time_str = ""
-                timestamp = None
-                time_pattern = re.compile(r'(December|January|February|March|April|May|June|July|August|September|October|November)\s+\d+,\s+\d+\s+\d+:\d+\s+(am|pm)', re.I)
-                search_area = parent if parent else heading
-                time_text = search_area.get_text()
-                time_match = time_pattern.search(time_text)
-                if time_match:
-                    time_str = time_match.group(0).strip()
-                    timestamp = parse_time_string(time_str)
-                category = "උණුසුම් පුවත්"
-                is_breaking = any(word in title for word in ["විශේෂ", "බිඳී", "උත්තරීතර"])
-                news_items.append({"id": idx + 1, "title": title, "link": link or f"{ADA_DERANA_URL}#{idx}", "time": time_str or "මෑතකදී", "timestamp": timestamp.isoformat() if timestamp else datetime.now().isoformat(), "category": category, "isBreaking": is_breaking, "text": title})
-            except Exception as e:
-                logger.warning(f"Error parsing article {idx}: {str(e)}")
-                continue
-        
+        news_items = fetch_adaderana()
         if not news_items:
-            now = datetime.now()
-            news_items = [{"id": 1, "title": "ශ්‍රී ලංකාවේ ආර්ථික ප්‍රතිසංස්කරණ", "link": "https://www.adaderana.lk/news/1", "time": "1:24 pm today", "timestamp": now.replace(hour=13, minute=24).isoformat(), "category": "ව්‍යාපාරික", "isBreaking": False, "text": "ශ්‍රී ලංකාවේ ආර්ථික ප්‍රතිසංස්කරණ"}]
+            logger.warning("No news items scraped, returning sample data")
+            news_items = get_sample_news()
         
         logger.info(f"Scraped {len(news_items)} news items")
         return {"success": True, "count": len(news_items), "items": news_items, "timestamp": datetime.now().isoformat()}
@@ -135,59 +94,28 @@ def scrape_adaderana():
         logger.error(f"Error scraping: {str(e)}")
         return {"success": False, "error": str(e), "items": [], "count": 0, "timestamp": datetime.now().isoformat()}
 
-def parse_time_string(time_str):
-    """Parse time strings like 'December 30, 2025 2:15 pm'."""
-    if not time_str:
-        return None
-    time_str = time_str.strip()
-    now = datetime.now()
-    date_time_match = re.search(r'(\w+)\s+(\d+),\s+(\d+)\s+(\d{1,2}):(\d{2})\s*(am|pm)', time_str, re.I)
-    if date_time_match:
-        month_name, day, year, hour, minute, ampm = date_time_match.groups()
-        month_map = {'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6, 'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12}
-        month = month_map.get(month_name.lower(), now.month)
-        hour, minute = int(hour), int(minute)
-        if ampm == "pm" and hour != 12:
-            hour += 12
-        elif ampm == "am" and hour == 12:
-            hour = 0
-        try:
-            return datetime(int(year), month, int(day), hour, minute)
-        except:
-            pass
-    time_str_lower = time_str.lower()
-    if "today" in time_str_lower or "අද" in time_str:
-        time_match = re.search(r'(\d{1,2}):(\d{2})\s*(am|pm)', time_str_lower)
-        if time_match:
-            hour, minute, ampm = int(time_match.group(1)), int(time_match.group(2)), time_match.group(3)
-            if ampm == "pm" and hour != 12:
-                hour += 12
-            elif ampm == "am" and hour == 12:
-                hour = 0
-            return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    hours_ago = re.search(r'(\d+)\s*(hour|hours|පැය)', time_str_lower)
-    if hours_ago:
-        return now - timedelta(hours=int(hours_ago.group(1)))
-    minutes_ago = re.search(r'(\d+)\s*(minute|minutes|මිනිත්තු)', time_str_lower)
-    if minutes_ago:
-        return now - timedelta(minutes=int(minutes_ago.group(1)))
-    if "yesterday" in time_str_lower or "ඊයේ" in time_str:
-        return now - timedelta(days=1)
-    return now
-
 # Files are copied into the image at /root/, so imports will work in Modal container
 # We don't import here to avoid errors during local development
 
 # Model paths
 MODEL_PATH = "/models/Nipunika_210000.pth"
 CONFIG_PATH = "/models/Nipunika_config.json"
+# Inference-only, memory-mapped copy of the checkpoint written by upload_model
+# (see model_snapshot.py); a container loads it instead when present
+MODEL_SNAPSHOT_PATH = "/models/Nipunika_210000.snapshot.pt"
 
 # Sinhala Unicode range
 SINHALA_UNICODE_RANGE = re.compile(r'[\u0D80-\u0DFF\s\.,!?;:\-\(\)\[\]"]+')
 
-# In-memory cache (per container)
-audio_cache = {}
+# Audio cache: Redis shared by all containers when REDIS_URL is set (see
+# redis_secret), otherwise a bounded in-memory LRU per container
 CACHE_EXPIRY_HOURS = 24
+CACHE_MAX_MB = 512
+audio_cache = create_audio_cache(
+    redis_url=os.environ.get("REDIS_URL"),
+    max_bytes=CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=CACHE_EXPIRY_HOURS * 3600,
+)
 
 
 def validate_sinhala_text(text):
@@ -217,25 +145,32 @@ def get_text_hash(text):
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
 
-def get_cached_audio(text):
-    """Get cached audio if available and not expired"""
+def get_cache_key(text, fmt=WAV):
+    """Cache key for text in fmt; plain text hash for WAV"""
     text_hash = get_text_hash(text)
-    if text_hash in audio_cache:
-        audio_bytes, timestamp = audio_cache[text_hash]
-        if datetime.now() - timestamp < timedelta(hours=CACHE_EXPIRY_HOURS):
-            logger.info(f"Cache hit for text hash: {text_hash[:8]}...")
-            return audio_bytes
-        else:
-            del audio_cache[text_hash]
-            logger.info(f"Cache expired for text hash: {text_hash[:8]}...")
-    return None
+    if fmt.codec == "wav":
+        return text_hash
+    return f"{text_hash}.{fmt.key}"
 
 
-def cache_audio(text, audio_bytes):
-    """Cache audio bytes with timestamp"""
-    text_hash = get_text_hash(text)
-    audio_cache[text_hash] = (audio_bytes, datetime.now())
-    logger.info(f"Cached audio for text hash: {text_hash[:8]}... (Cache size: {len(audio_cache)})")
+def get_cached_audio(text, fmt=WAV):
+    """Get cached audio if available and not expired"""
+    cache_key = get_cache_key(text, fmt)
+    audio_bytes = audio_cache.get(cache_key)
+    if audio_bytes is not None:
+        logger.info(f"Cache hit for key: {cache_key[:8]}... ({fmt.key})")
+    return audio_bytes
+
+
+def cache_audio(text, audio_bytes, fmt=WAV):
+    """Cache audio bytes, evicting least recently used entries over budget"""
+    cache_key = get_cache_key(text, fmt)
+    if audio_cache.put(cache_key, audio_bytes):
+        logger.info(f"Cached audio for key: {cache_key[:8]}... ({fmt.key}, {audio_cache.name} cache)")
+
+
+# Opus/MP3 output is re-encoded from the cached WAV on warm encoder threads
+encoder_pool = EncoderPool(max_workers=4)
 
 
 # Global synthesizer (loaded once per container)
@@ -243,10 +178,45 @@ synth = None
 model_loaded = False
 model_load_error = None
 
+# Concurrent requests for the same text in this container share one synthesis;
+# different texts arriving together are micro-batched on the GPU
+synthesis_flight = SingleFlight()
+synth_lock = threading.Lock()
+synth_scheduler = None
+BATCH_MAX_SIZE = 16
+BATCH_MAX_WAIT_MS = 15
+
+
+flight_stats_pending = False
+
+
+def publish_flight_stats():
+    """Record this container's synthesis_flight.stats(), timestamped, in flight_stats"""
+    global flight_stats_pending
+    flight_stats_pending = False
+    try:
+        flight_stats[os.environ.get("MODAL_TASK_ID", "local")] = {**synthesis_flight.stats(), "updated": time.time()}
+    except Exception as e:
+        logger.warning(f"Could not publish singleflight stats: {e}")
+
+
+def schedule_flight_stats():
+    """
+    Publish the counters FLIGHT_STATS_INTERVAL seconds from now unless a
+    publish is already scheduled, so a burst of syntheses costs one write
+    and the last one is always included. Call from the event loop.
+    """
+    global flight_stats_pending
+    if flight_stats_pending:
+        return
+    flight_stats_pending = True
+    loop = asyncio.get_running_loop()
+    loop.call_later(FLIGHT_STATS_INTERVAL, lambda: loop.run_in_executor(None, publish_flight_stats))
+
 
 def load_model():
     """Load the TTS model."""
-    global synth, model_loaded, model_load_error
+    global synth, synth_scheduler, model_loaded, model_load_error
     
     if model_loaded:
         return True
@@ -266,7 +236,9 @@ def load_model():
         logger.info(f"PyTorch version: {torch.__version__}")
         logger.info(f"CUDA available: {torch.cuda.is_available()}")
         
-        if not os.path.exists(MODEL_PATH):
+        # A volume may hold only the snapshot; the checkpoint is needed without one
+        has_checkpoint = os.path.exists(MODEL_PATH)
+        if not has_checkpoint and not os.path.exists(MODEL_SNAPSHOT_PATH):
             model_load_error = f"Model file not found: {MODEL_PATH}"
             raise FileNotFoundError(model_load_error)
         
@@ -274,19 +246,36 @@ def load_model():
             model_load_error = f"Config file not found: {CONFIG_PATH}"
             raise FileNotFoundError(model_load_error)
         
-        logger.info(f"Loading model from {MODEL_PATH}...")
         use_cuda = torch.cuda.is_available()
         device = "cuda" if use_cuda else "cpu"
         logger.info(f"Using device: {device}")
         
-        logger.info("Creating Synthesizer instance...")
-        synth = Synthesizer(
-            tts_checkpoint=MODEL_PATH,
-            tts_config_path=CONFIG_PATH,
-            use_cuda=use_cuda
-        )
+        synth = None
+        if os.path.exists(MODEL_SNAPSHOT_PATH):
+            from model_snapshot import StaleSnapshotError, load_snapshot
+            
+            logger.info(f"Loading model snapshot from {MODEL_SNAPSHOT_PATH}...")
+            try:
+                synth = load_snapshot(MODEL_SNAPSHOT_PATH, CONFIG_PATH, use_cuda=use_cuda,
+                                      source_checkpoint=MODEL_PATH if has_checkpoint else None)
+            except StaleSnapshotError as e:
+                logger.warning(f"Ignoring stale model snapshot: {e}. Run upload_model to rewrite it")
+        if synth is None:
+            logger.info(f"Loading model from {MODEL_PATH}...")
+            logger.info("Creating Synthesizer instance...")
+            synth = Synthesizer(
+                tts_checkpoint=MODEL_PATH,
+                tts_config_path=CONFIG_PATH,
+                use_cuda=use_cuda
+            )
         logger.info("Synthesizer created successfully")
         
+        synth_scheduler = InferenceScheduler(
+            VitsBatchRunner(synth).tts_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
+        
         model_loaded = True
         model_load_error = None
         logger.info("Model loaded successfully!")
@@ -303,23 +292,104 @@ def load_model():
         return False
 
 
+def synthesize_wav(text):
+    """Romanize and synthesize text, returning the raw waveform."""
+    # Romanize Sinhala text (precompiled engine from romanizer.py)
+    try:
+        romanized = sinhala_to_roman(text)
+        logger.info(f"Romanized text: {romanized[:50]}...")
+    except Exception as e:
+        logger.warning(f"Romanization failed: {e}, using original text")
+        romanized = text
+    
+    # Generate audio
+    logger.info(f"Generating audio for text: {text[:50]}...")
+    if synth_scheduler is not None:
+        return synth_scheduler.tts(romanized)
+    with synth_lock:
+        return synth.tts(romanized)
+
+
+def render_audio(text):
+    """Romanize, synthesize and encode text to WAV bytes, then cache them."""
+    import soundfile as sf
+    import numpy as np
+    
+    wav = synthesize_wav(text)
+    
+    # Ensure wav is numpy array
+    if isinstance(wav, list):
+        wav = np.array(wav)
+    
+    # Convert to bytes
+    audio_buffer = io.BytesIO()
+    sf.write(audio_buffer, wav, synth.output_sample_rate, format='WAV')
+    audio_bytes = audio_buffer.getvalue()
+    
+    # Cache the audio
+    cache_audio(text, audio_bytes)
+    return audio_bytes
+
+
+def render_encoded_audio(text, fmt):
+    """Audio for text in fmt, re-encoded from the (cached or new) WAV, then cached."""
+    if fmt.codec == "wav":
+        return render_audio(text)
+    wav_bytes = get_cached_audio(text)
+    if not wav_bytes:
+        wav_bytes, _ = synthesis_flight.do(get_text_hash(text), render_audio, text)
+    audio_bytes = encoder_pool.encode(wav_bytes, fmt)
+    cache_audio(text, audio_bytes, fmt)
+    return audio_bytes
+
+
+def stream_audio(text):
+    """
+    Stream a WAV header, then PCM for each sentence as soon as it is synthesized.
+    The stream isn't cached: render_audio's file for the same text is split,
+    gapped and scaled differently.
+    """
+    from fastapi.responses import StreamingResponse
+    
+    chunks = split_sentences(text)
+    sample_rate = synth.output_sample_rate
+    
+    async def generate():
+        yield wav_header(sample_rate)
+        for idx, chunk in enumerate(chunks):
+            try:
+                wav = await asyncio.to_thread(synthesize_wav, chunk)
+            except Exception as e:
+                # Headers are already sent; end the stream early
+                logger.error(f"Streaming synthesis failed at chunk {idx + 1}/{len(chunks)}: {e}")
+                return
+            yield pcm16(wav, peak=STREAM_PEAK)
+    
+    return StreamingResponse(generate(), media_type="audio/wav", headers={"Cache-Control": "no-cache"})
+
+
 @app.function(
     image=image,
     gpu="T4",  # Use T4 GPU for faster inference (free tier supports T4)
     volumes={"/models": model_volume},
+    secrets=[redis_secret],
     timeout=300,  # 5 minute timeout
     min_containers=1,  # Keep 1 container warm to reduce cold starts
 )
+@modal.concurrent(max_inputs=16)  # Let duplicate requests reach the same container
 @modal.fastapi_endpoint(method="POST", label="synthesize")
 async def synthesize(request_body: dict):
     """
     Synthesize Sinhala text to speech.
     
     Args:
-        request_body: JSON request body with 'text' field
+        request_body: JSON request body with 'text' field and optional
+            'stream': true to stream the audio sentence by sentence, and
+            'format' ("wav", "opus", "mp3"), 'quality' ("high", "medium",
+            "low"), 'bitrate' (kbps) and 'sample_rate' (Hz)
         
     Returns:
-        Audio file as bytes
+        Audio file as bytes, or a streamed WAV when 'stream' is set
     """
     try:
         # Parse JSON body
@@ -341,13 +411,27 @@ async def synthesize(request_body: dict):
                 status_code=400,
             )
         
+        try:
+            fmt = negotiate_format(
+                requested=request_body.get("format"),
+                quality=request_body.get("quality"),
+                bitrate=request_body.get("bitrate"),
+                sample_rate=request_body.get("sample_rate"),
+            )
+        except ValueError as e:
+            from fastapi.responses import JSONResponse
+            return JSONResponse(
+                content={"error": str(e)},
+                status_code=400,
+            )
+        
         # Check cache first
-        cached_audio = get_cached_audio(text)
+        cached_audio = get_cached_audio(text, fmt)
         if cached_audio:
             from fastapi.responses import Response
             return Response(
                 content=cached_audio,
-                media_type="audio/wav",
+                media_type=fmt.mimetype,
             )
         
         # Load model if not loaded
@@ -387,37 +471,20 @@ async def synthesize(request_body: dict):
                 status_code=500,
             )
         
-        # Romanize Sinhala text (function is embedded above)
-        try:
-            romanized = sinhala_to_roman(text)
-            logger.info(f"Romanized text: {romanized[:50]}...")
-        except Exception as e:
-            logger.warning(f"Romanization failed: {e}, using original text")
-            romanized = text
-        
-        # Generate audio
-        logger.info(f"Generating audio for text: {text[:50]}...")
-        wav = synth.tts(romanized)
-        
-        # Convert to bytes
-        audio_buffer = io.BytesIO()
-        import soundfile as sf
-        import numpy as np
-        
-        # Ensure wav is numpy array
-        if isinstance(wav, list):
-            wav = np.array(wav)
+        if isinstance(request_body, dict) and request_body.get("stream"):
+            return stream_audio(text)
         
-        sf.write(audio_buffer, wav, synth.output_sample_rate, format='WAV')
-        audio_bytes = audio_buffer.getvalue()
-        
-        # Cache the audio
-        cache_audio(text, audio_bytes)
+        # Synthesize off the event loop; identical concurrent requests coalesce
+        audio_bytes, _ = await asyncio.to_thread(
+            synthesis_flight.do, get_cache_key(text, fmt), render_encoded_audio, text, fmt
+        )
+        # Leaders and shared results both move the counters; published off the response path
+        schedule_flight_stats()
         
         from fastapi.responses import Response
         return Response(
             content=audio_bytes,
-            media_type="audio/wav",
+            media_type=fmt.mimetype,
         )
         
     except Exception as e:
@@ -436,10 +503,30 @@ async def synthesize(request_body: dict):
 )
 @modal.fastapi_endpoint(method="GET", label="health")
 def health():
-    """Health check endpoint."""
+    """
+    Health check endpoint, with singleflight deduplication summed over the
+    synthesize containers that published in the last FLIGHT_STATS_MAX_AGE seconds.
+    """
+    try:
+        now = time.time()
+        containers = []
+        for task_id, stats in list(flight_stats.items()):
+            if now - stats.get("updated", 0) > FLIGHT_STATS_MAX_AGE:
+                flight_stats.pop(task_id)
+            else:
+                containers.append(stats)
+        singleflight = {
+            "deduplicated": sum(stats["deduplicated"] for stats in containers),
+            "leaders": sum(stats["leaders"] for stats in containers),
+            "containers": len(containers),
+        }
+    except Exception as e:
+        logger.warning(f"Could not read singleflight stats: {e}")
+        singleflight = None
     return {
         "status": "healthy",
         "model_loaded": model_loaded,
+        "singleflight": singleflight,
         "timestamp": datetime.now().isoformat(),
     }
 
@@ -502,20 +589,72 @@ def fetch_news():
         return {"success": False, "error": str(e), "items": []}, 500
 
 
+# Parallel requests the pre-render pipeline sends to the synthesize endpoint
+PRERENDER_WORKERS = 4
+
+
+def load_previous_news_texts():
+    """Texts from the last saved scrape, regardless of cache age."""
+    try:
+        if os.path.exists(NEWS_CACHE_FILE):
+            with open(NEWS_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return {item.get("text", "") for item in json.load(f).get("items", [])}
+    except Exception as e:
+        logger.warning(f"Error reading previous news cache: {e}")
+    return set()
+
+
+def prerender_news(texts):
+    """
+    Send texts to the synthesize endpoint so the serving containers (and the
+    Redis cache, if configured) are warm before anyone presses play.
+    """
+    import requests
+    
+    url = synthesize.get_web_url()
+    session = requests.Session()
+    
+    def render(text):
+        response = session.post(url, json={"text": text}, timeout=300)
+        response.raise_for_status()
+    
+    def cached_texts(candidates):
+        # Only a shared (Redis) cache is visible from this container
+        if audio_cache.name != "redis":
+            return set()
+        hashes = {get_text_hash(text): text for text in candidates}
+        return {hashes[h] for h in audio_cache.get_many(hashes)}
+    
+    return prerender(texts, render, cached_texts=cached_texts, max_workers=PRERENDER_WORKERS)
+
+
 @app.function(
     image=image,
     volumes={"/news_cache": news_cache_volume},
-    timeout=120,
+    secrets=[redis_secret],
+    timeout=900,  # scraping plus pre-rendering new headlines
     schedule=modal.Period(hours=3),  # Every 3 hours
 )
 def scheduled_news_scraper():
-    """Scheduled function that runs every 3 hours to scrape and cache news."""
+    """
+    Scheduled function that runs every 3 hours to scrape and cache news,
+    then pre-renders audio for headlines that weren't in the previous scrape.
+    """
     try:
         logger.info("Scheduled news scraping started...")
+        previous_texts = load_previous_news_texts()
         result = scrape_adaderana()
         if result.get("success"):
             save_news_to_cache(result)
             logger.info(f"Scheduled scraping completed: {result.get('count', 0)} items cached")
+            
+            new_texts = [item["text"] for item in result.get("items", []) if item.get("text") not in previous_texts]
+            logger.info(f"{len(new_texts)} new headlines since the last scrape")
+            try:
+                result["prerender"] = prerender_news(new_texts)
+            except Exception as e:
+                logger.error(f"Pre-render failed: {e}")
+                result["prerender"] = {"error": str(e)}
         else:
             logger.error(f"Scheduled scraping failed: {result.get('error', 'Unknown error')}")
         return result
@@ -598,6 +737,19 @@ def upload_model():
     else:
         print(f"Config file already exists at {config_file}")
     
+    # Inference-only snapshot for fast container starts (see model_snapshot.py)
+    snapshot_file = model_dir / "Nipunika_210000.snapshot.pt"
+    if model_file.exists() and config_file.exists():
+        try:
+            from model_snapshot import write_snapshot
+            print("Writing model snapshot...")
+            sizes = write_snapshot(str(model_file), str(config_file), str(snapshot_file))
+            print(f"Snapshot written: {sizes}")
+        except Exception as e:
+            # containers still start from the checkpoint
+            print(f"Failed to write model snapshot: {e}")
+            logger.error(f"Failed to write model snapshot: {e}")
+    
     # Verify files exist before committing
     if model_file.exists() and config_file.exists():
         print(f"Both files exist. Model size: {model_file.stat().st_size / (1024*1024):.2f} MB")
@@ -0,0 +1,141 @@
+"""
+Background model loading and warm-up, with state for liveness/readiness checks
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelLoader:
+    """
+    Runs load() and then warm_up() once on a daemon thread.
+
+    Request handlers call wait() with a timeout instead of loading the model
+    themselves, and health checks read status(), which never blocks. After a
+    failed load, start() tries again, at most once per retry_interval seconds.
+
+    Args:
+        load: Callable returning True once the model is loaded
+        warm_up: Optional callable run after a successful load; it returns
+            per-item timings for status() and its errors don't block readiness
+        retry_interval: Minimum seconds between load attempts after a failure
+    """
+
+    def __init__(self, load, warm_up=None, retry_interval=60):
+        self.load = load
+        self.warm_up = warm_up
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self.state = IDLE
+        self.error = None
+        self.attempts = 0
+        self.started_at = None
+        self.ready_at = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.warmup = None
+        self._last_attempt = None
+
+    def start(self, background=True):
+        """
+        Start loading unless a load is running, done, or failed too recently.
+        background=False loads and warms up in the calling thread, and returns
+        once that is done.
+        """
+        with self._lock:
+            if self.state in (LOADING, WARMING, READY):
+                return
+            if (self.state == FAILED and self._last_attempt is not None
+                    and time.monotonic() - self._last_attempt < self.retry_interval):
+                return
+            self.state = LOADING
+            self.error = None
+            self.attempts += 1
+            self.started_at = datetime.now()
+            self._last_attempt = time.monotonic()
+            self._done.clear()
+            if background:
+                self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+                self._thread.start()
+        if not background:
+            self._run()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            loaded = self.load()
+        except Exception as e:
+            loaded = False
+            self.error = str(e)
+        self.load_seconds = round(time.perf_counter() - start, 3)
+
+        if not loaded:
+            with self._lock:
+                self.state = FAILED
+                self.error = self.error or "Model failed to load"
+            logger.error(f"Model load failed after {self.load_seconds}s: {self.error}")
+            self._done.set()
+            return
+
+        logger.info(f"Model loaded in {self.load_seconds}s")
+        if self.warm_up is not None:
+            with self._lock:
+                self.state = WARMING
+            start = time.perf_counter()
+            try:
+                self.warmup = self.warm_up()
+            except Exception as e:
+                logger.warning(f"Warm-up failed, serving anyway: {str(e)}")
+                self.warmup = {"error": str(e)}
+            self.warmup_seconds = round(time.perf_counter() - start, 3)
+            logger.info(f"Warm-up finished in {self.warmup_seconds}s")
+
+        with self._lock:
+            self.state = READY
+            self.ready_at = datetime.now()
+        self._ready.set()
+        self._done.set()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Start loading if needed and wait up to timeout seconds for it.
+
+        Returns:
+            bool: True if the model is ready
+        """
+        if self._ready.is_set():
+            return True
+        self.start()
+        self._done.wait(timeout)
+        return self._ready.is_set()
+
+    def status(self):
+        """Snapshot for health endpoints; never starts or waits on a load"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "ready": self.state == READY,
+                "error": self.error,
+                "attempts": self.attempts,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "ready_at": self.ready_at.isoformat() if self.ready_at else None,
+                "load_seconds": self.load_seconds,
+                "warmup_seconds": self.warmup_seconds,
+                "warmup": self.warmup,
+            }
@@ -0,0 +1,270 @@
+"""
+Synthesis replicas forked from one loaded model.
+
+The weights are loaded once in the serving process, which then forks the
+replicas. Inference never writes to the weights, so the children keep
+sharing the parent's tensor pages copy-on-write and N replicas cost little
+more memory than one. Each replica is pinned to its own slice of the CPUs
+with a matching torch.set_num_threads, so replicas don't fight over cores.
+
+The forks must happen before the process starts any other thread (encoder
+pool, news refresher, background model loader, request threads): fork
+copies only the calling thread, so a lock another thread held at that
+moment (a logging handler's, the allocator's, a C library's) would stay
+locked in every replica. ModelPool.start() refuses to fork otherwise.
+"""
+
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_slices(replicas, threads_per_replica=0, cpus=None):
+    """
+    Split the CPUs this process may run on into one slice per replica.
+
+    Slices are contiguous, so a replica's threads share caches (and, on
+    hosts that number them that way, SMT siblings). threads_per_replica=0
+    divides the CPUs evenly; asking for more CPUs than there are wraps
+    around, and the slices overlap.
+    """
+    cpus = sorted(os.sched_getaffinity(0) if cpus is None else cpus)
+    per_replica = threads_per_replica or max(1, len(cpus) // replicas)
+    return [[cpus[(index * per_replica + i) % len(cpus)] for i in range(per_replica)]
+            for index in range(replicas)]
+
+
+def _replica_main(index, run_batch, cpus, conn, warmup_texts):
+    """Replica process: warm up, then run batches from conn until the parent goes away"""
+    import numpy as np
+
+    # Ctrl-C on the dev server reaches the whole process group; the parent's exit ends us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+
+        torch.set_num_threads(len(cpus) or 1)
+    except ImportError:
+        pass
+
+    warmup = []
+    for text in warmup_texts:
+        start = time.perf_counter()
+        try:
+            run_batch([text])
+        except Exception as e:
+            logger.warning(f"Replica {index} warm-up failed: {str(e)}")
+        warmup.append({"chars": len(text), "seconds": round(time.perf_counter() - start, 3)})
+    conn.send(("ready", warmup, None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        job_id, texts = message
+        try:
+            # float32 arrays pickle ~10x smaller than lists of numpy scalars
+            wavs = [np.asarray(wav, dtype=np.float32) for wav in run_batch(texts)]
+            conn.send((job_id, wavs, None))
+        except Exception as e:
+            conn.send((job_id, None, f"{type(e).__name__}: {str(e)}"))
+    conn.close()
+
+
+class _Replica:
+    __slots__ = ("index", "cpus", "process", "conn", "send_lock", "pending", "load_chars", "batches",
+                 "alive", "warmup")
+
+    def __init__(self, index, cpus):
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.send_lock = threading.Lock()
+        # job id -> (Future, chars)
+        self.pending = {}
+        self.load_chars = 0
+        self.batches = 0
+        self.alive = False
+        self.warmup = None
+
+
+class ModelPool:
+    """
+    Forked model replicas behind a least-loaded dispatcher.
+
+    start() forks the replicas from the calling process, which must already
+    hold the loaded model that run_batch uses, must not have run inference
+    yet (an OpenMP thread pool doesn't survive fork), and must not be running
+    any other thread. tts_batch()
+    sends a batch to the live replica with the fewest characters
+    outstanding and blocks until its waveforms come back, so several
+    callers (e.g. InferenceScheduler workers) keep all replicas busy.
+
+    Args:
+        run_batch: Callable taking a list of texts and returning one waveform each
+        replicas: Number of replica processes
+        threads_per_replica: CPUs (and torch threads) per replica; 0 splits them evenly
+        warmup_texts: Texts each replica synthesizes before it reports ready
+    """
+
+    def __init__(self, run_batch, replicas=2, threads_per_replica=0, warmup_texts=()):
+        self.run_batch = run_batch
+        self.warmup_texts = list(warmup_texts)
+        self._lock = threading.Lock()
+        self._ids = 0
+        self.replicas = [_Replica(index, cpus)
+                         for index, cpus in enumerate(cpu_slices(replicas, threads_per_replica))]
+
+    def start(self, timeout=600):
+        """
+        Fork every replica and wait until each has warmed up.
+
+        Raises:
+            RuntimeError: if another thread is running, or a replica fails to warm up
+        """
+        others = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+        if others:
+            raise RuntimeError(f"Model replicas must be forked before any other thread starts; "
+                               f"running: {', '.join(others)}")
+        context = multiprocessing.get_context("fork")
+        # Objects the children inherit stay out of their collector, whose
+        # bookkeeping writes would otherwise un-share those pages
+        gc.collect()
+        gc.freeze()
+        for replica in self.replicas:
+            parent_conn, child_conn = context.Pipe()
+            replica.process = context.Process(
+                target=_replica_main,
+                args=(replica.index, self.run_batch, replica.cpus, child_conn, self.warmup_texts),
+                name=f"tts-replica-{replica.index}",
+                daemon=True
+            )
+            replica.process.start()
+            child_conn.close()
+            replica.conn = parent_conn
+        gc.unfreeze()
+
+        deadline = time.monotonic() + timeout
+        for replica in self.replicas:
+            if not replica.conn.poll(max(0.0, deadline - time.monotonic())):
+                self.close()
+                raise RuntimeError(f"Replica {replica.index} did not warm up within {timeout}s")
+            try:
+                _, replica.warmup, _ = replica.conn.recv()
+            except EOFError:
+                self.close()
+                raise RuntimeError(f"Replica {replica.index} exited during warm-up "
+                                   f"(exit code {replica.process.exitcode})")
+            replica.alive = True
+            threading.Thread(target=self._read_results, args=(replica,),
+                             name=f"tts-replica-{replica.index}-results", daemon=True).start()
+        logger.info(f"Started {len(self.replicas)} model replicas on CPUs "
+                    f"{', '.join(','.join(map(str, replica.cpus)) for replica in self.replicas)}")
+
+    def tts_batch(self, texts):
+        """Synthesize texts on the least-loaded replica; returns one float32 waveform per text"""
+        chars = sum(len(text) for text in texts)
+        future = Future()
+        with self._lock:
+            live = [replica for replica in self.replicas if replica.alive]
+            if not live:
+                raise RuntimeError("No model replicas are running")
+            replica = min(live, key=lambda r: (r.load_chars, len(r.pending), r.index))
+            self._ids += 1
+            job_id = self._ids
+            replica.pending[job_id] = (future, chars)
+            replica.load_chars += chars
+        try:
+            with replica.send_lock:
+                replica.conn.send((job_id, texts))
+        except (OSError, ValueError) as e:
+            self._finish(replica, job_id)
+            raise RuntimeError(f"Replica {replica.index} is gone: {str(e)}")
+        return future.result()
+
+    def _finish(self, replica, job_id):
+        """Drop a job from replica's books; returns its Future, or None if already gone"""
+        with self._lock:
+            future, chars = replica.pending.pop(job_id, (None, 0))
+            replica.load_chars -= chars
+            if future is not None:
+                replica.batches += 1
+            return future
+
+    def _read_results(self, replica):
+        while True:
+            try:
+                job_id, wavs, error = replica.conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._finish(replica, job_id)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(f"Replica {replica.index}: {error}"))
+            else:
+                future.set_result(wavs)
+
+        # the replica died (or close() ran): fail whatever it still had
+        with self._lock:
+            replica.alive = False
+            pending = list(replica.pending.values())
+            replica.pending.clear()
+            replica.load_chars = 0
+        if replica.process is not None:
+            replica.process.join(timeout=1)
+            exitcode = replica.process.exitcode
+        else:
+            exitcode = None
+        if pending or exitcode not in (None, 0, -signal.SIGTERM):
+            logger.error(f"Model replica {replica.index} exited (exit code {exitcode})")
+        for future, _ in pending:
+            future.set_exception(RuntimeError(f"Model replica {replica.index} exited"))
+
+    def pids(self):
+        return [replica.process.pid for replica in self.replicas if replica.process is not None]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "alive": sum(1 for replica in self.replicas if replica.alive),
+                "per_replica": [{
+                    "index": replica.index,
+                    "pid": replica.process.pid if replica.process else None,
+                    "cpus": replica.cpus,
+                    "alive": replica.alive,
+                    "in_flight": len(replica.pending),
+                    "load_chars": replica.load_chars,
+                    "batches": replica.batches,
+                } for replica in self.replicas],
+            }
+
+    def close(self):
+        """Stop the replicas (they also exit on their own when this process does)"""
+        for replica in self.replicas:
+            if replica.conn is None:
+                continue
+            try:
+                with replica.send_lock:
+                    replica.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for replica in self.replicas:
+            if replica.process is not None:
+                replica.process.join(timeout=5)
+                if replica.process.is_alive():
+                    replica.process.terminate()
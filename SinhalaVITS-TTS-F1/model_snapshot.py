@@ -0,0 +1,178 @@
+"""
+Inference-only model snapshots for fast cold starts
+
+Write one once per checkpoint (needs torch and TTS):
+    python model_snapshot.py [--checkpoint Nipunika_210000.pth] [--config Nipunika_config.json]
+                             [--output Nipunika_210000.snapshot.pt]
+
+The training checkpoint also holds the optimizer state, the discriminator
+and the posterior encoder, none of which synthesis uses, and loading it
+builds a randomly initialised model, reads the whole file into memory and
+copies it over. A snapshot keeps only the weights inference runs, with
+weight norm folded into plain weights, in torch's zip format.
+load_snapshot() builds the model on the meta device (no allocation or
+init) and memory-maps the snapshot into it, so pages are read on first use
+and shared through the page cache by every process that maps the file.
+"""
+
+import argparse
+import itertools
+import logging
+import os
+
+import torch
+from TTS.config import load_config
+from TTS.utils.synthesizer import Synthesizer
+
+from audio_store import model_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = "Nipunika_210000.snapshot.pt"
+SNAPSHOT_FORMAT = 1
+
+# Submodules only training (or voice conversion) runs
+TRAINING_ONLY_MODULES = ("disc", "posterior_encoder")
+
+
+class StaleSnapshotError(ValueError):
+    """The snapshot was written from a different checkpoint than the one configured"""
+
+
+def build_vits(config, device=None):
+    """Vits.init_from_config, with the modules built on device (e.g. "meta")"""
+    from TTS.tts.models.vits import Vits
+    from TTS.tts.utils.languages import LanguageManager
+    from TTS.tts.utils.speakers import SpeakerManager
+    from TTS.tts.utils.text.tokenizer import TTSTokenizer
+    from TTS.utils.audio import AudioProcessor
+
+    # Only the modules go on the meta device; init_from_config's own checks need real tensors
+    ap = AudioProcessor.init_from_config(config)
+    tokenizer, config = TTSTokenizer.init_from_config(config)
+    speaker_manager = SpeakerManager.init_from_config(config)
+    language_manager = LanguageManager.init_from_config(config)
+    with torch.device(device or "cpu"):
+        return Vits(config, ap, tokenizer, speaker_manager, language_manager)
+
+
+def strip_for_inference(model):
+    """Drop training-only submodules and fold weight norm into the weights, in place"""
+    from torch.nn.utils import parametrize
+
+    for name in TRAINING_ONLY_MODULES:
+        if getattr(model, name, None) is not None:
+            setattr(model, name, None)
+    for module in model.modules():
+        if parametrize.is_parametrized(module, "weight"):
+            parametrize.remove_parametrizations(module, "weight", leave_parametrized=True)
+        elif hasattr(module, "weight_g"):
+            # weight norm from torch < 2.1
+            torch.nn.utils.remove_weight_norm(module)
+    return model
+
+
+def write_snapshot(checkpoint_path, config_path, output_path=DEFAULT_SNAPSHOT_PATH):
+    """
+    Write the inference-only snapshot of checkpoint_path.
+
+    Returns:
+        dict: checkpoint and snapshot sizes in MB
+    """
+    config = load_config(config_path)
+    model = build_vits(config)
+    model.load_checkpoint(config, checkpoint_path, eval=True)
+    strip_for_inference(model)
+
+    state = {name: tensor.detach().contiguous() for name, tensor in model.state_dict().items()}
+    temp_path = f"{output_path}.tmp"
+    torch.save({
+        "format": SNAPSHOT_FORMAT,
+        # the checkpoint's content fingerprint: checked at load, and the audio
+        # key (app.MODEL_ID) of a deployment that ships only the snapshot
+        "source": model_fingerprint(checkpoint_path),
+        "model": state,
+    }, temp_path)
+    os.replace(temp_path, output_path)
+
+    sizes = {
+        "checkpoint_mb": round(os.path.getsize(checkpoint_path) / (1024 * 1024), 1),
+        "snapshot_mb": round(os.path.getsize(output_path) / (1024 * 1024), 1),
+    }
+    logger.info(f"Wrote {output_path} from {checkpoint_path} "
+                f"({sizes['checkpoint_mb']} MB -> {sizes['snapshot_mb']} MB, {len(state)} tensors)")
+    return sizes
+
+
+def load_snapshot_model(config, snapshot_path, checkpoint_path=None):
+    """
+    Restore the inference-only Vits model from a snapshot, memory-mapped.
+
+    Raises:
+        StaleSnapshotError: if checkpoint_path exists and isn't the checkpoint the snapshot was written from
+        ValueError: if the file isn't a snapshot this code can read
+    """
+    snapshot = torch.load(snapshot_path, map_location="cpu", mmap=True, weights_only=True)
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{snapshot_path} is not a format {SNAPSHOT_FORMAT} model snapshot; "
+                         f"rewrite it with python model_snapshot.py")
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        source = model_fingerprint(checkpoint_path)
+        if snapshot.get("source") != source:
+            raise StaleSnapshotError(f"{snapshot_path} was written from {snapshot.get('source')}, "
+                                     f"not {source}")
+
+    model = strip_for_inference(build_vits(config, device="meta"))
+    # assign=True keeps the mmap'd tensors instead of copying them into the module's own
+    model.load_state_dict(snapshot["model"], assign=True)
+    missing = [name for name, tensor in itertools.chain(model.named_parameters(), model.named_buffers())
+               if tensor.is_meta]
+    if missing:
+        raise ValueError(f"{snapshot_path} has no values for {', '.join(missing[:5])}")
+    model.eval()
+    return model
+
+
+class SnapshotSynthesizer(Synthesizer):
+    """
+    Coqui Synthesizer whose tts_checkpoint is a snapshot (see write_snapshot).
+
+    Args:
+        source_checkpoint: The training checkpoint the snapshot should match, if present
+    """
+
+    def __init__(self, *, source_checkpoint=None, **kwargs):
+        self.source_checkpoint = source_checkpoint
+        super().__init__(**kwargs)
+
+    def _load_tts(self, tts_checkpoint, tts_config_path, use_cuda):
+        self.tts_config = load_config(tts_config_path)
+        self.output_sample_rate = self.tts_config.audio["sample_rate"]
+        self.tts_model = load_snapshot_model(self.tts_config, tts_checkpoint, self.source_checkpoint)
+        if use_cuda:
+            self.tts_model.cuda()
+
+
+def load_snapshot(snapshot_path, config_path, use_cuda=False, source_checkpoint=None):
+    """A Synthesizer restored from snapshot_path; raises as load_snapshot_model does"""
+    return SnapshotSynthesizer(
+        tts_checkpoint=snapshot_path,
+        tts_config_path=config_path,
+        use_cuda=use_cuda,
+        source_checkpoint=source_checkpoint
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write an inference-only, memory-mappable model snapshot")
+    parser.add_argument("--checkpoint", default="Nipunika_210000.pth")
+    parser.add_argument("--config", default="Nipunika_config.json")
+    parser.add_argument("--output", default=DEFAULT_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    write_snapshot(args.checkpoint, args.config, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Persistent SQLite archive of scraped news items
+
+Every item the scraper sees is upserted on its stable id (news_scraper.
+stable_item_id), so history survives restarts and page rotations. Items
+are ordered newest first by position, a time-ordered integer key that is
+also the FTS5 index's rowid: listings are keyset-paginated on it (a page
+costs the same at any depth, and items arriving meanwhile don't shift later
+pages), and a search walks the index newest first and stops after a page
+instead of sorting every match.
+
+Fill it from a one-off scrape (or cron):
+    python news_archive.py [--db news_archive.db] [--crawl]
+"""
+
+import argparse
+import logging
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_PATH = "news_archive.db"
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_TERMS = 8
+# position = timestamp seconds << POSITION_ID_BITS | the id's low bits, so
+# items in the same second (nids are sequential) still get distinct positions.
+# Ids equal in their low bits can still collide; the newcomer takes the next
+# free position (see NewsArchive._free_positions).
+POSITION_ID_BITS = 24
+
+# unicode61 splits on anything that isn't a letter or digit, which cuts
+# Sinhala words apart at every vowel sign and virama; those marks are word
+# characters here. ZWJ/ZWNJ are stripped from indexed and query text alike,
+# so "ශ්‍රී" matches whether or not it was typed with the joiner.
+SINHALA_MARKS = "".join(chr(c) for c in range(0x0D80, 0x0E00) if unicodedata.category(chr(c)).startswith("M"))
+JOINERS = ("\u200d", "\u200c")
+
+
+def _strip_joiners_sql(column):
+    return f"replace(replace({column}, char(8205), ''), char(8204), '')"
+
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    time TEXT,
+    timestamp TEXT NOT NULL,
+    category TEXT,
+    is_breaking INTEGER NOT NULL DEFAULT 0,
+    body TEXT,
+    text TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+-- The UNIQUE constraint indexes position for the plain listing
+CREATE INDEX IF NOT EXISTS news_category_position ON news (category, position);
+CREATE INDEX IF NOT EXISTS news_breaking_position ON news (position) WHERE is_breaking = 1;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, body, content='news', content_rowid='position',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '{SINHALA_MARKS}'"
+);
+CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+    INSERT INTO news_fts (rowid, title, body)
+    VALUES (new.position, {_strip_joiners_sql("new.title")}, {_strip_joiners_sql("new.body")});
+END;
+CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+    INSERT INTO news_fts (news_fts, rowid, title, body)
+    VALUES ('delete', old.position, {_strip_joiners_sql("old.title")}, {_strip_joiners_sql("old.body")});
+END;
+CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, body ON news
+WHEN old.title IS NOT new.title OR old.body IS NOT new.body BEGIN
+    INSERT INTO news_fts (news_fts, rowid, title, body)
+    VALUES ('delete', old.position, {_strip_joiners_sql("old.title")}, {_strip_joiners_sql("old.body")});
+    INSERT INTO news_fts (rowid, title, body)
+    VALUES (new.position, {_strip_joiners_sql("new.title")}, {_strip_joiners_sql("new.body")});
+END;
+"""
+
+# The first scrape's timestamp (and so position) is kept: relative times
+# ("2 hours ago") would otherwise drift on every re-scrape. A title-only rescrape keeps the body
+# (and body text) an article crawl filled in.
+UPSERT = """
+INSERT INTO news (id, position, title, link, time, timestamp, category, is_breaking, body, text,
+                  first_seen, last_seen)
+VALUES (:id, :position, :title, :link, :time, :timestamp, :category, :is_breaking, :body, :text, :seen, :seen)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    link = excluded.link,
+    time = excluded.time,
+    category = excluded.category,
+    is_breaking = excluded.is_breaking,
+    body = coalesce(excluded.body, news.body),
+    text = CASE WHEN excluded.body IS NULL AND news.body IS NOT NULL THEN news.text ELSE excluded.text END,
+    last_seen = excluded.last_seen
+"""
+
+COLUMNS = "news.id, news.title, news.link, news.time, news.timestamp, news.category, news.is_breaking, " \
+          "news.body, news.text, news.position"
+
+
+def _timestamp(value):
+    """ISO 8601 to the second, so timestamps sort as text"""
+    try:
+        return datetime.fromisoformat(value).isoformat(timespec="seconds")
+    except (TypeError, ValueError):
+        return datetime.now().isoformat(timespec="seconds")
+
+
+def sort_position(timestamp, item_id):
+    """The position of an item with this (normalized) timestamp and id"""
+    seconds = int(datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp())
+    return (seconds << POSITION_ID_BITS) | (item_id & ((1 << POSITION_ID_BITS) - 1))
+
+
+def _row_to_item(row):
+    item = {
+        "id": row[0],
+        "title": row[1],
+        "link": row[2],
+        "time": row[3],
+        "timestamp": row[4],
+        "category": row[5],
+        "isBreaking": bool(row[6]),
+        "text": row[8] or row[1],
+    }
+    if row[7] is not None:
+        item["body"] = row[7]
+    return item
+
+
+def decode_cursor(cursor):
+    """The position a next_cursor points after; raises ValueError for anything else"""
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def fts_query(text):
+    """
+    FTS5 MATCH expression for free text: every word must match, as a prefix
+    (Sinhala inflects by suffix). Words are quoted, so FTS5 operators and
+    punctuation in the input are searched for, not interpreted.
+
+    Raises:
+        ValueError: if text has no words
+    """
+    for joiner in JOINERS:
+        text = text.replace(joiner, "")
+    words = [word.replace('"', "") for word in text.split()]
+    words = [word for word in words if word][:MAX_SEARCH_TERMS]
+    if not words:
+        raise ValueError("Empty search query")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class NewsArchive:
+    """
+    SQLite news archive; safe to share between threads and processes.
+
+    Each thread gets its own connection. The database runs in WAL mode, so
+    readers never block the scraper's writes (or each other), and every
+    worker process can open the same file.
+
+    Args:
+        path: Database file (created if missing)
+        busy_timeout_ms: How long a write waits for another writer
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def upsert(self, items):
+        """
+        Insert new items and refresh known ones, in one transaction.
+
+        Returns:
+            int: number of items written
+        """
+        seen = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for item in items:
+            if item.get("id") is None:
+                continue
+            timestamp = _timestamp(item.get("timestamp"))
+            rows.append({
+                "id": item["id"],
+                "position": sort_position(timestamp, item["id"]),
+                "title": item.get("title", ""),
+                "link": item.get("link", ""),
+                "time": item.get("time"),
+                "timestamp": timestamp,
+                "category": item.get("category"),
+                "is_breaking": int(bool(item.get("isBreaking"))),
+                "body": item.get("body") or None,
+                "text": item.get("text"),
+                "seen": seen,
+            })
+        if not rows:
+            return 0
+
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._free_positions(connection, rows)
+            connection.executemany(UPSERT, rows)
+        return len(rows)
+
+    @staticmethod
+    def _free_positions(connection, rows):
+        """
+        Move each new item whose position is taken (by another id in the
+        archive or earlier in rows) to the next free one, so a collision
+        can't fail the batch. Known items keep theirs: the upsert never
+        changes a position. Runs inside the write transaction.
+        """
+        claimed = {}
+        used = set()
+        for row in rows:
+            if row["id"] in claimed:
+                row["position"] = claimed[row["id"]]
+                continue
+            known = connection.execute("SELECT position FROM news WHERE id = ?", (row["id"],)).fetchone()
+            position = known[0] if known else row["position"]
+            if not known:
+                while position in used or connection.execute(
+                        "SELECT 1 FROM news WHERE position = ?", (position,)).fetchone():
+                    position += 1
+            row["position"] = claimed[row["id"]] = position
+            used.add(position)
+
+    def get(self, item_id):
+        """The item with item_id, or None"""
+        row = self._connection().execute(f"SELECT {COLUMNS} FROM news WHERE id = ?", (item_id,)).fetchone()
+        return _row_to_item(row) if row else None
+
+    def page(self, limit=20, cursor=None, category=None, breaking=False, query=None):
+        """
+        One page of items, newest first.
+
+        Args:
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page, or None for the first
+            category: Only items in this category
+            breaking: Only breaking news
+            query: Free-text search over titles and bodies (see fts_query)
+
+        Returns:
+            tuple: (items, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: for a malformed cursor or an empty query
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if query is not None:
+            # ordered by the index's rowid, so FTS5 yields matches newest first
+            sql = f"SELECT {COLUMNS} FROM news_fts JOIN news ON news.position = news_fts.rowid"
+            order = "news_fts.rowid"
+            conditions = ["news_fts MATCH ?"]
+            params = [fts_query(query)]
+        else:
+            sql = f"SELECT {COLUMNS} FROM news"
+            order = "news.position"
+            conditions = []
+            params = []
+        if category:
+            conditions.append("news.category = ?")
+            params.append(category)
+        if breaking:
+            # literal, so the partial index applies
+            conditions.append("news.is_breaking = 1")
+        if cursor:
+            conditions.append(f"{order} < ?")
+            params.append(decode_cursor(cursor))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order} DESC LIMIT ?"
+        # one extra row says whether there is a next page
+        params.append(limit + 1)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        items = [_row_to_item(row) for row in rows[:limit]]
+        next_cursor = str(rows[limit - 1][-1]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def categories(self):
+        """{category: item count}"""
+        rows = self._connection().execute(
+            "SELECT category, count(*) FROM news GROUP BY category ORDER BY count(*) DESC").fetchall()
+        return {category: count for category, count in rows if category}
+
+    def stats(self):
+        connection = self._connection()
+        count, latest = connection.execute("SELECT count(*), max(timestamp) FROM news").fetchone()
+        return {"items": count, "latest": latest, "path": self.path}
+
+    def close(self):
+        """Close this thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Ada Derana into the news archive")
+    parser.add_argument("--db", default=DEFAULT_ARCHIVE_PATH)
+    parser.add_argument("--crawl", action="store_true", help="also fetch article bodies (news_crawler.py)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Not scrape_adaderana(): its sample-data fallback must never reach the archive
+    if args.crawl:
+        from news_crawler import crawl_adaderana
+
+        items = crawl_adaderana()
+    else:
+        from news_scraper import fetch_adaderana
+
+        items = fetch_adaderana()
+
+    archive = NewsArchive(args.db)
+    archive.upsert(items)
+    logger.info(f"Archived {len(items)} items; {archive.stats()['items']} in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
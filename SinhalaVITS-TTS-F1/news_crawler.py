@@ -0,0 +1,299 @@
+"""
+Asynchronous crawler for Ada Derana section pages and the article bodies they link to
+"""
+
+import asyncio
+import logging
+import random
+import re
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import aiohttp
+import lxml.html
+from lxml import etree
+
+from news_scraper import ADA_DERANA_BASE, ADA_DERANA_URL, REQUEST_HEADERS, parse_adaderana_html
+
+logger = logging.getLogger(__name__)
+
+# Section pages to crawl; each is parsed the same way as the hot news page
+SECTION_URLS = [ADA_DERANA_URL]
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Article pages: everything that isn't the story itself
+BOILERPLATE_TAGS = ('script', 'style', 'template', 'noscript', 'nav', 'header', 'footer', 'aside', 'form')
+HAS_SINHALA = re.compile(r'[\u0D80-\u0DFF]')
+PARAGRAPHS = etree.XPath('//p')
+WHITESPACE = re.compile(r'\s+')
+HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def parse_article_html(content):
+    """
+    Extract the story text from an article page.
+
+    The body is taken from the element whose <p> children carry the most
+    Sinhala text, so sidebars, related-story lists and footers (a few short
+    paragraphs each) lose to the article itself.
+
+    Returns:
+        str: paragraphs joined by newlines ("" if nothing was found)
+    """
+    root = lxml.html.document_fromstring(content, parser=HTML_PARSER)
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+
+    blocks = OrderedDict()
+    for paragraph in PARAGRAPHS(root):
+        text = WHITESPACE.sub(" ", paragraph.text_content()).strip()
+        if not text or not HAS_SINHALA.search(text):
+            continue
+        parent = paragraph.getparent()
+        paragraphs, score = blocks.get(parent, ([], 0))
+        paragraphs.append(text)
+        blocks[parent] = (paragraphs, score + len(text))
+
+    if not blocks:
+        return ""
+    paragraphs, _ = max(blocks.values(), key=lambda block: block[1])
+    return "\n".join(paragraphs)
+
+
+class NewsCrawler:
+    """
+    Crawls section pages concurrently, then every story they link to.
+
+    All requests share one keep-alive connection pool capped at
+    max_connections overall and per_host_limit per host. Responses are
+    remembered per URL with their ETag/Last-Modified, so a re-crawl sends
+    conditional requests and unchanged pages come back as 304s. Transient
+    failures (connection errors, timeouts, 429/5xx) are retried with
+    exponential backoff.
+
+    Usage:
+        crawler = NewsCrawler()
+        async for item in crawler.crawl():
+            ...
+        await crawler.close()
+    """
+
+    def __init__(self, sections=None, base_url=ADA_DERANA_BASE, per_host_limit=4,
+                 max_connections=16, timeout=15, retries=3, backoff=0.5,
+                 fetch_bodies=True, max_articles=None, cache_entries=2000):
+        self.sections = list(sections or SECTION_URLS)
+        self.base_url = base_url
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.fetch_bodies = fetch_bodies
+        self.max_articles = max_articles
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()  # url -> (etag, last_modified, body)
+        self._session = None
+        self._session_loop = None
+        self.requests = 0
+        self.not_modified = 0
+        self.retried = 0
+        self.failed = 0
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "retried": self.retried,
+            "failed": self.failed,
+            "cached_urls": len(self._cache),
+        }
+
+    def _get_session(self):
+        # A ClientSession belongs to the loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=REQUEST_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def _remember(self, url, etag, last_modified, body):
+        if not etag and not last_modified:
+            self._cache.pop(url, None)
+            return
+        self._cache[url] = (etag, last_modified, body)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    async def fetch(self, url):
+        """
+        GET url with retries, revalidating a cached copy when there is one.
+
+        Returns:
+            tuple: (body bytes, modified) where modified is False for a 304
+        """
+        session = self._get_session()
+        cached = self._cache.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        for attempt in range(self.retries + 1):
+            try:
+                self.requests += 1
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        self.not_modified += 1
+                        self._cache.move_to_end(url)
+                        return cached[2], False
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history,
+                            status=response.status, message=response.reason,
+                        )
+                    response.raise_for_status()
+                    body = await response.read()
+                    self._remember(url, response.headers.get('ETag'),
+                                   response.headers.get('Last-Modified'), body)
+                    return body, True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                retryable = status is None or status in RETRY_STATUSES
+                if not retryable or attempt >= self.retries:
+                    self.failed += 1
+                    raise
+                self.retried += 1
+                delay = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+                logger.warning(f"Fetch failed for {url} ({str(e) or type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def fetch_section(self, url):
+        """Fetch and parse one section page into news items"""
+        body, _ = await self.fetch(url)
+        items = parse_adaderana_html(body, base_url=self.base_url)
+        for item in items:
+            item["section"] = url
+        return items
+
+    async def fetch_article(self, item):
+        """Fill in item["body"] from the linked story; text becomes title plus body"""
+        body, _ = await self.fetch(item["link"])
+        text = parse_article_html(body)
+        if text:
+            item["body"] = text
+            item["text"] = f"{item['title']}\n{text}"
+        return item
+
+    def _is_article_link(self, link):
+        return bool(link) and urlsplit(link).scheme in ("http", "https") and "#" not in link
+
+    async def crawl(self, sections=None):
+        """
+        Async generator yielding news items as they complete.
+
+        Items are deduplicated by id across sections. With fetch_bodies, an
+        item is yielded once its article body is in (or failed to load - the
+        item is still yielded with its title as text).
+        """
+        queue = asyncio.Queue()
+        done = object()
+        seen = set()
+        tasks = set()
+        outstanding = 0
+        articles = 0
+
+        def spawn(coro):
+            nonlocal outstanding
+            outstanding += 1
+            task = asyncio.ensure_future(coro)
+            tasks.add(task)
+            task.add_done_callback(finished)
+
+        def finished(task):
+            nonlocal outstanding
+            tasks.discard(task)
+            outstanding -= 1
+            if outstanding == 0:
+                queue.put_nowait(done)
+
+        async def section(url):
+            nonlocal articles
+            try:
+                items = await self.fetch_section(url)
+            except Exception as e:
+                logger.error(f"Error crawling section {url}: {str(e)}")
+                return
+            for item in items:
+                if item["id"] in seen:
+                    continue
+                seen.add(item["id"])
+                within_limit = self.max_articles is None or articles < self.max_articles
+                if self.fetch_bodies and within_limit and self._is_article_link(item["link"]):
+                    articles += 1
+                    spawn(article(item))
+                else:
+                    queue.put_nowait(item)
+
+        async def article(item):
+            try:
+                await self.fetch_article(item)
+            except Exception as e:
+                logger.warning(f"Error fetching article {item['link']}: {str(e)}")
+            queue.put_nowait(item)
+
+        urls = list(sections or self.sections)
+        if not urls:
+            return
+        for url in urls:
+            spawn(section(url))
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    # Anything queued before the last task finished is already ahead of us
+                    break
+                yield item
+        finally:
+            for task in list(tasks):
+                task.cancel()
+
+    async def crawl_all(self, sections=None):
+        """Collect crawl() into a list"""
+        return [item async for item in self.crawl(sections)]
+
+
+def crawl_adaderana(sections=None, **crawler_options):
+    """
+    Blocking one-shot crawl for scripts and background jobs.
+
+    Returns:
+        list: news items with article bodies, in completion order
+    """
+    async def run():
+        crawler = NewsCrawler(sections=sections, **crawler_options)
+        try:
+            return await crawler.crawl_all()
+        finally:
+            await crawler.close()
+
+    return asyncio.run(run())
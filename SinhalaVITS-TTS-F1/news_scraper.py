@@ -3,14 +3,74 @@ Web scraper for Ada Derana news headlines
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
 from datetime import datetime, timedelta
+import hashlib
 import re
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-ADA_DERANA_URL = "https://sinhala.adaderana.lk/sinhala-hot-news.php"
+ADA_DERANA_BASE = "https://sinhala.adaderana.lk"
+ADA_DERANA_URL = f"{ADA_DERANA_BASE}/sinhala-hot-news.php"
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'si,en-US,en;q=0.9'
+}
+
+NEWS_ID_PATTERN = re.compile(r'[?&]nid=(\d+)')
+
+
+def create_session():
+    """Keep-alive session with a small connection pool and retries on transient errors"""
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def stable_item_id(link, title=""):
+    """
+    Numeric id that stays the same across scrapes: the article's nid when the
+    link has one, otherwise a 48-bit hash of the link (or title), which is
+    still a safe integer in JavaScript.
+    """
+    match = NEWS_ID_PATTERN.search(link or "")
+    if match:
+        return int(match.group(1))
+    digest = hashlib.sha1((link or title).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16)
+
+# Precompiled patterns for parse_time_string
+DATE_TIME_PATTERN = re.compile(r'(\w+)\s+(\d+),\s+(\d+)\s+(\d{1,2}):(\d{2})\s*(am|pm)', re.I)
+CLOCK_PATTERN = re.compile(r'(\d{1,2}):(\d{2})\s*(am|pm)')
+HOURS_AGO_PATTERN = re.compile(r'(\d+)\s*(hour|hours|පැය)')
+MINUTES_AGO_PATTERN = re.compile(r'(\d+)\s*(minute|minutes|මිනිත්තු)')
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+
+
+def _to_24h(hour, ampm):
+    if ampm == "pm" and hour != 12:
+        return hour + 12
+    if ampm == "am" and hour == 12:
+        return 0
+    return hour
+
 
 def parse_time_string(time_str):
     """
@@ -24,56 +84,31 @@ def parse_time_string(time_str):
     now = datetime.now()
     
     # Handle format: "December 30, 2025 2:15 pm"
-    date_time_match = re.search(r'(\w+)\s+(\d+),\s+(\d+)\s+(\d{1,2}):(\d{2})\s*(am|pm)', time_str, re.I)
+    date_time_match = DATE_TIME_PATTERN.search(time_str)
     if date_time_match:
-        month_name = date_time_match.group(1)
-        day = int(date_time_match.group(2))
-        year = int(date_time_match.group(3))
-        hour = int(date_time_match.group(4))
-        minute = int(date_time_match.group(5))
-        ampm = date_time_match.group(6).lower()
-        
-        month_map = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12
-        }
-        month = month_map.get(month_name.lower(), now.month)
-        
-        if ampm == "pm" and hour != 12:
-            hour += 12
-        elif ampm == "am" and hour == 12:
-            hour = 0
-        
+        month_name, day, year, hour, minute, ampm = date_time_match.groups()
+        month = MONTHS.get(month_name.lower(), now.month)
         try:
-            return datetime(year, month, day, hour, minute)
-        except:
+            return datetime(int(year), month, int(day), _to_24h(int(hour), ampm.lower()), int(minute))
+        except ValueError:
             pass
     
     # Handle "today" with time
     time_str_lower = time_str.lower()
     if "today" in time_str_lower or "අද" in time_str:
-        time_match = re.search(r'(\d{1,2}):(\d{2})\s*(am|pm)', time_str_lower)
+        time_match = CLOCK_PATTERN.search(time_str_lower)
         if time_match:
-            hour = int(time_match.group(1))
-            minute = int(time_match.group(2))
-            ampm = time_match.group(3)
-            if ampm == "pm" and hour != 12:
-                hour += 12
-            elif ampm == "am" and hour == 12:
-                hour = 0
-            return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            hour = _to_24h(int(time_match.group(1)), time_match.group(3))
+            return now.replace(hour=hour, minute=int(time_match.group(2)), second=0, microsecond=0)
     
     # Handle "X hours ago" or "X minutes ago"
-    hours_ago = re.search(r'(\d+)\s*(hour|hours|පැය)', time_str_lower)
+    hours_ago = HOURS_AGO_PATTERN.search(time_str_lower)
     if hours_ago:
-        hours = int(hours_ago.group(1))
-        return now - timedelta(hours=hours)
+        return now - timedelta(hours=int(hours_ago.group(1)))
     
-    minutes_ago = re.search(r'(\d+)\s*(minute|minutes|මිනිත්තු)', time_str_lower)
+    minutes_ago = MINUTES_AGO_PATTERN.search(time_str_lower)
     if minutes_ago:
-        minutes = int(minutes_ago.group(1))
-        return now - timedelta(minutes=minutes)
+        return now - timedelta(minutes=int(minutes_ago.group(1)))
     
     # Handle "yesterday" or "ඊයේ"
     if "yesterday" in time_str_lower or "ඊයේ" in time_str:
@@ -104,105 +139,132 @@ def categorize_news(title, category_text=""):
         return "උණුසුම් පුවත්"
 
 
-def scrape_adaderana():
+# Precompiled extraction patterns for parse_adaderana_html
+TIME_PATTERN = re.compile(r'(December|January|February|March|April|May|June|July|August|September|October|November)\s+\d+,\s+\d+\s+\d+:\d+\s+(am|pm)', re.I)
+TIME_STRING_PATTERN = re.compile(r'\d+:\d+\s*(am|pm)', re.I)
+FIRST_LINK = etree.XPath('(.//a[@href])[1]')
+TEXT_NODES = etree.XPath('.//text()')
+CONTAINER_TAGS = frozenset(['div', 'article', 'section'])
+SKIP_TITLES = frozenset(["උණුසුම් පුවත්", "Hot News", "Most Viewed"])
+BREAKING_WORDS = ("විශේෂ", "බිඳී", "උත්තරීතර", "විශේෂයෙන්")
+MAX_HEADINGS = 50
+HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def _absolute_link(href, base_url=ADA_DERANA_BASE):
+    if href and not href.startswith('http'):
+        if href.startswith('/'):
+            return f"{base_url}{href}"
+        return f"{base_url}/{href}"
+    return href
+
+
+def _container(heading):
+    """Nearest div/article/section ancestor, or the heading itself"""
+    for ancestor in heading.iterancestors():
+        if ancestor.tag in CONTAINER_TAGS:
+            return ancestor
+    return heading
+
+
+def _find_time(container):
+    """(time_str, timestamp) from a container's text, as the page shows it"""
+    time_match = TIME_PATTERN.search("".join(container.itertext()))
+    if time_match:
+        time_str = time_match.group(0).strip()
+        return time_str, parse_time_string(time_str)
+    # Fall back to the first text node that looks like a clock time
+    for text in TEXT_NODES(container):
+        if TIME_STRING_PATTERN.search(text):
+            time_str = text.strip()
+            return time_str, parse_time_string(time_str)
+    return "", None
+
+
+def parse_adaderana_html(content, base_url=ADA_DERANA_BASE):
     """
-    Scrape Ada Derana Sinhala hot news page and return structured news items
+    Extract news items from the hot news page HTML.
+    
+    Parses once with lxml and visits each h2 once. The link and time lookups
+    on a shared container are done once per container, not once per heading.
+    
+    Args:
+        content: Page HTML (bytes or str)
+        base_url: Site root that relative links are resolved against
+    
+    Returns:
+        list: news item dicts in page order (may be empty)
     """
+    root = lxml.html.document_fromstring(content, parser=HTML_PARSER)
+    # Script/style text is not page text
+    etree.strip_elements(root, 'script', 'style', 'template', with_tail=False)
+    
     news_items = []
+    container_links = {}
+    container_times = {}
     
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'si,en-US,en;q=0.9'
-        }
-        
-        response = requests.get(ADA_DERANA_URL, headers=headers, timeout=15)
-        response.raise_for_status()
-        response.encoding = 'utf-8'  # Ensure proper encoding for Sinhala
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find all h2 headings which contain news titles on the Sinhala page
-        # Based on the page structure, news items are in h2 tags
-        news_headings = soup.find_all('h2')
-        
-        for idx, heading in enumerate(news_headings[:50]):  # Limit to 50 items
-            try:
-                # Extract title from h2
-                title = heading.get_text(strip=True)
-                if not title or len(title) < 10:
-                    continue
-                
-                # Skip if it's not a news headline (like page title)
-                if title in ["උණුසුම් පුවත්", "Hot News", "Most Viewed"]:
-                    continue
-                
-                # Find the parent container to get link and time
-                parent = heading.find_parent(['div', 'article', 'section'])
-                if not parent:
-                    parent = heading
-                
-                # Extract link - look for anchor tag near the heading
-                link = ""
-                link_elem = heading.find('a', href=True)
-                if not link_elem:
-                    # Try to find link in parent or next sibling
-                    link_elem = parent.find('a', href=True) if parent else None
-                
-                if link_elem:
-                    link = link_elem.get('href', '')
-                    if link and not link.startswith('http'):
-                        if link.startswith('/'):
-                            link = f"https://sinhala.adaderana.lk{link}"
-                        else:
-                            link = f"https://sinhala.adaderana.lk/{link}"
-                
-                # Extract time - look for timestamp pattern in text after heading
-                time_str = ""
-                timestamp = None
-                
-                # Look for time in the same container or next elements
-                time_pattern = re.compile(r'(December|January|February|March|April|May|June|July|August|September|October|November)\s+\d+,\s+\d+\s+\d+:\d+\s+(am|pm)', re.I)
-                
-                # Check parent and siblings for time
-                search_area = parent if parent else heading
-                time_text = search_area.get_text()
-                time_match = time_pattern.search(time_text)
-                
-                if time_match:
-                    time_str = time_match.group(0).strip()
-                    timestamp = parse_time_string(time_str)
-                else:
-                    # Try to find time element
-                    time_elem = search_area.find(string=re.compile(r'\d+:\d+\s*(am|pm)', re.I))
-                    if time_elem:
-                        time_str = time_elem.strip()
-                        timestamp = parse_time_string(time_str)
-                
-                # Extract category - this page is for "උණුසුම් පුවත්" (Hot News)
-                # But we can try to detect from title or URL
-                category = categorize_news(title, "")
-                
-                # Determine if breaking news
-                is_breaking = any(word in title for word in ["විශේෂ", "බිඳී", "උත්තරීතර", "විශේෂයෙන්"])
-                
-                news_item = {
-                    "id": idx + 1,
-                    "title": title,
-                    "link": link or f"{ADA_DERANA_URL}#{idx}",
-                    "time": time_str or "මෑතකදී",
-                    "timestamp": timestamp.isoformat() if timestamp else datetime.now().isoformat(),
-                    "category": category,
-                    "isBreaking": is_breaking,
-                    "text": title  # For TTS, we'll use the title
-                }
-                
-                news_items.append(news_item)
-                
-            except Exception as e:
-                logger.warning(f"Error parsing article {idx}: {str(e)}")
+    for idx, heading in enumerate(root.iter('h2')):
+        if idx >= MAX_HEADINGS:
+            break
+        try:
+            title = "".join(text.strip() for text in heading.itertext())
+            if len(title) < 10 or title in SKIP_TITLES:
                 continue
+            
+            container = _container(heading)
+            
+            # Link in the heading itself, else the first one in its container
+            link_elems = FIRST_LINK(heading)
+            if link_elems:
+                link = _absolute_link(link_elems[0].get('href', ''), base_url)
+            else:
+                if container not in container_links:
+                    found = FIRST_LINK(container)
+                    container_links[container] = _absolute_link(found[0].get('href', ''), base_url) if found else ""
+                link = container_links[container]
+            
+            if container not in container_times:
+                container_times[container] = _find_time(container)
+            time_str, timestamp = container_times[container]
+            
+            news_items.append({
+                "id": stable_item_id(link, title),
+                "title": title,
+                "link": link or f"{ADA_DERANA_URL}#{idx}",
+                "time": time_str or "මෑතකදී",
+                "timestamp": timestamp.isoformat() if timestamp else datetime.now().isoformat(),
+                "category": categorize_news(title, ""),
+                "isBreaking": any(word in title for word in BREAKING_WORDS),
+                "text": title  # For TTS, we'll use the title
+            })
+            
+        except Exception as e:
+            logger.warning(f"Error parsing article {idx}: {str(e)}")
+            continue
+    
+    return news_items
+
+
+def fetch_adaderana(session=None):
+    """
+    Fetch and parse the hot news page. Errors propagate to the caller.
+    
+    Returns:
+        list: news item dicts in page order (may be empty)
+    """
+    session = session or _default_session()
+    response = session.get(ADA_DERANA_URL, timeout=15)
+    response.raise_for_status()
+    response.encoding = 'utf-8'  # Ensure proper encoding for Sinhala
+    return parse_adaderana_html(response.content)
+
+
+def scrape_adaderana(session=None):
+    """
+    Scrape Ada Derana Sinhala hot news page and return structured news items
+    """
+    try:
+        news_items = fetch_adaderana(session)
         
         # If scraping failed, return sample data for development
         if not news_items:
@@ -220,6 +282,152 @@ def scrape_adaderana():
         return get_sample_news()
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def _default_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def item_fingerprint(item):
+    """Hash of the fields that make an item 'changed' between scrapes"""
+    material = "\0".join([item.get("title", ""), item.get("link", ""), item.get("time", "")])
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+
+class NewsFeed:
+    """
+    Incrementally refreshed snapshot of the hot news page.
+    
+    refresh() sends a conditional GET (If-None-Match / If-Modified-Since)
+    over a pooled session, skips parsing when the body is byte-identical to
+    the last one, and returns only items that are new or changed (by stable
+    id). snapshot() never touches the network, so request handlers can serve
+    from it while a background thread keeps it fresh.
+    
+    on_refresh(seconds, outcome), if given, is called after every refresh;
+    outcome is "updated", "not_modified", "unchanged", "empty" or "error".
+    """
+    
+    def __init__(self, url=ADA_DERANA_URL, session=None, on_refresh=None):
+        self.url = url
+        self.session = session or create_session()
+        self.on_refresh = on_refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.etag = None
+        self.last_modified = None
+        self.body_fingerprint = None
+        self.items = []
+        self.item_fingerprints = {}
+        self.updated_at = None
+        self.checked_at = None
+        self.last_error = None
+        self.last_refresh_seconds = None
+        self._thread = None
+    
+    def snapshot(self):
+        """Return (items, updated_at) of the last successful scrape"""
+        with self._lock:
+            return list(self.items), self.updated_at
+    
+    def refresh(self):
+        """
+        Fetch the page if it changed and update the snapshot.
+        
+        Returns:
+            list: items that are new or changed since the last refresh
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            changed, outcome = self._fetch_changes()
+            self.last_refresh_seconds = time.perf_counter() - start
+        
+        if self.on_refresh:
+            try:
+                self.on_refresh(self.last_refresh_seconds, outcome)
+            except Exception as e:
+                logger.error(f"News feed refresh hook failed: {str(e)}")
+        return changed
+    
+    def _fetch_changes(self):
+        """Conditional GET and parse; returns (changed items, outcome)"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=15)
+            self.checked_at = datetime.now()
+            if response.status_code == 304:
+                logger.info("News page not modified (304)")
+                return [], "not_modified"
+            response.raise_for_status()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error refreshing news feed: {str(e)}")
+            return [], "error"
+        
+        self.last_error = None
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        
+        body_fingerprint = hashlib.sha256(response.content).hexdigest()
+        if body_fingerprint == self.body_fingerprint:
+            logger.info("News page body unchanged")
+            return [], "unchanged"
+        
+        items = parse_adaderana_html(response.content)
+        if not items:
+            logger.warning("No news items parsed; keeping previous snapshot")
+            return [], "empty"
+        
+        # Keep the first occurrence of each id (the page can repeat a story)
+        unique = {}
+        for item in items:
+            unique.setdefault(item["id"], item)
+        items = list(unique.values())
+        
+        fingerprints = {item["id"]: item_fingerprint(item) for item in items}
+        changed = [item for item in items
+                   if self.item_fingerprints.get(item["id"]) != fingerprints[item["id"]]]
+        
+        with self._lock:
+            self.items = items
+            self.item_fingerprints = fingerprints
+            self.body_fingerprint = body_fingerprint
+            self.updated_at = datetime.now()
+        
+        logger.info(f"News feed refreshed: {len(items)} items, {len(changed)} new or changed")
+        return changed, "updated"
+    
+    def start_background_refresh(self, interval_seconds=300, on_change=None):
+        """Refresh now and then every interval_seconds on a daemon thread; a no-op once started"""
+        def loop():
+            while True:
+                changed = self.refresh()
+                if changed and on_change:
+                    try:
+                        on_change(changed)
+                    except Exception as e:
+                        logger.error(f"News feed change handler failed: {str(e)}")
+                time.sleep(interval_seconds)
+        
+        # Checked and set under the lock, so concurrent callers start one thread
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=loop, name="news-feed-refresh", daemon=True)
+            self._thread.start()
+
+
 def get_sample_news():
     """
     Return sample news data for development/testing
@@ -0,0 +1,141 @@
+"""
+ONNX Runtime backend for the VITS checkpoint: export, and a Synthesizer stand-in
+
+Export once (needs torch and TTS):
+    python onnx_backend.py [--checkpoint Nipunika_210000.pth] [--config Nipunika_config.json]
+                           [--output Nipunika_210000.onnx]
+
+Then serve with INFERENCE_BACKEND=onnx.
+"""
+
+import argparse
+import logging
+
+from batch_scheduler import SENTENCE_GAP_SAMPLES
+from streaming import pcm16, wav_header
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ONNX_PATH = "Nipunika_210000.onnx"
+
+
+def export_onnx(checkpoint_path, config_path, output_path=DEFAULT_ONNX_PATH):
+    """Export the VITS checkpoint to ONNX with Coqui's exporter (dynamic batch/length axes)."""
+    from TTS.tts.configs.vits_config import VitsConfig
+    from TTS.tts.models.vits import Vits
+
+    config = VitsConfig()
+    config.load_json(config_path)
+    model = Vits.init_from_config(config)
+    model.load_checkpoint(config, checkpoint_path, eval=True)
+    model.export_onnx(output_path=output_path, verbose=False)
+    logger.info(f"Exported {checkpoint_path} to {output_path}")
+    return output_path
+
+
+class OnnxSynthesizer:
+    """
+    Runs an exported VITS graph with onnxruntime on CPU.
+
+    Provides the parts of Synthesizer the API uses (tts, tts_batch,
+    save_wav, output_sample_rate) and does per text what Synthesizer.tts
+    does: sentence split, tokenize, optional silence trim, 10000-sample gap
+    after each sentence. Only the config is read; the PyTorch checkpoint is
+    never loaded.
+
+    Args:
+        onnx_path: Exported model (see export_onnx)
+        config_path: The checkpoint's config JSON (tokenizer, audio settings)
+        intra_op_threads: Threads used inside one operator (0 = onnxruntime default)
+        inter_op_threads: Threads running independent operators (0 = default)
+    """
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, config_path, intra_op_threads=0, inter_op_threads=0):
+        import numpy as np
+        import onnxruntime as ort
+        import pysbd
+        from TTS.config import load_config
+        from TTS.tts.utils.text.tokenizer import TTSTokenizer
+        from TTS.utils.audio import AudioProcessor
+
+        config = load_config(config_path)
+        self.tokenizer, self.tts_config = TTSTokenizer.init_from_config(config)
+        self.ap = AudioProcessor.init_from_config(self.tts_config, verbose=False)
+        self.output_sample_rate = self.tts_config.audio["sample_rate"]
+        audio_config = self.tts_config.audio
+        self.trim = "do_trim_silence" in audio_config and bool(audio_config["do_trim_silence"])
+        self.segmenter = pysbd.Segmenter(language="en", clean=True)
+
+        args = self.tts_config.model_args
+        # [noise scale, length scale, duration predictor noise scale], as Vits.inference_onnx passes them
+        self.scales = np.array(
+            [args.inference_noise_scale, args.length_scale, args.inference_noise_scale_dp],
+            dtype=np.float32,
+        )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+    def split_into_sentences(self, text):
+        return self.segmenter.segment(text)
+
+    def infer_ids(self, ids):
+        """Waveform (float32 numpy) for one sentence's token ids"""
+        import numpy as np
+
+        x = np.asarray([ids], dtype=np.int64)
+        x_lengths = np.asarray([len(ids)], dtype=np.int64)
+        outputs = self.session.run(["output"], {"input": x, "input_lengths": x_lengths, "scales": self.scales})
+        return outputs[0].reshape(-1)
+
+    def tts(self, text):
+        """Same output as Synthesizer.tts: a list of float samples"""
+        from TTS.tts.utils.synthesis import trim_silence
+
+        wavs = []
+        for sentence in self.split_into_sentences(text):
+            waveform = self.infer_ids(self.tokenizer.text_to_ids(sentence))
+            if self.trim:
+                waveform = trim_silence(waveform, self.ap)
+            wavs += list(waveform)
+            wavs += [0] * SENTENCE_GAP_SAMPLES
+        return wavs
+
+    def tts_batch(self, texts):
+        # Unpadded per-sentence runs: the exported graph doesn't return the
+        # output mask needed to cut a padded batch back apart
+        return [self.tts(text) for text in texts]
+
+    def save_wav(self, wav, path):
+        """16-bit PCM WAV, peak-normalized like Synthesizer.save_wav; path may be a file object"""
+        pcm = pcm16(wav)
+        data = wav_header(self.output_sample_rate, data_size=len(pcm)) + pcm
+        if hasattr(path, "write"):
+            path.write(data)
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the VITS checkpoint to ONNX")
+    parser.add_argument("--checkpoint", default="Nipunika_210000.pth")
+    parser.add_argument("--config", default="Nipunika_config.json")
+    parser.add_argument("--output", default=DEFAULT_ONNX_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    export_onnx(args.checkpoint, args.config, args.output)
+
+
+if __name__ == "__main__":
+    main()
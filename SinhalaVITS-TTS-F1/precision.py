@@ -0,0 +1,179 @@
+"""
+Reduced-precision CPU inference modes for the VITS model
+
+    fp32  the checkpoint as trained
+    int8  int8 weights with per-output-channel scales: pointwise (1x1) convs
+          run as dynamically quantized linears (activations quantized per
+          call); wider and transposed convs keep int8 weights and dequantize
+          them per call. Cuts weight memory about 4x.
+    bf16  inference under torch.autocast(bfloat16); weights stay fp32. Fast
+          on CPUs with AVX512-BF16/AMX, slower than fp32 on CPUs without.
+
+Check quality and speed against fp32 with benchmarks/bench_precision.py.
+"""
+
+import logging
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+from torch.nn.utils import parametrize
+
+logger = logging.getLogger(__name__)
+
+PRECISION_MODES = ("fp32", "int8", "bf16")
+
+
+def fold_weight_norm(model):
+    """Bake weight-norm parametrizations into plain weights (inference only)"""
+    folded = 0
+    for module in list(model.modules()):
+        if parametrize.is_parametrized(module, "weight"):
+            parametrize.remove_parametrizations(module, "weight", leave_parametrized=True)
+            folded += 1
+        elif hasattr(module, "weight_g") and hasattr(module, "weight_v"):
+            # pre-parametrization torch.nn.utils.weight_norm
+            nn.utils.remove_weight_norm(module)
+            folded += 1
+    return folded
+
+
+def _quantize_weight(weight):
+    """Symmetric per-output-channel int8: (int8 weight, fp32 scale broadcastable to weight)"""
+    dims = tuple(range(1, weight.dim()))
+    scale = weight.abs().amax(dim=dims, keepdim=True).clamp(min=1e-8) / 127.0
+    return torch.round(weight / scale).clamp(-127, 127).to(torch.int8), scale
+
+
+class DynamicInt8PointwiseConv(nn.Module):
+    """1x1, stride 1, ungrouped Conv1d as a dynamically quantized linear over channels"""
+
+    def __init__(self, conv):
+        super().__init__()
+        weight = conv.weight.detach().reshape(conv.out_channels, conv.in_channels).float()
+        qweight = torch.quantize_per_channel(
+            weight,
+            scales=(weight.abs().amax(dim=1).clamp(min=1e-8) / 127.0).double(),
+            zero_points=torch.zeros(conv.out_channels, dtype=torch.long),
+            axis=0,
+            dtype=torch.qint8,
+        )
+        bias = conv.bias.detach().float() if conv.bias is not None else None
+        self._packed = torch.ops.quantized.linear_prepack(qweight, bias)
+        self.in_channels = conv.in_channels
+        self.out_channels = conv.out_channels
+        self.packed_bytes = weight.numel() + (bias.numel() * 4 if bias is not None else 0)
+
+    @staticmethod
+    def accepts(conv):
+        return (type(conv) is nn.Conv1d and conv.kernel_size == (1,) and conv.stride == (1,)
+                and conv.padding == (0,) and conv.groups == 1)
+
+    def forward(self, x):
+        y = torch.ops.quantized.linear_dynamic(x.transpose(1, 2).contiguous(), self._packed)
+        return y.transpose(1, 2)
+
+
+class Int8WeightConv(nn.Module):
+    """Conv1d/ConvTranspose1d holding int8 weights, dequantized for each call"""
+
+    def __init__(self, conv):
+        super().__init__()
+        qweight, scale = _quantize_weight(conv.weight.detach().float())
+        self.register_buffer("qweight", qweight)
+        self.register_buffer("scale", scale)
+        self.register_buffer("bias", conv.bias.detach().float() if conv.bias is not None else None)
+        self.transposed = isinstance(conv, nn.ConvTranspose1d)
+        self.stride = conv.stride
+        self.padding = conv.padding
+        self.dilation = conv.dilation
+        self.groups = conv.groups
+        self.output_padding = getattr(conv, "output_padding", (0,))
+
+    @staticmethod
+    def accepts(conv):
+        return type(conv) in (nn.Conv1d, nn.ConvTranspose1d) and conv.padding_mode == "zeros"
+
+    def forward(self, x):
+        weight = self.qweight.to(x.dtype) * self.scale.to(x.dtype)
+        bias = self.bias.to(x.dtype) if self.bias is not None else None
+        if self.transposed:
+            return F.conv_transpose1d(x, weight, bias, self.stride, self.padding,
+                                      self.output_padding, self.groups, self.dilation)
+        return F.conv1d(x, weight, bias, self.stride, self.padding, self.dilation, self.groups)
+
+
+def quantize_int8(model):
+    """
+    Replace the model's convs in place (see the module docstring).
+
+    Returns:
+        dict: number of layers converted per kind
+    """
+    counts = {"dynamic_int8": 0, "int8_weight": 0}
+
+    def convert(module):
+        for name, child in module.named_children():
+            if DynamicInt8PointwiseConv.accepts(child):
+                setattr(module, name, DynamicInt8PointwiseConv(child))
+                counts["dynamic_int8"] += 1
+            elif Int8WeightConv.accepts(child):
+                setattr(module, name, Int8WeightConv(child))
+                counts["int8_weight"] += 1
+            else:
+                convert(child)
+
+    convert(model)
+    return counts
+
+
+def autocast_bf16(model):
+    """Run model.inference under bfloat16 autocast; float outputs come back as fp32"""
+    inference = model.inference
+
+    def run(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            outputs = inference(*args, **kwargs)
+        return {
+            key: value.float() if torch.is_tensor(value) and value.is_floating_point() else value
+            for key, value in outputs.items()
+        }
+
+    model.inference = run
+
+
+def weight_megabytes(model):
+    """Parameter, buffer and packed int8 weight memory"""
+    total = sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+    total += sum(getattr(module, "packed_bytes", 0) for module in model.modules())
+    return round(total / (1024 * 1024), 1)
+
+
+def apply_precision(model, mode):
+    """
+    Switch a loaded VITS model (Synthesizer.tts_model) to a precision mode.
+    Call before wrapping it in VitsBatchRunner or serving requests.
+
+    Returns:
+        dict: mode and what changed, for /api/health
+
+    Raises:
+        ValueError: for an unknown mode
+    """
+    mode = (mode or "fp32").lower()
+    if mode not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision '{mode}'. Use one of: {', '.join(PRECISION_MODES)}")
+
+    info = {"mode": mode}
+    if mode == "int8":
+        if "fbgemm" in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = "fbgemm"
+        info["weight_norm_folded"] = fold_weight_norm(model)
+        info["layers"] = quantize_int8(model)
+    elif mode == "bf16":
+        if not torch.ops.mkldnn._is_mkldnn_bf16_supported():
+            logger.warning("This CPU has no native bfloat16 support; bf16 will likely be slower than fp32")
+        autocast_bf16(model)
+    info["weights_mb"] = weight_megabytes(model)
+    logger.info(f"Inference precision: {info}")
+    return info
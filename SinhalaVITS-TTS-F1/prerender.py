@@ -0,0 +1,72 @@
+"""
+Pre-render pipeline: synthesize scraped headlines ahead of the first listener
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+def prerender(texts, synthesize, cached_texts=None, max_workers=2, progress_every=10):
+    """
+    Synthesize every text that isn't cached yet, max_workers at a time.
+
+    Args:
+        texts: Texts to render (duplicates are rendered once)
+        synthesize: Callable taking one text; it is expected to cache the result
+        cached_texts: Optional callable taking the list of texts and returning
+            the subset that is already cached; those are skipped
+        max_workers: Parallel synthesize calls
+        progress_every: Log progress after this many completed items
+
+    Returns:
+        dict: counts and timings for the run
+    """
+    start = time.perf_counter()
+    unique = list(dict.fromkeys(t for t in texts if t))
+
+    skipped = set()
+    if cached_texts is not None and unique:
+        try:
+            skipped = set(cached_texts(unique))
+        except Exception as e:
+            logger.warning(f"Pre-render cache check failed, rendering everything: {str(e)}")
+    pending = [t for t in unique if t not in skipped]
+
+    report = {
+        "requested": len(unique),
+        "skipped_cached": len(skipped),
+        "rendered": 0,
+        "failed": 0,
+        "render_seconds_total": 0.0,
+        "render_seconds_max": 0.0,
+    }
+    if pending:
+        logger.info(f"Pre-rendering {len(pending)} of {len(unique)} texts with {max_workers} workers")
+
+    def timed(text):
+        item_start = time.perf_counter()
+        synthesize(text)
+        return time.perf_counter() - item_start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(timed, text): text for text in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                seconds = future.result()
+                report["rendered"] += 1
+                report["render_seconds_total"] += seconds
+                report["render_seconds_max"] = max(report["render_seconds_max"], seconds)
+            except Exception as e:
+                report["failed"] += 1
+                logger.warning(f"Pre-render failed for {futures[future][:30]}...: {str(e)}")
+            if done % progress_every == 0 or done == len(pending):
+                logger.info(f"Pre-render progress: {done}/{len(pending)}")
+
+    report["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    report["render_seconds_total"] = round(report["render_seconds_total"], 3)
+    report["render_seconds_max"] = round(report["render_seconds_max"], 3)
+    logger.info(f"Pre-render finished: {report}")
+    return report
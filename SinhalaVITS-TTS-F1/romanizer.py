@@ -1,6 +1,7 @@
 # This helps converting Sinhala text to standard Romanized text
 
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 # -- Specials (vowels, diacritics, standalone signs) --
 
@@ -117,15 +118,124 @@ def replace_all(text, mapping):
         text = re.sub(sinh, rom, text)
     return text
 
+# -- Precompiled single-pass engine --
+def build_translit_table(*mappings):
+    """
+    Merge mappings into one {sinhala: roman} dict.
+    Earlier mappings (and earlier entries) win on duplicate keys, matching
+    the order in which replace_all would have applied them.
+    """
+    table = {}
+    for mapping in mappings:
+        for sinh, rom in mapping:
+            table.setdefault(sinh, rom)
+    return table
+
+def compile_translit_pattern(table):
+    # longest keys first so the alternation always takes the longest match
+    keys = sorted(table, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in keys))
+
+# consonant combos and specials never share a leading character, so a single
+# longest-match pass gives the same result as the two replace_all passes
+ro_table = build_translit_table(ro_conso_combi, ro_specials)
+ro_pattern = compile_translit_pattern(ro_table)
+
+def _lookup(match, _table=ro_table):
+    return _table[match.group()]
+
 # -- Main Sinhala → Roman Function --
 def sinhala_to_roman(text):
 
     # remove ZWJ (zero-width joiner)
     text = text.replace("\u200D", "")
 
-    # do consonant+vowel combos first
-    text = replace_all(text, ro_conso_combi)
-
-    # then specials
-    text = replace_all(text, ro_specials)
-    return text
+    # consonant+vowel combos and specials in one left-to-right pass
+    return ro_pattern.sub(_lookup, text)
+
+# -- Batch conversion --
+#
+# Bulk path built from the same tables: every consonant becomes its roman form
+# plus an "inherent vowel" marker and every vowel sign becomes its own marker,
+# so a whole batch is converted with one str.translate and a few str.replace
+# calls instead of a regex callback per syllable. Markers are private-use
+# characters; leftovers are turned back into the bare vowel / original sign.
+
+_INHERENT = "\ue000"
+
+def _build_bulk_tables():
+    consonants = {}
+    for sinh, rom in ro_consonants:
+        consonants.setdefault(sinh, rom)
+
+    bare_vowel = next(combi[1] for combi in ro_combinations if combi[2] == "")
+    sign_markers = {}
+    for combi in ro_combinations:
+        if combi[2] and combi[2] not in sign_markers:
+            sign_markers[combi[2]] = (chr(0xE001 + len(sign_markers)), combi[1])
+
+    multi_specials = []
+    trans = {}
+    for sinh, rom in ro_specials:
+        if len(sinh) > 1:
+            multi_specials.append((sinh, rom))
+        else:
+            trans.setdefault(ord(sinh), rom)
+    multi_specials.sort(key=lambda x: len(x[0]), reverse=True)
+
+    for sinh, rom in consonants.items():
+        trans[ord(sinh)] = rom + _INHERENT
+    for sign, (marker, _) in sign_markers.items():
+        trans[ord(sign)] = marker
+
+    # applied in order after translate
+    replacements = [(_INHERENT + marker, vowel) for marker, vowel in sign_markers.values()]
+    replacements.append((_INHERENT, bare_vowel))
+    replacements.extend((marker, sign) for sign, (marker, _) in sign_markers.items())
+    return multi_specials, trans, replacements
+
+ro_bulk_specials, ro_bulk_trans, ro_bulk_replacements = _build_bulk_tables()
+ro_bulk_markers = re.compile("[\ue000-\ue0ff]")
+
+# separator used to join a batch into one string; nothing maps it, so it
+# survives conversion and splits the result back per text
+BATCH_SEPARATOR = "\x1f"
+
+# below this many texts a process pool costs more than it saves
+POOL_MIN_BATCH = 50000
+
+def _romanize_chunk(texts):
+    joined = BATCH_SEPARATOR.join(texts)
+    if (any(BATCH_SEPARATOR in text for text in texts)
+            or ro_bulk_markers.search(joined)):
+        return [sinhala_to_roman(text) for text in texts]
+
+    joined = joined.replace("\u200D", "")
+    for sinh, rom in ro_bulk_specials:
+        joined = joined.replace(sinh, rom)
+    joined = joined.translate(ro_bulk_trans)
+    for old, new in ro_bulk_replacements:
+        joined = joined.replace(old, new)
+    return joined.split(BATCH_SEPARATOR)
+
+def romanize_many(texts, processes=None, chunk_size=10000):
+    """
+    Convert a list of Sinhala texts in one call.
+
+    Gives the same output as sinhala_to_roman on each text. Pass processes > 1
+    to spread batches of at least POOL_MIN_BATCH texts over a process pool in
+    chunks of chunk_size. Returns a list in the same order as texts.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    if not processes or processes <= 1 or len(texts) < POOL_MIN_BATCH:
+        return _romanize_chunk(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    result = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for converted in pool.map(_romanize_chunk, chunks):
+            result.extend(converted)
+    return result
@@ -0,0 +1,85 @@
+"""
+Helpers for chunked streaming synthesis: sentence splitting and streamed WAV framing
+"""
+
+import re
+import struct
+
+# Sentence ends: . ! ? ; : and Sinhala kunddaliya (෴), or line breaks
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;:\u0DF4])\s+|\s*\n+\s*')
+CLAUSE_BOUNDARY = re.compile(r'(?<=,)\s+')
+HAS_SINHALA = re.compile(r'[\u0D80-\u0DFF]')
+
+# Longer sentences are split at commas, then at spaces, so the first chunk
+# (and therefore time-to-first-audio) stays short
+MAX_CHUNK_CHARS = 200
+
+# Data size for a header whose length isn't known yet; players treat it as "until EOF"
+STREAMING_DATA_SIZE = 0xFFFFFFFF - 36
+
+# Full-scale amplitude of the model's output (the VITS decoder ends in tanh).
+# A stream scales every sentence by this one fixed gain: normalizing each
+# sentence to its own peak would make the loudness jump between sentences.
+STREAM_PEAK = 1.0
+
+
+def _split_long(piece, max_chars):
+    if len(piece) <= max_chars:
+        return [piece]
+    parts = []
+    for clause in CLAUSE_BOUNDARY.split(piece):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            parts.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            parts.append(clause)
+    return parts
+
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split Sinhala text into sentence-sized chunks for synthesis, in order.
+    Chunks without any Sinhala characters (stray punctuation) are dropped.
+    """
+    chunks = []
+    for piece in SENTENCE_BOUNDARY.split(text.strip()):
+        for chunk in _split_long(piece.strip(), max_chars):
+            if chunk and HAS_SINHALA.search(chunk):
+                chunks.append(chunk)
+    return chunks
+
+
+def wav_header(sample_rate, data_size=STREAMING_DATA_SIZE, channels=1, bits_per_sample=16):
+    """44-byte PCM WAV header. The default data_size marks an open-ended stream."""
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample,
+        b'data', data_size,
+    )
+
+
+def pcm16(wav, peak=None):
+    """
+    Convert a float waveform to 16-bit PCM bytes.
+
+    Args:
+        wav: Float waveform
+        peak: Amplitude that maps to full scale (louder samples clip), e.g.
+            STREAM_PEAK; None peak-normalizes wav the same way
+            Synthesizer.save_wav does
+    """
+    import numpy as np
+
+    wav = np.asarray(wav, dtype=np.float32)
+    if wav.size == 0:
+        return b""
+    if peak is None:
+        peak = max(0.01, float(np.max(np.abs(wav))))
+    wav = np.clip(wav * (32767 / peak), -32767, 32767)
+    return wav.astype(np.int16).tobytes()
@@ -18,7 +18,7 @@ import { MiniAudioPlayer } from "@/components/mini-audio-player";
 import { SimpleSidebar } from "@/components/simple-sidebar";
 import { BreakingNewsTicker } from "@/components/breaking-news-ticker";
 import { ThemeToggle } from "@/components/theme-toggle";
-import { fetchNews, synthesizeText, checkHealth, NewsItem } from "@/lib/api";
+import { fetchNews, synthesizeAudio, checkHealth, NewsItem } from "@/lib/api";
 import { useAudioQueue } from "@/contexts/audio-queue-context";
 import { useListenLater } from "@/hooks/use-listen-later";
 import { useKeyboardNavigation } from "@/hooks/use-keyboard-navigation";
@@ -198,8 +198,7 @@ export default function Home() {
 
     setIsGenerating((prev) => new Set(prev).add(item.id));
     try {
-      const blob = await synthesizeText(item.text);
-      const url = URL.createObjectURL(blob);
+      const { url, blob } = await synthesizeAudio(item.text);
 
       updateQueueItem(queueIndex, { audioUrl: url, audioBlob: blob });
 
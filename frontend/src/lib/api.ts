@@ -72,6 +72,63 @@ export async function checkHealth(): Promise<HealthResponse> {
   }
 }
 
+export interface SynthesizedAudio {
+  url: string;
+  blob?: Blob;
+}
+
+interface AudioLocationResponse {
+  hash: string;
+  url: string;
+  content_type: string;
+  format: string;
+}
+
+/**
+ * Synthesize Sinhala text to speech and return a playable URL.
+ *
+ * Backends with an audio store reply with the content-addressed
+ * /api/audio/<hash> URL, which the browser caches and can seek in with
+ * Range requests; otherwise the audio comes back inline as a blob URL.
+ */
+export async function synthesizeAudio(text: string): Promise<SynthesizedAudio> {
+  if (!SYNTHESIZE_URL) {
+    throw new Error('TTS endpoint not configured. Please set NEXT_PUBLIC_SYNTHESIZE_URL environment variable.');
+  }
+  
+  const response = await fetch(SYNTHESIZE_URL, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ text, return_url: true }),
+  });
+
+  const contentType = response.headers.get('content-type');
+
+  if (!response.ok) {
+    // Try to parse error response
+    if (contentType && contentType.includes('application/json')) {
+      const error: ErrorResponse = await response.json();
+      throw new Error(error.details || error.error || 'Failed to generate speech');
+    }
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  if (contentType && contentType.includes('application/json')) {
+    const location: AudioLocationResponse = await response.json();
+    return { url: new URL(location.url, SYNTHESIZE_URL).toString() };
+  }
+
+  // Check if response is audio
+  if (contentType && contentType.startsWith('audio/')) {
+    const blob = await response.blob();
+    return { url: URL.createObjectURL(blob), blob };
+  }
+
+  throw new Error('Unexpected response type');
+}
+
 /**
  * Synthesize Sinhala text to speech
  */
@@ -100,7 +157,7 @@ export async function synthesizeText(text: string): Promise<Blob> {
   }
 
   // Check if response is audio
-  if (contentType && contentType.includes('audio/wav')) {
+  if (contentType && contentType.startsWith('audio/')) {
     return response.blob();
   }
 